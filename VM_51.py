@@ -1,24 +1,37 @@
 #!/Library/Frameworks/Python.framework/Versions/3.12/bin/python3
 # -*- coding: utf-8 -*-
 
+import time
+_STARTUP_T0 = time.perf_counter()
 
 import json
-import sys, os, subprocess, shutil, logging, re, random
+import sys, os, shutil, logging
 from datetime import datetime
 from functools import partial
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from PIL import Image, ImageOps
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtCore import pyqtSignal
-import requests
+
+from vide import calibrate, core, eventsync, preflight, printing, resources, settings, trace, warmup
+from vide.api import ApiClient, ApiError
+from vide.core import (
+    DATA_FILE, TEMPLATES, NORMAL_RATIO, sessions,
+    is_image_file, crop_to_aspect_ratio, custom_crop, create_output_directory,
+    sync_event_from_folders, update_event_data, open_print_dialog, open_path,
+    process_directory, create_custom_output_directory, process_custom_files,
+    make_duplicates, finish_session, finish_custom_session, custom_template_path,
+    render_selected_photos,
+)
+from vide.paths import APP_DIR, LOG_DIR
+from vide.registry import PhotoRegistry
+from vide.watchdog import StallWatchdog
+
+_IMPORTS_DONE = time.perf_counter()
 
 
 # -----------------------------------------------------------------------------
 #                           CONSTANTS & GLOBALS
 # -----------------------------------------------------------------------------
-DATA_FILE = "event_data.txt"
-
 LOGO_COLOR = "#EC1C5B"
 BACKGROUND_COLOR = "#1E1E1E"
 BUTTON_COLOR = "#2E2E2E"
@@ -28,430 +41,10 @@ DEEP_PINK = "#EC1C5B"
 WHITE = "#FFFFFF"
 BLACK = "#000000"
 
-# Only DNP 6x4 mode is supported.
-TEMPLATES = {
-    "DNP 6x4": {
-        "width": 1800,
-        "height": 1200,
-        "margin_top": 4,
-        "margin_left": 4,
-        "margin_right": 4,
-        "margin_bottom": 12.4,
-    },
-}
-
-sessions = []
-current_template = None
-
-original_paths = {}
-manual_crops = {}
-manual_crop_rects = {}
-
-NORMAL_RATIO = 4 / 5
-used_random_numbers = set()
-
-os.makedirs("logs", exist_ok=True)
-logging.basicConfig(
-    filename=os.path.join("logs", "vide_maker_improved.log"),
-    level=logging.DEBUG,
-    format="%(asctime)s:%(levelname)s:%(message)s",
-)
-
-# -----------------------------------------------------------------------------
-#                           HELPER FUNCTIONS
-# -----------------------------------------------------------------------------
-def is_image_file(fp):
-    return fp.lower().endswith((".png", ".jpg", ".jpeg", ".bmp", ".gif"))
-
-def is_video_file(fp):
-    return fp.lower().endswith((".mov", ".mp4", ".avi", ".mkv"))
-
-def extract_number(fname):
-    match_custom = re.match(r".*?\b(\d+)\s*\(custom\)", fname, re.IGNORECASE)
-    if match_custom:
-        return int(match_custom.group(1))
-    nums = re.findall(r"(\d+)", fname)
-    return int(nums[-1]) if nums else None
-
-def create_output_directory(base_dir, folder_name="output"):
-    i = 1
-    while True:
-        new_dir = os.path.join(base_dir, f"{folder_name} {i}")
-        if not os.path.exists(new_dir):
-            os.makedirs(new_dir)
-            return new_dir
-        i += 1
-
-def generate_unique_id():
-    today = datetime.now().strftime("%Y%m%d")
-    while True:
-        rand_val = random.randint(10000, 99999)
-        if rand_val not in used_random_numbers:
-            used_random_numbers.add(rand_val)
-            return f"{today}_{rand_val}"
-
-def get_new_filename(is_photo=True, unique_id=None, copy_num=None):
-    if is_photo:
-        return f"{unique_id}_p{'_copy' + str(copy_num) if copy_num else ''}.jpg"
-    else:
-        return f"{unique_id}_v{'_copy' + str(copy_num) if copy_num else ''}.mov"
-
-def crop_to_aspect_ratio(image, ratio=0.8):
-    w, h = image.size
-    current_ratio = w / h
-    if current_ratio > ratio:
-        new_w = int(h * ratio)
-        left = (w - new_w) // 2
-        return image.crop((left, 0, left + new_w, h))
-    else:
-        new_h = int(w / ratio)
-        top = (h - new_h) // 2
-        return image.crop((0, top, w, top + new_h))
-
-def custom_crop(image, ratio):
-    w, h = image.size
-    current_ratio = w / h
-    if current_ratio > ratio:
-        new_w = int(h * ratio)
-        left = (w - new_w) // 2
-        return image.crop((left, 0, left + new_w, h))
-    else:
-        new_h = int(w / ratio)
-        top = (h - new_h) // 2
-        return image.crop((0, top, w, top + new_h))
-
-def build_ffmpeg_crop_filter(ratio):
-    ratio_str = f"{ratio:.6f}"
-    crop_filter = (
-        f"crop=if(gt(iw/ih\\,{ratio_str})\\,ih*{ratio_str}\\,iw):"
-        f"if(gt(iw/ih\\,{ratio_str})\\,ih\\,iw/{ratio_str}):"
-        f"(iw-if(gt(iw/ih\\,{ratio_str})\\,ih*{ratio_str}\\,iw))/2:"
-        f"(ih-if(gt(iw/ih\\,{ratio_str})\\,ih\\,iw/{ratio_str}))/2"
-    )
-    return crop_filter
-
-# --- New sorting key to group duplicate copies together ---
-def sort_key_with_copies(filepath):
-    base = os.path.splitext(os.path.basename(filepath))[0]
-    base_clean = re.sub(r"\s*\(\d+\)$", "", base)
-    m = re.search(r"_copy(\d+)", base, re.IGNORECASE)
-    if m:
-        copy_num = int(m.group(1))
-        base_clean = re.sub(r"_copy\d+", "", base, flags=re.IGNORECASE)
-    else:
-        copy_num = 0
-    return (base_clean, copy_num)
-
-# -----------------------------------------------------------------------------
-#             FOLDER REORDER & EVENT DATA FUNCTIONS
-# -----------------------------------------------------------------------------
-def reorder_output_folders(event_folder):
-    outs = [f for f in os.listdir(event_folder) if f.startswith("output")]
-    outs.sort(key=extract_number)
-    exp_normal = 1
-    for fold in outs:
-        m = re.search(r"(\d+)$", fold)
-        if not m:
-            continue
-        num = int(m.group(1))
-        if num != exp_normal:
-            old_path = os.path.join(event_folder, fold)
-            new_path = os.path.join(event_folder, f"output {exp_normal}")
-            os.rename(old_path, new_path)
-        exp_normal += 1
-
-def sync_event_from_folders(event_folder, application):
-    global sessions, current_template
-    sessions.clear()
-    data_path = os.path.join(event_folder, DATA_FILE)
-    templ_found = False
-    if os.path.exists(data_path):
-        try:
-            with open(data_path, "r") as f:
-                lines = f.readlines()
-            current_template = lines[0].split(": ")[1].strip()
-            templ_found = True
-        except:
-            pass
-    if not templ_found:
-        current_template = "DNP 6x4"
-    outs = [f for f in os.listdir(event_folder) if f.startswith("output")]
-    outs.sort(key=extract_number)
-    for idx, fold in enumerate(outs, start=1):
-        op = os.path.join(event_folder, fold)
-        t_out = os.path.join(op, "template_output")
-        tg = len([x for x in os.listdir(op) if is_image_file(os.path.join(op, x))])
-        pr = 0
-        if os.path.exists(t_out):
-            pr = len([x for x in os.listdir(t_out) if is_image_file(os.path.join(t_out, x))])
-        sessions.append({
-            "folder": op,
-            "output": op,
-            "targets": tg,
-            "prints": pr * 2,
-            "print_files": pr,
-            "event_digital_folder": os.path.join(event_folder, "digital"),
-            "custom": "(custom)" in fold.lower()
-        })
-
-def update_event_data(app):
-    data_path = os.path.join(app.event_folder, DATA_FILE)
-    reorder_output_folders(app.event_folder)
-    sync_event_from_folders(app.event_folder, app)
-    total_sess = len(sessions)
-    total_targets = sum(s["targets"] for s in sessions)
-    total_print_files = sum(s["print_files"] for s in sessions)
-    total_prints = total_print_files * 2
-    with open(data_path, "w") as f:
-        f.write(f"Template: {current_template}\n")
-        f.write(f"Total Sessions: {total_sess}\n")
-        f.write(f"Total Targets: {total_targets}\n")
-        f.write(f"Total Prints: {total_prints}\n\n")
-        f.write("Sessions Data:\nSession # | Targets | Prints\n")
-        for i, se in enumerate(sessions, start=1):
-            f.write(f"{i} | {se['targets']} | {se['prints']}\n")
-
-# -----------------------------------------------------------------------------
-#                           CREATE PDF & OPEN PRINT DIALOG
-# -----------------------------------------------------------------------------
-def create_pdf_from_images(folder, pdf_path):
-    from PIL import Image
-    fs = [os.path.join(folder, x) for x in os.listdir(folder) if is_image_file(os.path.join(folder, x))]
-    if not fs:
-        return
-    fs.sort()
-    imgs = [Image.open(fp).convert("RGB") for fp in fs]
-    if imgs:
-        imgs[0].save(pdf_path, save_all=True, append_images=imgs[1:], quality=100)
-
-def open_print_dialog(folder):
-    """Opens the folder for printing by generating a PDF (on Windows) or opening the images sorted by modification date."""
-    if os.path.exists(folder):
-        items = sorted(
-            [os.path.join(folder, f) for f in os.listdir(folder) if is_image_file(os.path.join(folder, f))],
-            key=os.path.getmtime
-        )
-        if items:
-            try:
-                if sys.platform == "win32":
-                    pdf_path = os.path.join(folder, "print_session.pdf")
-                    create_pdf_from_images(folder, pdf_path)
-                    os.startfile(pdf_path)
-                elif sys.platform == "darwin":
-                    subprocess.run(["open"] + items)
-                else:
-                    subprocess.run(["xdg-open"] + items)
-            except Exception as e:
-                logging.error(f"Print error: {e}")
-
-# -----------------------------------------------------------------------------
-#                           PROCESS DIRECTORY FUNCTION
-# -----------------------------------------------------------------------------
-def process_directory(input_dir, output_dir, progress_callback=None):
-    fs = os.listdir(input_dir)
-    imgs, vids = [], []
-    for f in fs:
-        fp = os.path.join(input_dir, f)
-        if os.path.isfile(fp):
-            if is_image_file(fp):
-                imgs.append(f)
-            elif is_video_file(fp):
-                vids.append(f)
-    images_info = [{"file": i, "num": extract_number(i)} for i in imgs]
-    videos_info = [{"file": v, "num": extract_number(v)} for v in vids]
-    images_info.sort(key=lambda x: x["num"] if x["num"] else float("inf"))
-    videos_info.sort(key=lambda x: x["num"] if x["num"] else float("inf"))
-    used_videos = set()
-    pairs = []
-    for i_data in images_info:
-        inum = i_data["num"]
-        ifile = i_data["file"]
-        exact = None
-        for v_data in videos_info:
-            if v_data["num"] == inum and v_data["file"] not in used_videos:
-                exact = v_data
-                break
-        if exact:
-            pairs.append((ifile, exact["file"]))
-            used_videos.add(exact["file"])
-            continue
-        cands = [v for v in videos_info if v["num"] and v["num"] <= inum and v["file"] not in used_videos]
-        if cands:
-            best = max(cands, key=lambda x: x["num"])
-            pairs.append((ifile, best["file"]))
-            used_videos.add(best["file"])
-            continue
-        cands = [v for v in videos_info if v["num"] and v["num"] > inum and v["file"] not in used_videos]
-        if cands:
-            best = min(cands, key=lambda x: x["num"])
-            pairs.append((ifile, best["file"]))
-            used_videos.add(best["file"])
-            continue
-        logging.error(f"No video found for {ifile}")
-        raise ValueError(f"No video found for {ifile}")
-    total = len(pairs) * 2
-    futures = []
-    paired_images = []
-    done = 0
-    with ThreadPoolExecutor() as executor:
-        for (img_f, vid_f) in pairs:
-            uid = generate_unique_id()
-            photo_name = get_new_filename(True, uid)
-            paired_images.append(photo_name)
-            futures.append(executor.submit(process_file, img_f, "P", uid, input_dir, output_dir))
-            futures.append(executor.submit(process_file, vid_f, "V", uid, input_dir, output_dir))
-        for i in imgs:
-            if "_copy" in i.lower():
-                uid = generate_unique_id()
-                c_m = re.search(r"_copy(\d+)", i.lower())
-                cnum = c_m.group(1) if c_m else "1"
-                copy_name = get_new_filename(True, uid, cnum)
-                paired_images.append(copy_name)
-                futures.append(executor.submit(process_file, i, "P", uid, input_dir, output_dir))
-                total += 1
-        for future in as_completed(futures):
-            try:
-                future.result()
-                done += 1
-                if progress_callback:
-                    progress_callback(int((done / total) * 100))
-            except Exception as e:
-                logging.error(f"process_directory error: {e}")
-                if os.path.exists(output_dir):
-                    shutil.rmtree(output_dir)
-                raise
-    return paired_images
-
-# -----------------------------------------------------------------------------
-#                           APPLY TEMPLATES (WITH OFFSET)
-# -----------------------------------------------------------------------------
-def apply_templates(photo_paths, template_path, template_out_dir,
-                    position_adjustment_mm=0, progress_callback=None,
-                    template_name=None):
-    from PIL import Image, ImageOps
-    global current_template
-    if template_name is None:
-        template_name = current_template
-    tinfo = TEMPLATES[template_name]
-    tW, tH = tinfo["width"], tinfo["height"]
-    m_top = tinfo["margin_top"]
-    m_left = tinfo["margin_left"]
-    m_right = tinfo["margin_right"]
-    m_bottom = tinfo["margin_bottom"]
-    dpi = 300
-    px_top = int(m_top * dpi / 25.4)
-    px_left = int(m_left * dpi / 25.4)
-    px_right = int(m_right * dpi / 25.4)
-    px_bottom = int(m_bottom * dpi / 25.4)
-    px_adjust = int(position_adjustment_mm * dpi / 25.4)
-    template = Image.open(template_path).convert("RGBA")
-    final_photos = []
-    for p in photo_paths:
-        if p in manual_crops:
-            final_photos.append(manual_crops[p])
-        else:
-            final_photos.append(p)
-    final_photos.sort(key=sort_key_with_copies)
-    def resize_crop(img, w, h):
-        ratio_img = img.width / img.height
-        ratio_tgt = w / h
-        if ratio_img > ratio_tgt:
-            sc = h / img.height
-        else:
-            sc = w / img.width
-        new_sz = (int(img.width * sc), int(img.height * sc))
-        img = img.resize(new_sz, Image.LANCZOS)
-        left = (img.width - w) // 2
-        top = (img.height - h) // 2
-        return img.crop((left, top, left + w, top + h))
-    if len(final_photos) % 2 != 0:
-        final_photos.append(final_photos[-1])
-    total = len(final_photos)
-    for i in range(0, len(final_photos), 2):
-        p1 = final_photos[i]
-        p2 = final_photos[i+1]
-        im1 = Image.open(p1).convert("RGBA")
-        im1 = ImageOps.exif_transpose(im1)
-        im2 = Image.open(p2).convert("RGBA")
-        im2 = ImageOps.exif_transpose(im2)
-        half_w = (tW // 2) - px_left - px_right
-        av_h = tH - px_top - px_bottom
-        r1 = resize_crop(im1, half_w, av_h)
-        r2 = resize_crop(im2, half_w, av_h)
-        base = Image.new("RGBA", (tW, tH), (255, 255, 255, 255))
-        base.paste(template, (0, 0), template)
-        base.paste(r1, (px_left, px_top))
-        base.paste(template, (tW // 2, 0), template)
-        base.paste(r2, ((tW // 2) + px_left, px_top))
-        final_width = tW + abs(px_adjust)
-        final_img = Image.new("RGBA", (final_width, tH), (255, 255, 255, 255))
-        paste_x = px_adjust if px_adjust >= 0 else 0
-        final_img.paste(base, (paste_x, 0))
-        outp = os.path.join(template_out_dir, f"print_{i // 2}.png")
-        final_img.save(outp, dpi=(dpi, dpi), quality=95, subsampling=0)
-        if progress_callback:
-            prog = int(((i + 2) / total) * 100)
-            progress_callback(prog)
-
-# -----------------------------------------------------------------------------
-#                           PROCESS FILE FUNCTION
-# -----------------------------------------------------------------------------
-def process_file(file_name, file_type, unique_id, input_dir, output_dir):
-    input_path = os.path.join(input_dir, file_name)
-    copy_num_match = re.search(r"_copy(\d+)", file_name.lower())
-    copy_num = copy_num_match.group(1) if copy_num_match else None
-    is_photo = (file_type.upper() == "P")
-    digital_folder = os.path.join(os.path.dirname(output_dir), "digital")
-    digi_photos = os.path.join(digital_folder, "photos")
-    digi_videos = os.path.join(digital_folder, "videos")
-    os.makedirs(digi_photos, exist_ok=True)
-    os.makedirs(digi_videos, exist_ok=True)
-    if is_photo:
-        hr_filename = get_new_filename(True, unique_id, copy_num)
-        hr_path = os.path.join(digi_photos, hr_filename)
-        try:
-            im = Image.open(input_path)
-            im = ImageOps.exif_transpose(im)
-            auto_crop = crop_to_aspect_ratio(im, NORMAL_RATIO)
-            auto_crop.save(hr_path, "JPEG", quality=95, subsampling=0)
-            original_paths[hr_path] = input_path
-        except Exception as e:
-            logging.error(f"Photo HR error: {e}")
-            raise
-        out_path = os.path.join(output_dir, hr_filename)
-        try:
-            mini = Image.open(hr_path)
-            mini = ImageOps.exif_transpose(mini)
-            mini.thumbnail((1200, 1200), Image.LANCZOS)
-            mini.save(out_path, "JPEG", quality=85, subsampling=0)
-        except Exception as e:
-            logging.error(f"Minimize photo error: {e}")
-            raise
-        return out_path
-    else:
-        hr_filename = get_new_filename(False, unique_id, copy_num)
-        hr_path = os.path.join(digi_videos, hr_filename)
-        try:
-            shutil.copy(input_path, hr_path)
-        except Exception as e:
-            logging.error(f"Video copy error: {e}")
-            raise
-        crop_filter = build_ffmpeg_crop_filter(NORMAL_RATIO)
-        out_path = os.path.join(output_dir, hr_filename)
-        ffmpeg_cmd = [
-            "ffmpeg", "-i", hr_path,
-            "-vf", f"{crop_filter},scale=-2:480",
-            "-vcodec", "libx264", "-crf", "23", "-preset", "medium",
-            "-acodec", "aac",
-            out_path
-        ]
-        try:
-            subprocess.run(ffmpeg_cmd, check=True)
-        except Exception as e:
-            logging.error(f"Video compress error: {e}")
-            raise
-        return out_path
-
+# Launch-to-first-paint budget; exceeding it is logged as a warning, and
+# ``--startup-report`` exits with status 1 so CI can enforce it.
+STARTUP_BUDGET_MS = float(os.environ.get("VIDE_STARTUP_BUDGET_MS", "1500"))
+STARTUP_REPORT_FILE = os.path.join(APP_DIR, "startup.json")
 
 # -----------------------------------------------------------------------------
 #                           WORKER CLASSES
@@ -464,21 +57,33 @@ class Worker(QtCore.QObject):
     progress_message = pyqtSignal(str)
     progress_value = pyqtSignal(int)
     process_stopped = pyqtSignal()
-    def __init__(self, input_folder, event_folder, template_path, application):
+    def __init__(self, input_folder, event_folder, template_path, application, pairs=None):
         super().__init__()
         self.input_folder = input_folder
         self.event_folder = event_folder
         self.template_path = template_path
         self.application = application
+        self.pairs = pairs
         self.output_directory = None
         self.paired_images = []
         self.stop_requested = False
+        self.trace = None
+        self.memory = None
+        self.sheets_ready = 0
+        self.print_sheet = None
     def run(self):
         try:
             self.progress_message.emit("Processing files...")
-            self.output_directory = create_output_directory(self.event_folder)
+            self.output_directory = create_output_directory(self.event_folder, in_progress=True)
+            name = f"{os.path.basename(self.event_folder)} {os.path.basename(self.output_directory)}"
+            self.trace = trace.start(name)
+            self.memory = resources.RssMonitor(name).start()
             self.paired_images = process_directory(self.input_folder, self.output_directory,
-                                                   progress_callback=self.update_prog)
+                                                   progress_callback=self.update_prog,
+                                                   registry=self.application.photo_registry,
+                                                   should_stop=lambda: self.stop_requested,
+                                                   pairs=self.pairs)
+            self.application.photo_registry.save()
             if self.stop_requested:
                 self.cleanup()
                 return
@@ -486,6 +91,7 @@ class Worker(QtCore.QObject):
             self.show_duplicates_dialog.emit(self.output_directory, self.paired_images)
         except Exception as e:
             logging.error(f"Worker run error: {e}")
+            self.end_monitoring()
             if self.output_directory and os.path.exists(self.output_directory):
                 shutil.rmtree(self.output_directory)
             self.error.emit(str(e))
@@ -495,6 +101,12 @@ class Worker(QtCore.QObject):
     def update_prog_tmpl(self, val):
         self.progress_value.emit(val)
         self.progress_message.emit(f"Applying templates... {val}%")
+    def sheet_ready(self, path):
+        """Called from the render as each sheet is written: counts it in the job status and spools it."""
+        self.sheets_ready += 1
+        self.progress_message.emit(f"Applying templates... {self.sheets_ready} sheet(s) ready")
+        if self.print_sheet:
+            self.print_sheet(path)
     @QtCore.pyqtSlot(dict)
     def process_duplicates(self, duplicates):
         try:
@@ -502,86 +114,104 @@ class Worker(QtCore.QObject):
                 self.cleanup()
                 return
             self.progress_value.emit(0)
-            for path, count in duplicates.items():
-                for i in range(count - 1):
-                    cp = os.path.splitext(path)[0] + f"_copy{i+1}" + os.path.splitext(path)[1]
-                    shutil.copy(path, cp)
-                if self.stop_requested:
-                    self.cleanup()
-                    return
-            if self.template_path:
-                template_out = os.path.join(self.output_directory, "template_output")
-                os.makedirs(template_out, exist_ok=True)
-            else:
-                template_out = None
-            digi_photos = os.path.join(self.event_folder, "digital", "photos")
-            min_photos = [os.path.join(self.output_directory, f)
-                          for f in os.listdir(self.output_directory)
-                          if is_image_file(os.path.join(self.output_directory, f))]
-            normalized = []
-            for mp in min_photos:
-                dn, fn = os.path.split(mp)
-                b, e = os.path.splitext(fn)
-                b = re.sub(r"\s*\(\d+\)$", "", b)
-                nf = b + e
-                np = os.path.join(dn, nf)
-                if np != mp:
-                    os.rename(mp, np)
-                normalized.append(np)
-            hr_list = []
-            for np in normalized:
-                fname = os.path.basename(np)
-                hrp = os.path.join(digi_photos, fname)
-                if os.path.exists(hrp):
-                    hr_list.append(hrp)
-                else:
-                    hr_list.append(np)
-            if template_out:
-                self.update_prog_tmpl(0)
-                apply_templates(hr_list, self.template_path, template_out,
-                                position_adjustment_mm=self.application.template_position_adjustment,
-                                progress_callback=self.update_prog_tmpl)
-                if self.stop_requested:
-                    self.cleanup()
-                    return
-                if sys.platform == "win32":
-                    pdfp = os.path.join(template_out, "print_session.pdf")
-                    create_pdf_from_images(template_out, pdfp)
-            for f in os.listdir(self.output_directory):
-                if "_copy" in f.lower():
-                    try:
-                        os.remove(os.path.join(self.output_directory, f))
-                    except:
-                        pass
-            if template_out and os.path.exists(template_out):
-                prints = len([x for x in os.listdir(template_out) if is_image_file(os.path.join(template_out, x))])
-            else:
-                prints = 0
-            sessions.append({
-                "folder": self.input_folder,
-                "output": self.output_directory,
-                "targets": len(self.paired_images),
-                "prints": prints * 2,
-                "print_files": prints,
-                "event_digital_folder": os.path.join(self.event_folder, "digital"),
-                "custom": False
-            })
-            update_event_data(self.application)
+            if not make_duplicates(duplicates, should_stop=lambda: self.stop_requested):
+                self.cleanup()
+                return
+            self.print_sheet = self.application.auto_print_callback(self.output_directory)
+            entry = finish_session(self.event_folder, self.input_folder, self.output_directory,
+                                   self.paired_images, self.template_path,
+                                   position_adjustment_mm=self.application.template_position_adjustment,
+                                   registry=self.application.photo_registry,
+                                   progress_callback=self.update_prog_tmpl,
+                                   should_stop=lambda: self.stop_requested,
+                                   sheet_callback=self.sheet_ready)
+            if entry is None:
+                self.cleanup()
+                return
+            self.end_monitoring()
             self.update_sessions.emit()
             self.progress_message.emit("Processing Complete")
             self.finished.emit()
         except Exception as e:
             logging.error(f"Duplicates error: {e}")
+            self.end_monitoring()
             if self.output_directory and os.path.exists(self.output_directory):
                 shutil.rmtree(self.output_directory)
             self.error.emit(str(e))
     def cleanup(self):
+        self.end_monitoring()
+        self.application.cancel_queued_prints(self.output_directory)
         if self.output_directory and os.path.exists(self.output_directory):
             shutil.rmtree(self.output_directory)
         self.process_stopped.emit()
+    def end_monitoring(self):
+        trace.stop(self.trace)
+        self.trace = None
+        if self.memory:
+            self.memory.stop()
+            self.memory = None
     def stop(self):
         self.stop_requested = True
 
+class SignInWorker(QtCore.QObject):
+    signed_in = pyqtSignal()
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+    def __init__(self, client, email=None, password=None):
+        super().__init__()
+        self.client = client
+        self.email = email
+        self.password = password
+    def run(self):
+        try:
+            if self.email is None:
+                if self.client.restore_session():
+                    self.signed_in.emit()
+                else:
+                    self.failed.emit("")
+            else:
+                self.client.sign_in(self.email, self.password)
+                self.signed_in.emit()
+        except ApiError as e:
+            logging.error(f"Sign in error: {e}")
+            self.failed.emit(str(e))
+        except Exception as e:
+            logging.error(f"Sign in error: {e}")
+            self.failed.emit(f"Sign in failed: {e}")
+        finally:
+            self.password = None
+            self.finished.emit()
+
+class PreflightWorker(QtCore.QObject):
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+    def __init__(self, input_folder, event_folder):
+        super().__init__()
+        self.input_folder = input_folder
+        self.event_folder = event_folder
+    def run(self):
+        try:
+            self.done.emit(preflight.run(self.input_folder, self.event_folder))
+        except Exception as e:
+            logging.error(f"Preflight error: {e}")
+            self.failed.emit(f"Could not check {self.input_folder}: {e}")
+        finally:
+            self.finished.emit()
+
+class CalibrateWorker(QtCore.QObject):
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+    def run(self):
+        try:
+            self.done.emit(calibrate.run())
+        except Exception as e:
+            logging.error(f"Calibration error: {e}")
+            self.failed.emit(f"Could not calibrate: {e}")
+        finally:
+            self.finished.emit()
+
 class CustomModeWorker(QtCore.QObject):
     finished = pyqtSignal()
     error = pyqtSignal(str)
@@ -608,83 +238,47 @@ class CustomModeWorker(QtCore.QObject):
         self.total_count = len(files)
         self.apply_template = apply_template
         self.do_crop = do_crop
+        self.trace = None
+        self.memory = None
+        self.sheets_ready = 0
+        self.print_sheet = None
     def run(self):
         try:
             self.progress_message.emit("Processing custom files...")
-            custom_dir = os.path.join(self.event_folder, "custom mode")
-            os.makedirs(custom_dir, exist_ok=True)
-            i = 1
-            while True:
-                new_dir = os.path.join(custom_dir, f"output {i} (custom)")
-                if not os.path.exists(new_dir):
-                    os.makedirs(new_dir)
-                    self.output_directory = new_dir
-                    break
-                i += 1
-            print_dir = os.path.join(self.output_directory, "print")
-            os.makedirs(print_dir, exist_ok=True)
-            done = 0
-            for f in self.files:
-                if self.stop_requested:
-                    self.cleanup()
-                    return
-                uid = generate_unique_id()
-                is_photo = is_image_file(f)
-                if is_photo:
-                    new_photo_name = get_new_filename(True, uid)
-                    hi_res_path = os.path.join(print_dir, new_photo_name)
-                    try:
-                        im = Image.open(f)
-                        im = ImageOps.exif_transpose(im)
-                    except Exception as e:
-                        raise RuntimeError(f"Failed to open image {f}: {e}")
-                    if self.do_crop:
-                        im = custom_crop(im, self.ratio)
-                    try:
-                        im.save(hi_res_path, "JPEG", quality=95, subsampling=0)
-                        original_paths[hi_res_path] = f
-                    except Exception as e:
-                        raise RuntimeError(f"Failed to save hi-res for {f}: {e}")
-                    out_path = os.path.join(self.output_directory, new_photo_name)
-                    if self.minimize:
-                        mini = im.copy()
-                        mini.thumbnail((1200, 1200), Image.LANCZOS)
-                        mini.save(out_path, "JPEG", quality=85, subsampling=0)
-                    else:
-                        shutil.copy(hi_res_path, out_path)
-                    self.processed_photos.append(out_path)
-                else:
-                    new_video_name = get_new_filename(False, uid)
-                    hi_res_path = os.path.join(print_dir, new_video_name)
-                    try:
-                        shutil.copy(f, hi_res_path)
-                    except Exception as e:
-                        raise RuntimeError(f"Failed to copy video {f}: {e}")
-                    crop_filter = build_ffmpeg_crop_filter(self.ratio)
-                    out_path = os.path.join(self.output_directory, new_video_name)
-                    ffmpeg_cmd = [
-                        "ffmpeg", "-i", hi_res_path,
-                        "-vf", f"{crop_filter},scale=-2:480",
-                        "-vcodec", "libx264", "-crf", "23", "-preset", "medium",
-                        "-acodec", "aac",
-                        out_path
-                    ]
-                    try:
-                        subprocess.run(ffmpeg_cmd, check=True)
-                    except Exception as e:
-                        raise RuntimeError(f"Video compress error {f}: {e}")
-                    self.processed_videos.append(out_path)
-                done += 1
-                pct = int((done / self.total_count) * 100)
-                self.progress_value.emit(pct)
-                self.progress_message.emit(f"Processing custom files... {pct}%")
+            self.output_directory = create_custom_output_directory(self.event_folder, in_progress=True)
+            name = f"{os.path.basename(self.event_folder)} {os.path.basename(self.output_directory)}"
+            self.trace = trace.start(name)
+            self.memory = resources.RssMonitor(name).start()
+            result = process_custom_files(self.files, self.output_directory, self.ratio,
+                                          minimize=self.minimize, do_crop=self.do_crop,
+                                          registry=self.application.photo_registry,
+                                          progress_callback=self.update_prog,
+                                          should_stop=lambda: self.stop_requested)
+            if result is None:
+                self.cleanup()
+                return
+            self.processed_photos, self.processed_videos = result
+            self.application.photo_registry.save()
             short_names = [os.path.basename(x) for x in self.processed_photos]
             self.show_duplicates_dialog.emit(self.output_directory, short_names, self.ratio)
         except Exception as e:
             logging.error(f"CustomModeWorker run error: {e}")
+            self.end_monitoring()
             if self.output_directory and os.path.exists(self.output_directory):
                 shutil.rmtree(self.output_directory)
             self.error.emit(str(e))
+    def update_prog(self, val):
+        self.progress_value.emit(val)
+        self.progress_message.emit(f"Processing custom files... {val}%")
+    def update_prog_tmpl(self, val):
+        self.progress_value.emit(val)
+        self.progress_message.emit(f"Applying templates... {val}%")
+    def sheet_ready(self, path):
+        """Called from the render as each sheet is written: counts it in the job status and spools it."""
+        self.sheets_ready += 1
+        self.progress_message.emit(f"Applying templates... {self.sheets_ready} sheet(s) ready")
+        if self.print_sheet:
+            self.print_sheet(path)
     @QtCore.pyqtSlot(dict)
     def process_duplicates(self, duplicates):
         try:
@@ -692,87 +286,116 @@ class CustomModeWorker(QtCore.QObject):
                 self.cleanup()
                 return
             self.progress_value.emit(0)
-            for path, count in duplicates.items():
-                for i in range(count - 1):
-                    cp = os.path.splitext(path)[0] + f"_copy{i+1}" + os.path.splitext(path)[1]
-                    shutil.copy(path, cp)
-            apply_template = False
-            if abs(self.ratio - 0.8) < 1e-3 and self.orientation == "portrait" and self.template_path and self.apply_template:
-                apply_template = True
-            template_out = None
-            if apply_template:
-                template_out = os.path.join(self.output_directory, "template_output")
-                os.makedirs(template_out, exist_ok=True)
-            out_photos = [os.path.join(self.output_directory, f)
-                          for f in os.listdir(self.output_directory)
-                          if is_image_file(os.path.join(self.output_directory, f))]
-            normalized = []
-            for mp in out_photos:
-                dn, fn = os.path.split(mp)
-                b, e = os.path.splitext(fn)
-                b = re.sub(r"\s*\(\d+\)$", "", b)
-                nf = b + e
-                np = os.path.join(dn, nf)
-                if np != mp:
-                    os.rename(mp, np)
-                normalized.append(np)
-            print_folder = os.path.join(self.output_directory, "print")
-            hr_list = []
-            for np in normalized:
-                fname = os.path.basename(np)
-                hrp = os.path.join(print_folder, fname)
-                if os.path.exists(hrp):
-                    hr_list.append(hrp)
-                else:
-                    hr_list.append(np)
-            if apply_template:
-                def _tmpl_prog(val):
-                    self.progress_value.emit(val)
-                    self.progress_message.emit(f"Applying templates... {val}%")
-
-                apply_templates(hr_list, self.template_path, template_out,
-                                position_adjustment_mm=self.application.template_position_adjustment,
-                                progress_callback=_tmpl_prog)
-                if sys.platform == "win32":
-                    pdfp = os.path.join(template_out, "print_session.pdf")
-                    create_pdf_from_images(template_out, pdfp)
-            pr_count = 0
-            if apply_template and template_out and os.path.exists(template_out):
-                pr_count = len([x for x in os.listdir(template_out) if is_image_file(os.path.join(template_out, x))])
-            sessions.append({
-                "folder": self.output_directory,
-                "output": self.output_directory,
-                "targets": self.total_count,
-                "prints": pr_count * 2,
-                "print_files": pr_count,
-                "event_digital_folder": os.path.join(self.event_folder, "digital"),
-                "custom": True
-            })
-            update_event_data(self.application)
+            make_duplicates(duplicates)
+            template_path = custom_template_path(self.ratio, self.orientation, self.template_path,
+                                                 self.apply_template)
+            self.print_sheet = self.application.auto_print_callback(self.output_directory)
+            finish_custom_session(self.event_folder, self.output_directory, self.total_count,
+                                  template_path=template_path,
+                                  position_adjustment_mm=self.application.template_position_adjustment,
+                                  registry=self.application.photo_registry,
+                                  progress_callback=self.update_prog_tmpl,
+                                  sheet_callback=self.sheet_ready)
+            self.end_monitoring()
             self.update_sessions.emit()
             self.progress_message.emit("Custom Processing Complete")
             self.finished.emit()
-            if sys.platform == "win32":
-                os.startfile(self.output_directory)
-            elif sys.platform == "darwin":
-                subprocess.run(["open", self.output_directory])
-            else:
-                subprocess.run(["xdg-open", self.output_directory])
+            open_path(self.output_directory)
         except Exception as e:
             logging.error(f"CustomModeWorker duplicates error: {e}")
+            self.end_monitoring()
             if self.output_directory and os.path.exists(self.output_directory):
                 shutil.rmtree(self.output_directory)
             self.error.emit(str(e))
     def cleanup(self):
+        self.end_monitoring()
+        self.application.cancel_queued_prints(self.output_directory)
         if self.output_directory and os.path.exists(self.output_directory):
             shutil.rmtree(self.output_directory)
         self.process_stopped.emit()
+    def end_monitoring(self):
+        trace.stop(self.trace)
+        self.trace = None
+        if self.memory:
+            self.memory.stop()
+            self.memory = None
     def stop(self):
         self.stop_requested = True
 
+class PrintSelectedWorker(QtCore.QObject):
+    """Renders one Print Selected job off the GUI thread, then opens the print dialog."""
+    finished = pyqtSignal()
+    error = pyqtSignal(str)
+    progress_value = pyqtSignal(int)
+    process_stopped = pyqtSignal()
+    def __init__(self, job, application):
+        super().__init__()
+        self.job = job
+        self.application = application
+        self.stop_requested = False
+    def run(self):
+        job = self.job
+        spooler = self.application.print_spooler
+        rec = trace.start(f"print selected {os.path.basename(job['output'])}")
+        try:
+            # With a spooler each sheet goes to the printer as soon as it is written.
+            sheets = render_selected_photos(job["photos"], job["copies"], job["hr_folder"],
+                                            job["template_path"], job["tmpl_out"],
+                                            position_adjustment_mm=job["adjust"],
+                                            template_name=job["template_name"],
+                                            registry=self.application.photo_registry,
+                                            progress_callback=self.progress_value.emit,
+                                            should_stop=lambda: self.stop_requested,
+                                            reuse_dirs=[os.path.join(job["output"], "template_output")],
+                                            sheet_callback=partial(spooler.submit, session=job["output"])
+                                            if spooler else None)
+            if sheets is None:
+                self.application.cancel_queued_prints(job["tmpl_out"])
+                shutil.rmtree(job["tmpl_out"], ignore_errors=True)
+                self.process_stopped.emit()
+            elif not spooler:
+                with trace.span("print_dialog"):
+                    open_print_dialog(job["tmpl_out"])
+        except Exception as e:
+            logging.error(f"Print selected error: {e}")
+            self.application.cancel_queued_prints(job["tmpl_out"])
+            shutil.rmtree(job["tmpl_out"], ignore_errors=True)
+            self.error.emit(str(e))
+        finally:
+            trace.stop(rec)
+            self.finished.emit()
+    def stop(self):
+        self.stop_requested = True
+
+class SessionJob(QtCore.QObject):
+    """A queued or running session (normal or custom) and the thread its worker runs on.
+
+    States: queued -> ingest -> review (duplicates dialog) -> render -> done.
+    """
+    duplicates_ready = pyqtSignal(dict)
+    def __init__(self, worker, label):
+        super().__init__()
+        self.worker = worker
+        self.label = label
+        self.thread = None
+        self.state = "queued"
+        self.status = "Queued"
+        self.progress = 0
+        self.review_args = None
+        self.duplicates_ready.connect(worker.process_duplicates)
+
 # -----------------------------------------------------------------------------
 #                           UI CLASSES
 # -----------------------------------------------------------------------------
+def load_thumbnails(paths, side=150):
+    """``side`` px QPixmaps of ``paths``, decoded in parallel on the interactive pool."""
+    def load(path):
+        # QImage (unlike QPixmap) may be built off the GUI thread.
+        return QtGui.QImage(path).scaled(side, side, QtCore.Qt.KeepAspectRatio,
+                                         QtCore.Qt.SmoothTransformation)
+    with trace.span("thumbnails", count=len(paths)):
+        return [QtGui.QPixmap.fromImage(im) for im in resources.interactive().map(load, paths)]
+
 class ClickableLabel(QtWidgets.QLabel):
     def __init__(self, path, parent=None):
         super().__init__(parent)
@@ -823,7 +446,7 @@ class ImagePreview(QtWidgets.QDialog):
         self.close()
 
 class DuplicatesDialog(QtWidgets.QDialog):
-    def __init__(self, parent, output_directory, paired_images, ratio=NORMAL_RATIO):
+    def __init__(self, parent, output_directory, paired_images, ratio=NORMAL_RATIO, registry=None):
         super().__init__(parent)
         self.setWindowTitle("Duplicates & Crop Editor")
         self.setModal(True)
@@ -832,6 +455,7 @@ class DuplicatesDialog(QtWidgets.QDialog):
         self.paired_images = paired_images
         self.duplicates = {}
         self.ratio = ratio
+        self.registry = registry if registry is not None else PhotoRegistry()
         main_layout = QtWidgets.QVBoxLayout(self)
         main_layout.setSpacing(20)
         lbl = QtWidgets.QLabel("Set duplicates or edit/refresh crop for each photo:")
@@ -843,7 +467,8 @@ class DuplicatesDialog(QtWidgets.QDialog):
         self.grid_layout = QtWidgets.QGridLayout(content)
         self.grid_layout.setAlignment(QtCore.Qt.AlignCenter)
         self.grid_layout.setSpacing(20)
-        self.populate_grid()
+        with trace.span("dialog_grid", dialog="duplicates", photos=len(paired_images)):
+            self.populate_grid()
         scroll_area.setWidget(content)
         main_layout.addWidget(scroll_area)
         setall_h = QtWidgets.QHBoxLayout()
@@ -870,11 +495,9 @@ class DuplicatesDialog(QtWidgets.QDialog):
         row = 0
         col = 0
         max_cols = 4
-        for img_name in self.paired_images:
-            path = os.path.join(self.output_directory, img_name)
-            if not os.path.exists(path):
-                continue
-            pm = QtGui.QPixmap(path).scaled(150,150, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        paths = [os.path.join(self.output_directory, n) for n in self.paired_images]
+        paths = [p for p in paths if os.path.exists(p)]
+        for path, pm in zip(paths, load_thumbnails(paths)):
             lbl = ClickableLabel(path)
             lbl.setPixmap(pm)
             lbl.setAlignment(QtCore.Qt.AlignCenter)
@@ -904,24 +527,17 @@ class DuplicatesDialog(QtWidgets.QDialog):
                 col = 0
                 row += 1
     def open_crop_editor(self, photo_path, label_widget):
-        dlg = CropEditorDialog(photo_path, ratio=self.ratio, parent=self)
+        dlg = CropEditorDialog(photo_path, ratio=self.ratio, parent=self, registry=self.registry)
         if dlg.exec_() == QtWidgets.QDialog.Accepted:
             pm = QtGui.QPixmap(photo_path).scaled(150,150, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
             label_widget.setPixmap(pm)
     def refresh_crop(self, photo_path, label_widget):
-        if photo_path in manual_crops:
-            manp = manual_crops[photo_path]
-            if os.path.exists(manp):
-                os.remove(manp)
-            del manual_crops[photo_path]
-        if photo_path in manual_crop_rects:
-            del manual_crop_rects[photo_path]
-        base_out = re.sub(r"_copy\d+", "", os.path.basename(photo_path), flags=re.IGNORECASE)
-        digi_hr = None
-        for dig, bp in original_paths.items():
-            if os.path.basename(dig) == base_out:
-                digi_hr = dig
-                break
+        from PIL import Image, ImageOps
+        manp = self.registry.clear_manual_crop(photo_path)
+        if manp and os.path.exists(manp):
+            os.remove(manp)
+        self.registry.save()
+        digi_hr, _ = self.registry.find(photo_path)
         if not digi_hr:
             digi_hr = photo_path
         try:
@@ -1027,42 +643,38 @@ class CropRatioDialog(QtWidgets.QDialog):
         return val, orientation
 
 class CropEditorDialog(QtWidgets.QDialog):
-    def __init__(self, output_photo_path, ratio=0.8, parent=None):
+    def __init__(self, output_photo_path, ratio=0.8, parent=None, registry=None):
         super().__init__(parent)
         self.setWindowTitle("Crop Editor")
         self.resize(600,450)
         self.output_photo_path = output_photo_path
         self.ratio = ratio
-        base_out = re.sub(r"_copy\d+", "", os.path.basename(output_photo_path), flags=re.IGNORECASE)
-        self.digital_hr_path = None
-        self.original_browse_path = None
-        for dig, bp in original_paths.items():
-            if os.path.basename(dig) == base_out:
-                self.digital_hr_path = dig
-                self.original_browse_path = bp
-                break
+        self.registry = registry if registry is not None else PhotoRegistry()
+        self.digital_hr_path, self.original_browse_path = self.registry.find(output_photo_path)
         if not self.digital_hr_path:
             self.digital_hr_path = output_photo_path
             self.original_browse_path = output_photo_path
         from io import BytesIO
-        try:
-            pil_img = Image.open(self.original_browse_path)
-            pil_img = ImageOps.exif_transpose(pil_img)
-        except:
-            pil_img = Image.open(self.output_photo_path)
-        self.orig_w, self.orig_h = pil_img.size
-        buf = BytesIO()
-        pil_img.save(buf, format="JPEG")
-        buf.seek(0)
-        data = buf.read()
-        pm = QtGui.QPixmap()
-        pm.loadFromData(data)
-        pm = pm.scaled(600,400, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        from PIL import Image, ImageOps
+        with trace.span("crop_editor_load"):
+            try:
+                pil_img = Image.open(self.original_browse_path)
+                pil_img = ImageOps.exif_transpose(pil_img)
+            except:
+                pil_img = Image.open(self.output_photo_path)
+            self.orig_w, self.orig_h = pil_img.size
+            buf = BytesIO()
+            pil_img.save(buf, format="JPEG")
+            buf.seek(0)
+            data = buf.read()
+            pm = QtGui.QPixmap()
+            pm.loadFromData(data)
+            pm = pm.scaled(600,400, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
         self.displayed_w = pm.width()
         self.displayed_h = pm.height()
         init_rect = None
-        if self.output_photo_path in manual_crop_rects:
-            saved = manual_crop_rects[self.output_photo_path]
+        saved = self.registry.crop_rect(self.output_photo_path)
+        if saved:
             x, y, w, h, ow, oh = saved
             scale_x = self.displayed_w / float(ow)
             scale_y = self.displayed_h / float(oh)
@@ -1087,19 +699,12 @@ class CropEditorDialog(QtWidgets.QDialog):
         layout.addWidget(self.crop_label)
         layout.addLayout(hl)
     def on_reset(self):
-        if self.output_photo_path in manual_crops:
-            mp = manual_crops[self.output_photo_path]
-            if os.path.exists(mp):
-                os.remove(mp)
-            del manual_crops[self.output_photo_path]
-        if self.output_photo_path in manual_crop_rects:
-            del manual_crop_rects[self.output_photo_path]
-        base_out = re.sub(r"_copy\d+", "", os.path.basename(self.output_photo_path), flags=re.IGNORECASE)
-        digi_hr = None
-        for dig, bp in original_paths.items():
-            if os.path.basename(dig) == base_out:
-                digi_hr = dig
-                break
+        from PIL import Image, ImageOps
+        mp = self.registry.clear_manual_crop(self.output_photo_path)
+        if mp and os.path.exists(mp):
+            os.remove(mp)
+        self.registry.save()
+        digi_hr, _ = self.registry.find(self.output_photo_path)
         if not digi_hr:
             digi_hr = self.output_photo_path
         try:
@@ -1118,7 +723,7 @@ class CropEditorDialog(QtWidgets.QDialog):
             self.crop_label.cropRect = self.crop_label.get_default_crop_rect(pix.width(), pix.height())
             self.crop_label.update()
     def on_apply(self):
-        from PIL import Image
+        from PIL import Image, ImageOps
         if not self.crop_label.pixmap():
             return
         scale_x = self.orig_w / float(self.displayed_w)
@@ -1142,9 +747,8 @@ class CropEditorDialog(QtWidgets.QDialog):
         c2 = c.copy()
         c2.thumbnail((1200,1200), Image.LANCZOS)
         c2.save(self.output_photo_path, "JPEG", quality=85)
-        manual_crops[self.output_photo_path] = self.output_photo_path
-        manual_crops[self.digital_hr_path] = self.output_photo_path
-        manual_crop_rects[self.output_photo_path] = (x, y, w, h, ow, oh)
+        self.registry.set_manual_crop(self.output_photo_path, (x, y, w, h, ow, oh))
+        self.registry.save()
         self.accept()
 
 class RubberBandCropWidget(QtWidgets.QLabel):
@@ -1408,7 +1012,8 @@ class PrintSelectionDialog(QtWidgets.QDialog):
         self.grid = QtWidgets.QGridLayout(scr_content)
         self.grid.setAlignment(QtCore.Qt.AlignCenter)
         self.grid.setSpacing(20)
-        self.populate_grid()
+        with trace.span("dialog_grid", dialog="print_selection"):
+            self.populate_grid()
         self.scroll_area.setWidget(scr_content)
         layout.addWidget(self.scroll_area)
         btn_h = QtWidgets.QHBoxLayout()
@@ -1424,9 +1029,9 @@ class PrintSelectionDialog(QtWidgets.QDialog):
         col = 0
         max_col = 3
         fs = [f for f in os.listdir(self.output_folder) if is_image_file(os.path.join(self.output_folder, f))]
-        for i, imgf in enumerate(fs):
+        thumbs = load_thumbnails([os.path.join(self.output_folder, f) for f in fs])
+        for i, (imgf, pm) in enumerate(zip(fs, thumbs)):
             path = os.path.join(self.output_folder, imgf)
-            pm = QtGui.QPixmap(path).scaled(150,150, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
             lbl = QtWidgets.QLabel()
             lbl.setPixmap(pm)
             lbl.setAlignment(QtCore.Qt.AlignCenter)
@@ -1456,11 +1061,128 @@ class PrintSelectionDialog(QtWidgets.QDialog):
                 copies_dict[path] = sp.value()
         return chosen, copies_dict
 
+class PreflightDialog(QtWidgets.QDialog):
+    """What the preflight check found in a card folder and, when pairing by capture time, the pairs.
+    Start is only offered when nothing blocks the session."""
+    def __init__(self, parent, report):
+        super().__init__(parent)
+        self.setWindowTitle("Check Before Starting")
+        self.setModal(True)
+        self.resize(600, 600 if report.mode == "time" else 400)
+        layout = QtWidgets.QVBoxLayout(self)
+        summary = QtWidgets.QLabel(report.summary())
+        summary.setWordWrap(True)
+        layout.addWidget(summary)
+        problems = report.problems()
+        self.list = QtWidgets.QListWidget()
+        for line in problems:
+            item = QtWidgets.QListWidgetItem(line)
+            item.setForeground(QtGui.QColor(DEEP_PINK))
+            self.list.addItem(item)
+        for line in report.warnings():
+            self.list.addItem(line)
+        layout.addWidget(self.list)
+        if report.mode == "time":
+            layout.addWidget(QtWidgets.QLabel("Pairs by capture time (video minus photo):"))
+            rows = report.pairing()
+            self.pairs = QtWidgets.QTableWidget(len(rows), 3)
+            self.pairs.setHorizontalHeaderLabels(["Photo", "Video", "Gap"])
+            self.pairs.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+            self.pairs.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+            for row, values in enumerate(rows):
+                for col, v in enumerate(values):
+                    self.pairs.setItem(row, col, QtWidgets.QTableWidgetItem(v or "by number"))
+            layout.addWidget(self.pairs)
+        if problems:
+            hint = QtWidgets.QLabel("Fix or remove these files and start again.")
+            layout.addWidget(hint)
+        btn_h = QtWidgets.QHBoxLayout()
+        start_btn = QtWidgets.QPushButton("Start")
+        start_btn.setEnabled(not problems)
+        start_btn.clicked.connect(self.accept)
+        ca_btn = QtWidgets.QPushButton("Cancel")
+        ca_btn.clicked.connect(self.reject)
+        btn_h.addWidget(start_btn)
+        btn_h.addWidget(ca_btn)
+        layout.addLayout(btn_h)
+
+class PrintQueueDialog(QtWidgets.QDialog):
+    """Status of every sheet sent to the print spooler, with retry, reprint and cancel."""
+    COLUMNS = ["#", "Sheet", "Session", "Printer", "Status", "Tries"]
+    def __init__(self, parent, spooler):
+        super().__init__(parent)
+        self.setWindowTitle("Print Queue")
+        self.setModal(False)
+        self.resize(700, 400)
+        self.spooler = spooler
+        layout = QtWidgets.QVBoxLayout(self)
+        self.printers_label = QtWidgets.QLabel()
+        layout.addWidget(self.printers_label)
+        self.table = QtWidgets.QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+        btn_h = QtWidgets.QHBoxLayout()
+        for text, action in (("Retry", spooler.retry), ("Reprint", spooler.reprint),
+                             ("Cancel", spooler.cancel)):
+            b = QtWidgets.QPushButton(text)
+            b.clicked.connect(partial(self.apply, action))
+            btn_h.addWidget(b)
+        printers_btn = QtWidgets.QPushButton("Printers...")
+        printers_btn.clicked.connect(self.edit_printers)
+        btn_h.addWidget(printers_btn)
+        close_btn = QtWidgets.QPushButton("Close")
+        close_btn.clicked.connect(self.hide)
+        btn_h.addWidget(close_btn)
+        layout.addLayout(btn_h)
+    def edit_printers(self):
+        app = self.parent()
+        if not app.event_folder:
+            app.error_signal.emit("Printers", "Please create or open an event first.")
+            return
+        current = "\n".join(p.name for p in self.spooler.printers if p.enabled)
+        text, ok = QtWidgets.QInputDialog.getMultiLineText(
+            self, "Printers", "Printer queues for this event, one per line:", current)
+        if not ok:
+            return
+        names = [n.strip() for n in text.splitlines() if n.strip()]
+        printing.save_printers(app.event_folder, names)
+        app.configure_printers()
+        self.refresh()
+    def selected_jobs(self):
+        rows = {i.row() for i in self.table.selectedIndexes()}
+        return [self.table.item(r, 0).data(QtCore.Qt.UserRole) for r in sorted(rows)]
+    def apply(self, action):
+        for job in self.selected_jobs():
+            action(job)
+        self.refresh()
+    def refresh(self):
+        self.printers_label.setText("\n".join(p.describe() for p in self.spooler.printers if p.enabled))
+        selected = {j.id for j in self.selected_jobs()}
+        jobs = list(reversed(self.spooler.jobs))
+        self.table.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            status = job.state + (f": {job.error}" if job.error else "")
+            sheet = os.path.relpath(job.path, job.session) if job.session else os.path.basename(job.path)
+            values = [str(job.id), sheet,
+                      os.path.basename(job.session) if job.session else "", job.printer or "",
+                      status, str(job.attempts)]
+            for col, v in enumerate(values):
+                item = QtWidgets.QTableWidgetItem(v)
+                if col == 0:
+                    item.setData(QtCore.Qt.UserRole, job)
+                self.table.setItem(row, col, item)
+            if job.id in selected:
+                self.table.selectionModel().select(
+                    self.table.model().index(row, 0),
+                    QtCore.QItemSelectionModel.Select | QtCore.QItemSelectionModel.Rows)
+
 # -----------------------------------------------------------------------------
 #                           CUSTOM MODE DIALOG CLASS
 # -----------------------------------------------------------------------------
 class CustomModeDialog(QtWidgets.QDialog):
-    duplicates_ready = pyqtSignal(dict)
     def __init__(self, application, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Custom Mode")
@@ -1499,33 +1221,14 @@ class CustomModeDialog(QtWidgets.QDialog):
         self.check_template.setEnabled(False)
         btns_layout.addWidget(self.check_template)
         main_layout.addLayout(btns_layout)
-        self.progress_label = QtWidgets.QLabel("")
-        main_layout.addWidget(self.progress_label)
-        self.progress_bar = QtWidgets.QProgressBar()
-        self.progress_bar.setVisible(False)
-        self.progress_bar.setTextVisible(False)
-        self.progress_bar.setStyleSheet(f"""
-            QProgressBar {{
-                border:1px solid {TEXT_COLOR};
-                border-radius:5px;
-                background-color:{BUTTON_COLOR};
-            }}
-            QProgressBar::chunk {{
-                background-color:{DEEP_PINK};
-                width:20px;
-            }}
-        """)
-        main_layout.addWidget(self.progress_bar)
         self.btn_start = QtWidgets.QPushButton("Start")
         self.btn_start.clicked.connect(self.on_start)
         main_layout.addWidget(self.btn_start)
-        self.worker_thread = None
-        self.worker = None
         self.update_template_button_state()
     def on_add_files(self):
         dlg = QtWidgets.QFileDialog(self, "Select Files", os.path.expanduser("~/Downloads"))
         dlg.setFileMode(QtWidgets.QFileDialog.ExistingFiles)
-        dlg.setNameFilter("Images/Videos (*.png *.jpg *.jpeg *.bmp *.gif *.mov *.mp4 *.avi *.mkv)")
+        dlg.setNameFilter("Images/Videos (*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff *.mov *.mp4 *.avi *.mkv)")
         if dlg.exec_():
             selected = dlg.selectedFiles()
             for s in selected:
@@ -1567,19 +1270,7 @@ class CustomModeDialog(QtWidgets.QDialog):
         if self.apply_template and not self.application.template_path:
             QtWidgets.QMessageBox.warning(self, "No Template", "Template is toggled ON but no template file is found.")
             return
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
-        self.progress_bar.setMaximum(100)
-        self.progress_label.setText("Starting...")
-        self.btn_start.setEnabled(False)
-        self.btn_add_files.setEnabled(False)
-        self.btn_delete_file.setEnabled(False)
-        self.btn_crop_ratio.setEnabled(False)
-        self.check_template.setEnabled(False)
-        self.check_minimize.setEnabled(False)
-        self.crop_toggle.setEnabled(False)
-        self.worker_thread = QtCore.QThread()
-        self.worker = CustomModeWorker(
+        worker = CustomModeWorker(
             self.files,
             self.application.event_folder,
             self.check_minimize.isChecked(),
@@ -1590,47 +1281,8 @@ class CustomModeDialog(QtWidgets.QDialog):
             apply_template=self.apply_template,
             do_crop=self.enable_crop
         )
-        self.worker.moveToThread(self.worker_thread)
-        self.worker_thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self.worker_thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
-        self.worker.error.connect(self.on_worker_error)
-        self.worker.show_duplicates_dialog.connect(self.on_show_duplicates_dialog)
-        self.worker.update_sessions.connect(self.application.update_sessions_signal.emit)
-        self.worker.finished.connect(self.on_processing_complete)
-        self.worker.progress_message.connect(self.update_progress_label)
-        self.worker.progress_value.connect(self.update_progress_bar)
-        self.worker.process_stopped.connect(self.on_process_stopped)
-        self.duplicates_ready.connect(self.worker.process_duplicates)
-        self.worker_thread.start()
-    def on_worker_error(self, msg):
-        self.application.error_signal.emit("Error", msg)
-        self.close()
-    def on_show_duplicates_dialog(self, out_dir, photos, ratio):
-        dlg = DuplicatesDialog(self.application, out_dir, photos, ratio=ratio)
-        r = dlg.exec_()
-        if r == QtWidgets.QDialog.Accepted:
-            dups = dlg.get_duplicates()
-            self.duplicates_ready.emit(dups)
-        else:
-            self.worker.stop()
-    def on_processing_complete(self):
-        self.progress_label.setText("Custom Processing Complete")
-        self.progress_bar.setVisible(False)
-        self.application.message_signal.emit("Done", "Custom mode processing complete.")
-        self.close()
-    def update_progress_label(self, msg):
-        self.progress_label.setText(msg)
-    def update_progress_bar(self, val):
-        self.progress_bar.setValue(val)
-    def on_process_stopped(self):
-        self.close()
-    def update_progress_value(self, val):
-        if not self.progress_bar.isVisible():
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setMaximum(100)
-        self.progress_bar.setValue(val)
+        self.application.enqueue_job(worker, f"Custom ({len(self.files)} files)")
+        self.accept()
 
 # -----------------------------------------------------------------------------
 #                           APPLICATION CLASS
@@ -1639,11 +1291,10 @@ class Application(QtWidgets.QMainWindow):
     error_signal = pyqtSignal(str, str)
     message_signal = pyqtSignal(str, str)
     update_sessions_signal = pyqtSignal()
-    processing_complete_signal = pyqtSignal()
-    show_duplicates_dialog_signal = pyqtSignal(str, list)
-    duplicates_ready = pyqtSignal(dict)
     progress_message_signal = pyqtSignal(str)
     progress_value_signal = QtCore.pyqtSignal(int)
+    print_job_signal = pyqtSignal(object)
+    sync_signal = pyqtSignal(object)
     def __init__(self):
         super().__init__()
         ico_extension = ".ico" if os.name == 'nt' else ".icns"
@@ -1657,11 +1308,33 @@ class Application(QtWidgets.QMainWindow):
         self.setup_palette()
         self.template_path = None
         self.event_folder = None
+        self.event_sync = None
+        self.photo_registry = PhotoRegistry()
         self.input_folder = None
-        self.worker_thread = None
-        self.worker = None
+        self.jobs = []
+        self.review_queue = []
+        self.reviewing = False
         self.template_position_adjustment = 0
         self.proceed_without_template = False
+        self.api = ApiClient()
+        self.signin_thread = None
+        self.signin_worker = None
+        self.preflight_thread = None
+        self.preflight_worker = None
+        self.calibrate_thread = None
+        self.calibrate_worker = None
+        self.profile_label = None
+        # Polls for the end of the first-launch calibration while sessions wait for it.
+        self.calibration_timer = QtCore.QTimer(self)
+        self.calibration_timer.setSingleShot(True)
+        self.calibration_timer.timeout.connect(self.resume_after_calibration)
+        self.print_jobs = []
+        self.print_thread = None
+        self.print_worker = None
+        self.print_progress = None
+        self.print_queue_dialog = None
+        self.print_spooler = None
+        self.configure_printers()
         self.setup_ui()
         self.connect_signals()
         self.setMinimumSize(500,500)
@@ -1687,10 +1360,11 @@ class Application(QtWidgets.QMainWindow):
         self.error_signal.connect(self.show_custom_error)
         self.message_signal.connect(self.show_custom_message)
         self.update_sessions_signal.connect(self.update_sessions_table)
-        self.processing_complete_signal.connect(self.processing_complete)
-        self.show_duplicates_dialog_signal.connect(self.on_show_duplicates_dialog)
+        self.update_sessions_signal.connect(self.request_sync)
         self.progress_message_signal.connect(self.update_progress_message)
         self.progress_value_signal.connect(self.update_progress_value)
+        self.print_job_signal.connect(self.on_print_job_changed)
+        self.sync_signal.connect(self.on_sync_changed)
     def setup_ui(self):
         font = QtGui.QFont("Helvetica Neue", 12)
         self.setFont(font)
@@ -1701,16 +1375,23 @@ class Application(QtWidgets.QMainWindow):
         main_layout.setSpacing(10)
         self.stack = QtWidgets.QStackedWidget()
         main_layout.addWidget(self.stack)
-        self.login_screen = QtWidgets.QWidget()
-        self.setup_login_screen_ui()
-        self.stack.addWidget(self.login_screen)
-        self.screen1 = QtWidgets.QWidget()
-        self.setup_screen1_ui()
-        self.stack.addWidget(self.screen1)
-        self.screen2 = QtWidgets.QWidget()
-        self.setup_screen2_ui()
-        self.stack.addWidget(self.screen2)
-        self.stack.setCurrentWidget(self.login_screen)
+        self.login_screen = None
+        self.screen1 = None
+        self.screen2 = None
+        self.show_screen("login_screen")
+    def ensure_screen(self, name):
+        """Build ``login_screen``, ``screen1`` or ``screen2`` on first use."""
+        if getattr(self, name) is None:
+            setattr(self, name, QtWidgets.QWidget())
+            getattr(self, f"setup_{name}_ui")()
+            self.stack.addWidget(getattr(self, name))
+        return getattr(self, name)
+    def show_screen(self, name):
+        self.stack.setCurrentWidget(self.ensure_screen(name))
+    def on_first_paint(self):
+        self.restore_sign_in()
+        warmup.start(self.template_path)
+        QtCore.QTimer.singleShot(0, partial(self.ensure_screen, "screen1"))
     def setup_login_screen_ui(self):
         layout =  QtWidgets.QVBoxLayout(self.login_screen)
         layout.setAlignment(QtCore.Qt.AlignCenter)
@@ -1762,37 +1443,66 @@ class Application(QtWidgets.QMainWindow):
         password_layout.addWidget(self.toggle_btn)
         password_frame.setLayout(password_layout)
         layout.addWidget(password_frame)
-        signin_btn = QtWidgets.QPushButton("Sign In", self)
-        signin_btn.setFont(QtGui.QFont("Arial", 11, QtGui.QFont.Bold))
-        signin_btn.setStyleSheet(
+        self.signin_btn = QtWidgets.QPushButton("Sign In", self)
+        self.signin_btn.setFont(QtGui.QFont("Arial", 11, QtGui.QFont.Bold))
+        self.signin_btn.setStyleSheet(
             "background-color: #e91e63; color: white; padding: 10px; border-radius: 5px;"
         )
-        signin_btn.clicked.connect(self.sign_in)
-        layout.addWidget(signin_btn)
+        self.signin_btn.clicked.connect(self.sign_in)
+        self.password_input.returnPressed.connect(self.sign_in)
+        layout.addWidget(self.signin_btn)
+        self.login_status = QtWidgets.QLabel("", self)
+        self.login_status.setAlignment(QtCore.Qt.AlignCenter)
+        self.login_status.setStyleSheet(f"color:{TEXT_COLOR}; font-size:12px;")
+        layout.addWidget(self.login_status)
 
     def sign_in(self):
-        URL_BASE = "https://vide.website"
-        try:
-            self.email = self.email_input.text()
-            self.password = self.password_input.text()
-            data = {
-                "email": f"{self.email}",
-                "password": f"{self.password}"
-            }
-            url = f"{URL_BASE}/api/v1/token/"
-            response = requests.post(url, headers={"Content-Type": "application/json"}, json=data)
-            if response.status_code == 200:
-                json_response = response.json()
-                self.access_token = json_response.get("access")
-                self.refresh_token = json_response.get("refresh")
-                self.stack.setCurrentWidget(self.screen1)
-            else:
-                print(response.status_code)
-                print(response.json())
-                # raise Exception by codes
-        except Exception as e:
-            print(e)
-            # raise exception for general fail'
+        email = self.email_input.text().strip()
+        password = self.password_input.text()
+        if not email or not password:
+            self.login_status.setText("Please enter email & password.")
+            return
+        self.login_status.setText("Signing in...")
+        self.start_sign_in(email, password)
+
+    def restore_sign_in(self):
+        self.login_status.setText("Restoring session...")
+        self.start_sign_in()
+
+    def start_sign_in(self, email=None, password=None):
+        if self.signin_thread is not None:
+            return
+        self.signin_btn.setEnabled(False)
+        self.signin_thread = QtCore.QThread()
+        self.signin_worker = SignInWorker(self.api, email, password)
+        self.signin_worker.moveToThread(self.signin_thread)
+        self.signin_thread.started.connect(self.signin_worker.run)
+        self.signin_worker.signed_in.connect(self.on_signed_in)
+        self.signin_worker.failed.connect(partial(self.on_sign_in_failed, email is not None))
+        self.signin_worker.finished.connect(self.signin_thread.quit)
+        self.signin_worker.finished.connect(self.signin_worker.deleteLater)
+        self.signin_thread.finished.connect(self.signin_thread.deleteLater)
+        self.signin_thread.finished.connect(self.on_sign_in_finished)
+        self.signin_thread.start()
+
+    def on_signed_in(self):
+        self.password_input.clear()
+        self.login_status.setText("")
+        if self.api.email:
+            self.email_input.setText(self.api.email)
+        self.show_screen("screen1")
+
+    def on_sign_in_failed(self, explicit, msg):
+        if self.api.email and not self.email_input.text():
+            self.email_input.setText(self.api.email)
+        self.login_status.setText(msg if explicit else "")
+        if explicit:
+            self.error_signal.emit("Sign In Failed", msg)
+
+    def on_sign_in_finished(self):
+        self.signin_thread = None
+        self.signin_worker = None
+        self.signin_btn.setEnabled(True)
 
     def toggle_password(self):
         """Toggle between visible and hidden password states."""
@@ -1993,9 +1703,9 @@ class Application(QtWidgets.QMainWindow):
         sessions_layout.setContentsMargins(0, 0, 0, 0)
         sessions_layout.setSpacing(0)
         self.sessions_table = QtWidgets.QTableWidget()
-        self.sessions_table.setColumnCount(7)
+        self.sessions_table.setColumnCount(8)
         self.sessions_table.setHorizontalHeaderLabels(
-            ["Session #", "Targets", "Prints", "Open Folder", "Print All", "Print Selected", "Delete"])
+            ["Session #", "Targets", "Prints", "Status", "Open Folder", "Print All", "Print Selected", "Delete"])
         self.sessions_table.horizontalHeader().setStretchLastSection(True)
         self.sessions_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.sessions_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
@@ -2033,6 +1743,11 @@ class Application(QtWidgets.QMainWindow):
         self.loading_label.setAlignment(QtCore.Qt.AlignCenter)
         self.loading_label.setStyleSheet(f"color:{TEXT_COLOR}; font-size:12px;")
         layout.addWidget(self.loading_label)
+        self.sync_label = QtWidgets.QLabel("")
+        self.sync_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.sync_label.setStyleSheet(f"color:{TEXT_COLOR}; font-size:11px;")
+        self.sync_label.setVisible(False)
+        layout.addWidget(self.sync_label)
         self.progress_bar = QtWidgets.QProgressBar()
         self.progress_bar.setVisible(False)
         self.progress_bar.setTextVisible(False)
@@ -2102,6 +1817,22 @@ class Application(QtWidgets.QMainWindow):
         """)
         settings_btn.clicked.connect(self.open_settings)
         btn_layout.addWidget(settings_btn)
+        queue_btn = QtWidgets.QPushButton("Print Queue")
+        queue_btn.setStyleSheet(f"""
+            QPushButton {{
+                background-color:{BUTTON_COLOR};
+                color:{TEXT_COLOR};
+                font-size:12px;
+                padding:6px;
+                border:1px solid {TEXT_COLOR};
+                border-radius:5px;
+            }}
+            QPushButton:hover {{
+                background-color:{HOVER_COLOR};
+            }}
+        """)
+        queue_btn.clicked.connect(self.show_print_queue)
+        btn_layout.addWidget(queue_btn)
         layout.addLayout(btn_layout)
 
     def create_event_folder(self):
@@ -2111,27 +1842,70 @@ class Application(QtWidgets.QMainWindow):
             self.error_signal.emit("Error", "Please enter event name & date.")
             return
         folder_name = f"{en}_{ed}"
-        self.event_folder = os.path.join(os.path.expanduser("~/Downloads"), folder_name)
-        os.makedirs(self.event_folder, exist_ok=True)
-        global current_template
-        current_template = self.template_combo.currentText()
+        event_folder = os.path.join(os.path.expanduser("~/Downloads"), folder_name)
+        os.makedirs(event_folder, exist_ok=True)
+        self.set_event_folder(event_folder)
+        core.current_template = self.template_combo.currentText()
         with open(os.path.join(self.event_folder, DATA_FILE), "w") as f:
-            f.write(f"Template: {current_template}\n")
+            f.write(f"Template: {core.current_template}\n")
         self.message_signal.emit("Event Created", "Event folder created.")
-        self.stack.setCurrentWidget(self.screen2)
+        self.show_screen("screen2")
 
     def open_existing_event(self):
         d = QtWidgets.QFileDialog.getExistingDirectory(self, "Select Event Folder", os.path.expanduser("~/Downloads"))
         if d:
-            self.event_folder = d
+            self.set_event_folder(d)
+            d = self.event_folder
+            self.ensure_screen("screen2")
             sync_event_from_folders(d, self)
             self.update_sessions_table()
             tfs = [x for x in os.listdir(d) if is_image_file(os.path.join(d, x))]
             if tfs:
                 self.template_path = os.path.join(d, tfs[0])
+                warmup.template(self.template_path)
             else:
                 self.template_path = None
-            self.stack.setCurrentWidget(self.screen2)
+            self.show_screen("screen2")
+
+    def set_event_folder(self, folder):
+        """Switch to another event, releasing the previous event's photo registry.
+
+        An event on a network share is worked on in a local mirror (``self.event_folder``)
+        that an EventSync pushes back to the share in the background.
+        """
+        self.photo_registry.close()
+        if self.event_sync is not None:
+            self.event_sync.close()
+            self.event_sync = None
+            self.sync_label.setVisible(False)
+        if eventsync.wanted(folder):
+            self.ensure_screen("screen2")
+            self.event_sync = eventsync.EventSync(folder, listener=self.sync_signal.emit).open()
+            logging.info(f"Event {folder} staged in {self.event_sync.local}")
+            folder = self.event_sync.local
+            self.sync_label.setVisible(True)
+        self.event_folder = folder
+        self.photo_registry = PhotoRegistry(folder)
+        self.configure_printers()
+
+    def request_sync(self):
+        if self.event_sync is not None:
+            self.event_sync.request()
+
+    def on_sync_changed(self, status):
+        self.sync_label.setText(status.describe())
+
+    def configure_printers(self):
+        """Use the event's printers.json if it has one, else the printer from the settings."""
+        try:
+            printers = printing.load_printers(self.event_folder) or printing.default_printers()
+        except ValueError as e:
+            logging.error(f"Printing: {e}; opening sheets in a viewer instead")
+            printers = []
+        if self.print_spooler is not None:
+            self.print_spooler.set_printers(printers)
+        elif printers:
+            self.print_spooler = printing.PrintSpooler(printers, listener=self.print_job_signal.emit).start()
 
     def upload_template(self):
         if not self.event_folder:
@@ -2142,6 +1916,7 @@ class Application(QtWidgets.QMainWindow):
         if fp:
             self.template_path = fp
             shutil.copy(fp, os.path.join(self.event_folder, os.path.basename(fp)))
+            warmup.template(fp)
             self.message_signal.emit("Template Uploaded", "Template uploaded successfully.")
 
     def browse_folder(self):
@@ -2174,80 +1949,215 @@ class Application(QtWidgets.QMainWindow):
                 self.proceed_without_template = True
             else:
                 return
-        self.loading_label.setText("Processing...")
+        if settings.get("preflight"):
+            self.start_preflight(self.input_folder)
+        else:
+            self.start_session(self.input_folder)
+
+    def start_session(self, input_folder, pairs=None):
+        """Queue a session; ``pairs`` is the accepted preflight pairing of ``input_folder``."""
+        worker = Worker(input_folder, self.event_folder, self.template_path, self, pairs=pairs)
+        self.enqueue_job(worker, os.path.basename(os.path.normpath(input_folder)))
+        if self.input_folder == input_folder:
+            self.input_folder = None
+            self.folder_line_edit.clear()
+
+    def start_preflight(self, input_folder):
+        """Check the card's headers on a thread; the session is queued once the report is accepted."""
+        if self.preflight_thread is not None:
+            return
+        self.start_button.setEnabled(False)
+        self.start_button.setText("Checking files...")
+        self.preflight_thread = QtCore.QThread()
+        self.preflight_worker = PreflightWorker(input_folder, self.event_folder)
+        self.preflight_worker.moveToThread(self.preflight_thread)
+        self.preflight_thread.started.connect(self.preflight_worker.run)
+        self.preflight_worker.done.connect(partial(self.on_preflight_done, input_folder))
+        self.preflight_worker.failed.connect(lambda msg: self.error_signal.emit("Check Failed", msg))
+        self.preflight_worker.finished.connect(self.preflight_thread.quit)
+        self.preflight_worker.finished.connect(self.preflight_worker.deleteLater)
+        self.preflight_thread.finished.connect(self.preflight_thread.deleteLater)
+        self.preflight_thread.finished.connect(self.on_preflight_finished)
+        self.preflight_thread.start()
+
+    def on_preflight_done(self, input_folder, report):
+        self.start_button.setText("Start Vide Maker")
+        # Pairing by capture time is always shown so the operator can check it before starting.
+        if report.ok and not report.warnings() and report.mode != "time":
+            self.start_session(input_folder, report.pairs)
+            return
+        if PreflightDialog(self, report).exec_() == QtWidgets.QDialog.Accepted:
+            self.start_session(input_folder, report.pairs)
+
+    def on_preflight_finished(self):
+        self.preflight_thread = None
+        self.preflight_worker = None
+        self.start_button.setText("Start Vide Maker")
+        self.start_button.setEnabled(True)
+
+    def enqueue_job(self, worker, label):
+        """Queue a Worker/CustomModeWorker; ingest of the next job overlaps rendering of this one."""
+        job = SessionJob(worker, label)
+        worker.progress_message.connect(partial(self.on_job_message, job))
+        worker.progress_value.connect(partial(self.on_job_progress, job))
+        worker.show_duplicates_dialog.connect(lambda *args: self.on_job_review(job, *args))
+        worker.update_sessions.connect(self.update_sessions_signal.emit)
+        worker.finished.connect(partial(self.on_job_finished, job))
+        worker.error.connect(partial(self.on_job_error, job))
+        worker.process_stopped.connect(partial(self.on_job_stopped, job))
+        self.jobs.append(job)
+        self.schedule_jobs()
+        self.update_sessions_table()
+
+    def schedule_jobs(self):
+        # One job ingests at a time; rendering jobs share CPU slots via vide.resources.
+        if any(j.state == "ingest" for j in self.jobs):
+            return
+        if warmup.calibrating():
+            for job in self.jobs:
+                if job.state == "queued":
+                    job.status = "Waiting for calibration..."
+                    self.update_job_status(job)
+            self.calibration_timer.start(500)
+            return
+        for job in self.jobs:
+            if job.state == "queued":
+                self.start_job(job)
+                return
+
+    def start_job(self, job):
+        job.state = "ingest"
+        job.status = "Starting..."
+        job.thread = QtCore.QThread()
+        job.worker.moveToThread(job.thread)
+        job.thread.started.connect(job.worker.run)
+        for sig in (job.worker.finished, job.worker.error, job.worker.process_stopped):
+            sig.connect(job.thread.quit)
+        job.thread.finished.connect(job.worker.deleteLater)
+        job.thread.finished.connect(job.thread.deleteLater)
+        job.thread.finished.connect(partial(self.on_job_thread_finished, job))
+        job.thread.start()
+        self.update_job_controls()
+
+    def on_job_message(self, job, msg):
+        job.status = msg
+        self.update_job_status(job)
+
+    def on_job_progress(self, job, val):
+        job.progress = val
+        self.update_job_status(job)
+
+    def on_job_review(self, job, *args):
+        job.state = "review"
+        job.status = "Waiting for review"
+        job.review_args = args
+        self.review_queue.append(job)
+        self.schedule_jobs()
+        self.update_job_status(job)
+        self.show_next_review()
+
+    def show_next_review(self):
+        """Show queued duplicates dialogs one at a time."""
+        if self.reviewing or not self.review_queue:
+            return
+        job = self.review_queue.pop(0)
+        if job.worker.stop_requested:
+            job.duplicates_ready.emit({})
+            QtCore.QTimer.singleShot(0, self.show_next_review)
+            return
+        out_dir, photos = job.review_args[0], job.review_args[1]
+        ratio = job.review_args[2] if len(job.review_args) > 2 else NORMAL_RATIO
+        self.reviewing = True
+        try:
+            dlg = DuplicatesDialog(self, out_dir, photos, ratio=ratio, registry=self.photo_registry)
+            dlg.setWindowTitle(f"Duplicates & Crop Editor - {job.label}")
+            accepted = dlg.exec_() == QtWidgets.QDialog.Accepted
+        finally:
+            self.reviewing = False
+        if accepted:
+            job.state = "render"
+            job.status = "Rendering..."
+            job.duplicates_ready.emit(dlg.get_duplicates())
+        else:
+            job.worker.stop()
+            job.duplicates_ready.emit({})
+        self.update_job_status(job)
+        QtCore.QTimer.singleShot(0, self.show_next_review)
+
+    def on_job_finished(self, job):
+        job.state = "done"
+        custom = isinstance(job.worker, CustomModeWorker)
+        self.message_signal.emit("Processing Complete",
+                                 "Custom mode processing complete." if custom else f"{job.label}: all done.")
+
+    def on_job_error(self, job, msg):
+        job.state = "done"
+        self.error_signal.emit("Error", f"{job.label}: {msg}")
+
+    def on_job_stopped(self, job):
+        job.state = "done"
+
+    def on_job_thread_finished(self, job):
+        if job in self.jobs:
+            self.jobs.remove(job)
+        job.thread = None
+        self.schedule_jobs()
+        self.update_sessions_table()
+        self.update_job_controls()
+
+    def active_outputs(self):
+        return {os.path.normpath(j.worker.output_directory) for j in self.jobs if j.worker.output_directory}
+
+    def update_job_controls(self):
+        if self.screen2 is None:
+            return
+        self.stop_button.setVisible(bool(self.jobs))
+        self.stop_button.setEnabled(bool(self.jobs))
+        running = [j for j in self.jobs if j.state in ("ingest", "render")]
+        if not running:
+            self.reset_progress()
+            if self.jobs:
+                self.loading_label.setText(f"{len(self.jobs)} session(s) waiting")
+            return
+        job = running[0]
         self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
         self.progress_bar.setMaximum(100)
-        self.start_button.setVisible(False)
-        self.stop_button.setVisible(True)
-        self.custom_mode_button.setEnabled(False)
-        self.worker_thread = QtCore.QThread()
-        self.worker = Worker(self.input_folder, self.event_folder, self.template_path, self)
-        self.worker.moveToThread(self.worker_thread)
-        self.worker_thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self.worker_thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
-        self.worker.error.connect(self.on_worker_error)
-        self.worker.show_duplicates_dialog.connect(self.on_show_duplicates_dialog)
-        self.worker.update_sessions.connect(self.update_sessions_signal.emit)
-        self.worker.finished.connect(self.processing_complete_signal.emit)
-        self.worker.progress_message.connect(self.update_progress_message)
-        self.worker.progress_value.connect(self.update_progress_value)
-        self.worker.process_stopped.connect(self.process_stopped)
-        self.duplicates_ready.connect(self.worker.process_duplicates)
-        self.worker_thread.start()
+        self.progress_bar.setValue(job.progress)
+        others = len(self.jobs) - 1
+        self.loading_label.setText(f"{job.label}: {job.status}" + (f"  (+{others} more)" if others else ""))
+
+    def update_job_status(self, job):
+        self.update_job_controls()
+        for row in range(self.sessions_table.rowCount()):
+            item = self.sessions_table.item(row, 3)
+            if item is not None and item.data(QtCore.Qt.UserRole) == id(job):
+                item.setText(job.status)
+                return
 
     def stop_processing(self):
-        ans = QtWidgets.QMessageBox.question(self, "Stop Process", "Are you sure? This deletes partial data.",
+        ans = QtWidgets.QMessageBox.question(self, "Stop Process",
+                                             "Stop all queued and running sessions? This deletes partial data.",
                                              QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
         if ans == QtWidgets.QMessageBox.Yes:
-            if self.worker:
-                self.worker.stop()
-            self.worker_thread.quit()
-            self.worker_thread.wait()
+            for job in list(self.jobs):
+                job.worker.stop()
+                if job.state == "queued":
+                    self.jobs.remove(job)
+                elif job in self.review_queue:
+                    self.review_queue.remove(job)
+                    job.duplicates_ready.emit({})
             self.delete_current_session()
 
     def delete_current_session(self):
         self.input_folder = None
         self.folder_line_edit.clear()
-        self.loading_label.setText("")
-        self.progress_bar.setVisible(False)
-        self.start_button.setVisible(True)
-        self.stop_button.setVisible(False)
-        self.custom_mode_button.setEnabled(True)
+        self.update_job_controls()
         self.message_signal.emit("Process Stopped", "Session removed.")
-        self.refresh_application()
-
-    def process_stopped(self):
-        self.start_button.setVisible(True)
-        self.stop_button.setVisible(False)
-        self.custom_mode_button.setEnabled(True)
-
-    def on_worker_error(self, msg):
-        self.error_signal.emit("Error", msg)
-        self.reset_progress()
-        self.refresh_application()
-
-    def on_show_duplicates_dialog(self, out_dir, paired_imgs):
-        dlg = DuplicatesDialog(self, out_dir, paired_imgs, ratio=NORMAL_RATIO)
-        r = dlg.exec_()
-        if r == QtWidgets.QDialog.Accepted:
-            dups = dlg.get_duplicates()
-            self.duplicates_ready.emit(dups)
-        else:
-            self.worker.stop()
-
-    def processing_complete(self):
-        self.loading_label.setText("Complete")
-        self.reset_progress()
         self.update_sessions_table()
-        self.message_signal.emit("Processing Complete", "All done.")
-        self.start_button.setVisible(True)
-        self.stop_button.setVisible(False)
-        self.custom_mode_button.setEnabled(True)
 
     def reset_progress(self):
+        if self.screen2 is None:
+            return
         self.progress_bar.setVisible(False)
         self.loading_label.setText("")
 
@@ -2282,12 +2192,15 @@ class Application(QtWidgets.QMainWindow):
             prints_item = QtWidgets.QTableWidgetItem(str(pr))
             prints_item.setTextAlignment(QtCore.Qt.AlignCenter)
             self.sessions_table.setItem(row, 2, prints_item)
+            status_item = QtWidgets.QTableWidgetItem("Done")
+            status_item.setTextAlignment(QtCore.Qt.AlignCenter)
+            self.sessions_table.setItem(row, 3, status_item)
             open_btn = QtWidgets.QPushButton()
             ic = self.style().standardIcon(QtWidgets.QStyle.SP_DirOpenIcon)
             open_btn.setIcon(ic)
             open_btn.setStyleSheet("background-color: transparent; border: none;")
             open_btn.clicked.connect(partial(self.open_folder, idx - 1))
-            self.sessions_table.setCellWidget(row, 3, open_btn)
+            self.sessions_table.setCellWidget(row, 4, open_btn)
             pr_ico = QtGui.QIcon.fromTheme("document-print")
             if pr_ico.isNull():
                 pr_ico = self.style().standardIcon(QtWidgets.QStyle.SP_FileDialogDetailedView)
@@ -2298,7 +2211,7 @@ class Application(QtWidgets.QMainWindow):
             if sn["prints"] == 0:
                 print_all_btn.setEnabled(False)
             print_all_btn.clicked.connect(partial(self.print_session, idx - 1))
-            self.sessions_table.setCellWidget(row, 4, print_all_btn)
+            self.sessions_table.setCellWidget(row, 5, print_all_btn)
             print_sel_btn = QtWidgets.QPushButton()
             print_sel_btn.setIcon(pr_ico)
             print_sel_btn.setStyleSheet("background-color: transparent; border: none;")
@@ -2306,13 +2219,21 @@ class Application(QtWidgets.QMainWindow):
             if sn["prints"] == 0:
                 print_sel_btn.setEnabled(False)
             print_sel_btn.clicked.connect(partial(self.print_selected_photos, idx - 1))
-            self.sessions_table.setCellWidget(row, 5, print_sel_btn)
+            self.sessions_table.setCellWidget(row, 6, print_sel_btn)
             del_btn = QtWidgets.QPushButton()
             trash_icon = self.style().standardIcon(QtWidgets.QStyle.SP_TrashIcon)
             del_btn.setIcon(trash_icon)
             del_btn.setStyleSheet("background-color: transparent; border: none;")
             del_btn.clicked.connect(partial(self.delete_session, idx - 1))
-            self.sessions_table.setCellWidget(row, 6, del_btn)
+            self.sessions_table.setCellWidget(row, 7, del_btn)
+        for job in self.jobs:
+            row = self.sessions_table.rowCount()
+            self.sessions_table.insertRow(row)
+            for col, text in enumerate((job.label, "-", "-", job.status)):
+                item = QtWidgets.QTableWidgetItem(text)
+                item.setTextAlignment(QtCore.Qt.AlignCenter)
+                self.sessions_table.setItem(row, col, item)
+            self.sessions_table.item(row, 3).setData(QtCore.Qt.UserRole, id(job))
         self.summary_label.setText(f"Total Targets: {total_targets} | Total Prints: {total_prints}")
         sb = self.sessions_table.verticalScrollBar()
         sb.setValue(sb.maximum())
@@ -2320,17 +2241,47 @@ class Application(QtWidgets.QMainWindow):
     def open_folder(self, idx):
         out_f = sessions[idx]["output"]
         if os.path.exists(out_f):
-            if sys.platform == "win32":
-                os.startfile(out_f)
-            elif sys.platform == "darwin":
-                subprocess.run(["open", out_f])
-            else:
-                subprocess.run(["xdg-open", out_f])
+            open_path(out_f)
 
     def print_session(self, idx):
         out_f = sessions[idx]["output"]
         t_out = os.path.join(out_f, "template_output")
-        open_print_dialog(t_out)
+        if self.print_spooler is None:
+            open_print_dialog(t_out)
+            return
+        if not os.path.isdir(t_out):
+            self.error_signal.emit("Print", "This session has no print sheets.")
+            return
+        self.print_spooler.submit_folder(t_out, session=out_f)
+        self.show_print_queue()
+
+    def auto_print_callback(self, output_directory):
+        """Sheet callback that spools a new session's sheets as they render, if auto_print is on."""
+        if self.print_spooler is None or not settings.get("auto_print"):
+            return None
+        return partial(self.print_spooler.submit, session=output_directory)
+
+    def cancel_queued_prints(self, folder):
+        if self.print_spooler is not None and folder:
+            self.print_spooler.cancel_queued(folder)
+
+    def show_print_queue(self):
+        if self.print_spooler is None:
+            self.message_signal.emit("Print Queue", "No printer is configured; sheets are opened "
+                                                    "for printing by hand (print_backend is \"viewer\").")
+            return
+        if self.print_queue_dialog is None:
+            self.print_queue_dialog = PrintQueueDialog(self, self.print_spooler)
+        self.print_queue_dialog.refresh()
+        self.print_queue_dialog.show()
+        self.print_queue_dialog.raise_()
+
+    def on_print_job_changed(self, job):
+        if self.print_queue_dialog is not None and self.print_queue_dialog.isVisible():
+            self.print_queue_dialog.refresh()
+        if job.state == printing.FAILED:
+            self.error_signal.emit("Print Failed", f"{os.path.basename(job.path)}: {job.error}\n"
+                                                   "Use Print Queue to retry.")
 
     def print_selected_photos(self, idx):
         out_f = sessions[idx]["output"]
@@ -2338,9 +2289,20 @@ class Application(QtWidgets.QMainWindow):
         if dlg.exec_() == QtWidgets.QDialog.Accepted:
             chosen_photos, copies_dict = dlg.get_selected_photos()
             if chosen_photos:
-                new_dir = self.create_template_output_folder(out_f)
-                self.apply_template_to_selected_photos(chosen_photos, copies_dict, new_dir)
-                open_print_dialog(new_dir)
+                self.print_jobs.append({
+                    "output": out_f,
+                    "photos": chosen_photos,
+                    "copies": copies_dict,
+                    "tmpl_out": self.create_template_output_folder(out_f),
+                    "hr_folder": os.path.join(self.event_folder, "digital", "photos"),
+                    "template_path": self.template_path,
+                    "adjust": self.template_position_adjustment,
+                    "template_name": core.current_template,
+                })
+                if self.print_thread is None:
+                    self.start_next_print_job()
+                else:
+                    self.update_print_progress_label()
             else:
                 QtWidgets.QMessageBox.warning(self, "No Selection", "No photos were selected.")
 
@@ -2353,47 +2315,58 @@ class Application(QtWidgets.QMainWindow):
                 return nd
             i += 1
 
-    def apply_template_to_selected_photos(self, selected_photos, copies_dict, tmpl_out):
-        digi_photos = os.path.join(self.event_folder, "digital", "photos")
-        photos_paths = []
-        for p in selected_photos:
-            c = copies_dict[p]
-            for i in range(c):
-                if c > 1:
-                    base, ext = os.path.splitext(os.path.basename(p))
-                    copy_name = f"{base}_copy{i + 1}{ext}"
-                    cp = os.path.join(os.path.dirname(p), copy_name)
-                    shutil.copy(p, cp)
-                    photos_paths.append(cp)
-                else:
-                    photos_paths.append(p)
-        normalized = []
-        for path in photos_paths:
-            dn, fn = os.path.split(path)
-            b, e = os.path.splitext(fn)
-            b = re.sub(r"\s*\(\d+\)$", "", b)
-            nf = b + e
-            np = os.path.join(dn, nf)
-            if np != path:
-                os.rename(path, np)
-            normalized.append(np)
-        hr_list = []
-        for np in normalized:
-            fname = os.path.basename(np)
-            hrp = os.path.join(digi_photos, fname)
-            if os.path.exists(hrp):
-                hr_list.append(hrp)
-            else:
-                hr_list.append(np)
-        apply_templates(hr_list, self.template_path, tmpl_out,
-                        position_adjustment_mm=self.template_position_adjustment,
-                        template_name=current_template)
-        for x in photos_paths:
-            if "_copy" in os.path.basename(x).lower():
-                try:
-                    os.remove(x)
-                except:
-                    pass
+    def start_next_print_job(self):
+        if not self.print_jobs:
+            return
+        if warmup.calibrating():
+            self.calibration_timer.start(500)
+            return
+        job = self.print_jobs.pop(0)
+        self.print_thread = QtCore.QThread()
+        self.print_worker = PrintSelectedWorker(job, self)
+        self.print_worker.moveToThread(self.print_thread)
+        self.print_thread.started.connect(self.print_worker.run)
+        self.print_worker.error.connect(lambda msg: self.show_custom_error("Print Selected", msg))
+        self.print_worker.finished.connect(self.print_thread.quit)
+        self.print_worker.finished.connect(self.print_worker.deleteLater)
+        self.print_thread.finished.connect(self.print_thread.deleteLater)
+        self.print_thread.finished.connect(self.on_print_job_finished)
+        if self.print_progress is None:
+            self.print_progress = QtWidgets.QProgressDialog(self)
+            self.print_progress.setWindowTitle("Print Selected")
+            self.print_progress.setWindowModality(QtCore.Qt.NonModal)
+            self.print_progress.setAutoClose(False)
+            self.print_progress.setAutoReset(False)
+            self.print_progress.setMinimumDuration(0)
+            self.print_progress.setRange(0, 100)
+            # Lambda so the flag is set directly; a slot on the worker would queue behind run().
+            self.print_progress.canceled.connect(lambda: self.print_worker and self.print_worker.stop())
+        self.print_progress.reset()
+        self.print_progress.setValue(0)
+        self.print_worker.progress_value.connect(self.print_progress.setValue)
+        self.update_print_progress_label()
+        self.print_progress.show()
+        self.print_thread.start()
+
+    def update_print_progress_label(self):
+        if self.print_progress is None or self.print_worker is None:
+            return
+        job = self.print_worker.job
+        text = f"Rendering {len(job['photos'])} selected photo(s) from {os.path.basename(job['output'])}..."
+        if self.print_jobs:
+            text += f"\n{len(self.print_jobs)} more selection(s) queued"
+        self.print_progress.setLabelText(text)
+
+    def on_print_job_finished(self):
+        self.print_thread = None
+        self.print_worker = None
+        self.request_sync()
+        if self.print_jobs:
+            self.start_next_print_job()
+        elif self.print_progress is not None:
+            self.print_progress.close()
+            self.print_progress.deleteLater()
+            self.print_progress = None
 
     def delete_session(self, idx):
         ans = QtWidgets.QMessageBox.question(self, "Delete Session", "Are you sure?",
@@ -2401,14 +2374,21 @@ class Application(QtWidgets.QMainWindow):
         if ans == QtWidgets.QMessageBox.Yes:
             s = sessions[idx]
             out_f = s["output"]
+            if self.print_thread is not None and any(
+                    os.path.normpath(j["output"]) == os.path.normpath(out_f)
+                    for j in self.print_jobs + [self.print_worker.job]) or (
+                    self.print_spooler is not None and self.print_spooler.active_jobs(out_f)):
+                self.error_signal.emit("Busy", "This session is still being printed.")
+                return
             if os.path.exists(out_f):
                 try:
                     shutil.rmtree(out_f)
                 except:
                     pass
             del sessions[idx]
-            update_event_data(self)
+            update_event_data(self.event_folder)
             self.update_sessions_table()
+            self.request_sync()
 
     def open_custom_mode(self):
         if not self.event_folder:
@@ -2467,6 +2447,30 @@ class Application(QtWidgets.QMainWindow):
         right_b.clicked.connect(self.increase_adjust)
         hh.addWidget(right_b)
         l.addLayout(hh)
+        prof = QtWidgets.QLabel("Machine profile:")
+        prof.setStyleSheet(f"font-size:12px; color:{TEXT_COLOR};")
+        l.addWidget(prof)
+        self.profile_label = QtWidgets.QLabel("Calibrating..." if self.calibrate_thread or warmup.calibrating()
+                                              else calibrate.describe())
+        self.profile_label.setWordWrap(True)
+        self.profile_label.setStyleSheet(f"font-size:11px; color:{TEXT_COLOR};")
+        l.addWidget(self.profile_label)
+        recal_btn = QtWidgets.QPushButton("Recalibrate")
+        recal_btn.setStyleSheet(f"""
+            QPushButton {{
+                background-color:{BUTTON_COLOR};
+                color:{TEXT_COLOR};
+                font-size:12px;
+                padding:6px;
+                border:1px solid {TEXT_COLOR};
+                border-radius:5px;
+            }}
+            QPushButton:hover {{
+                background-color:{HOVER_COLOR};
+            }}
+        """)
+        recal_btn.clicked.connect(self.start_calibration)
+        l.addWidget(recal_btn)
         save_btn = QtWidgets.QPushButton("Save")
         save_btn.setStyleSheet(f"""
             QPushButton {{
@@ -2483,6 +2487,45 @@ class Application(QtWidgets.QMainWindow):
         save_btn.clicked.connect(lambda: self.save_settings(dlg))
         l.addWidget(save_btn)
         dlg.exec_()
+        self.profile_label = None
+
+    def resume_after_calibration(self):
+        self.schedule_jobs()
+        if self.print_thread is None:
+            self.start_next_print_job()
+
+    def start_calibration(self):
+        """Measure the machine again on a thread (a few seconds of full CPU)."""
+        if self.calibrate_thread is not None or warmup.calibrating():
+            return
+        if self.jobs:
+            self.error_signal.emit("Busy", "Calibrate when no session is running; it would measure both.")
+            return
+        if self.profile_label is not None:
+            self.profile_label.setText("Calibrating...")
+        self.calibrate_thread = QtCore.QThread()
+        self.calibrate_worker = CalibrateWorker()
+        self.calibrate_worker.moveToThread(self.calibrate_thread)
+        self.calibrate_thread.started.connect(self.calibrate_worker.run)
+        self.calibrate_worker.done.connect(self.on_calibrated)
+        self.calibrate_worker.failed.connect(lambda msg: self.error_signal.emit("Calibration Failed", msg))
+        self.calibrate_worker.finished.connect(self.calibrate_thread.quit)
+        self.calibrate_worker.finished.connect(self.calibrate_worker.deleteLater)
+        self.calibrate_thread.finished.connect(self.calibrate_thread.deleteLater)
+        self.calibrate_thread.finished.connect(self.on_calibration_finished)
+        self.calibrate_thread.start()
+
+    def on_calibrated(self, profile):
+        if self.profile_label is not None:
+            self.profile_label.setText(calibrate.describe(profile))
+        self.message_signal.emit("Calibrated", "The x264 preset applies from the next session, "
+                                               "the worker count from the next launch.")
+
+    def on_calibration_finished(self):
+        self.calibrate_thread = None
+        self.calibrate_worker = None
+        if self.profile_label is not None and self.profile_label.text() == "Calibrating...":
+            self.profile_label.setText(calibrate.describe())
 
     def decrease_adjust(self):
         if self.template_position_adjustment > -2.5:
@@ -2510,8 +2553,7 @@ class Application(QtWidgets.QMainWindow):
         self.progress_bar.setVisible(False)
         self.start_button.setVisible(True)
         self.start_button.setEnabled(True)
-        self.stop_button.setVisible(False)
-        self.stop_button.setEnabled(False)
+        self.update_job_controls()
         self.message_signal.emit("Refreshed", "Ready to go.")
         self.update_sessions_table()
 
@@ -2561,9 +2603,19 @@ class Application(QtWidgets.QMainWindow):
         mb.exec_()
 
     def closeEvent(self, event):
-        ans = QtWidgets.QMessageBox.question(self, "Quit?", "Do you want to quit?",
+        busy = " Sessions are still processing and will be lost." if self.jobs else ""
+        if self.print_spooler is not None and self.print_spooler.active_jobs():
+            busy += " Sheets waiting in the print queue will not be printed."
+        sync = self.event_sync.status() if self.event_sync is not None else None
+        if sync is not None and (sync.pending or sync.error):
+            busy += (" Some files are not on the network share yet; they are synced the next time "
+                     "this event is opened.")
+        ans = QtWidgets.QMessageBox.question(self, "Quit?", "Do you want to quit?" + busy,
                                              QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No)
         if ans == QtWidgets.QMessageBox.Yes:
+            self.photo_registry.close()
+            if self.event_sync is not None:
+                self.event_sync.close()
             event.accept()
             sys.exit()
         else:
@@ -2574,6 +2626,84 @@ class Application(QtWidgets.QMainWindow):
 #                                   MAIN
 # -----------------------------------------------------------------------------
 
-app = QtWidgets.QApplication(sys.argv)
-window = Application()
-sys.exit(app.exec_())
+class StartupReport(QtCore.QObject):
+    """Times import and first paint of the main window against STARTUP_BUDGET_MS.
+
+    Runs ``window.on_first_paint()`` once the window is on screen so deferred
+    start-up work (session restore, screen pre-building) never delays it.
+    """
+    def __init__(self, window, print_and_quit=False):
+        super().__init__(window)
+        self.window = window
+        self.print_and_quit = print_and_quit
+        self.window_ms = (time.perf_counter() - _STARTUP_T0) * 1000
+        self.first_paint_ms = None
+        window.installEventFilter(self)
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Paint and self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - _STARTUP_T0) * 1000
+            obj.removeEventFilter(self)
+            QtCore.QTimer.singleShot(0, self.report)
+        return False
+    def report(self):
+        data = {
+            "import_ms": round((_IMPORTS_DONE - _STARTUP_T0) * 1000, 1),
+            "window_ms": round(self.window_ms, 1),
+            "first_paint_ms": round(self.first_paint_ms, 1),
+            "budget_ms": STARTUP_BUDGET_MS,
+            "frozen": bool(getattr(sys, "frozen", False)),
+        }
+        try:
+            import psutil
+            data["process_first_paint_ms"] = round(
+                (time.time() - psutil.Process().create_time()) * 1000, 1)
+        except Exception:
+            pass
+        logging.info(f"Startup: {data}")
+        if self.first_paint_ms > STARTUP_BUDGET_MS:
+            logging.warning(f"Startup over budget: first paint {self.first_paint_ms:.0f} ms "
+                            f"> {STARTUP_BUDGET_MS:.0f} ms")
+        try:
+            os.makedirs(APP_DIR, exist_ok=True)
+            with open(STARTUP_REPORT_FILE, "w") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            logging.error(f"Startup report save error: {e}")
+        if self.print_and_quit:
+            print(json.dumps(data))
+            QtWidgets.QApplication.exit(1 if self.first_paint_ms > STARTUP_BUDGET_MS else 0)
+            return
+        self.window.on_first_paint()
+
+def configure_logging():
+    os.makedirs(LOG_DIR, exist_ok=True)
+    handler = logging.FileHandler(os.path.join(LOG_DIR, "vide_maker_improved.log"), delay=True)
+    logging.basicConfig(
+        level=logging.DEBUG if os.environ.get("VIDE_DEBUG") else logging.INFO,
+        format="%(asctime)s:%(levelname)s:%(message)s",
+        handlers=[handler],
+    )
+
+def start_stall_watchdog(app):
+    """Heartbeat the GUI thread from a QTimer so StallWatchdog can log where it blocks."""
+    threshold = settings.get("stall_threshold_ms")
+    if threshold <= 0:
+        return None
+    dog = StallWatchdog(threshold).start()
+    timer = QtCore.QTimer(app)
+    timer.timeout.connect(dog.beat)
+    timer.start(max(10, min(50, int(threshold // 4))))
+    app.aboutToQuit.connect(dog.stop)
+    return dog
+
+def main():
+    configure_logging()
+    app = QtWidgets.QApplication(sys.argv)
+    window = Application()
+    StartupReport(window, print_and_quit="--startup-report" in sys.argv)
+    app.stall_watchdog = start_stall_watchdog(app)
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
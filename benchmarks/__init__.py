@@ -0,0 +1 @@
+"""Pipeline benchmarks over synthetic events; run with ``python -m benchmarks.run``."""
@@ -0,0 +1,544 @@
+"""Benchmark suite for the Vide pipeline.
+
+    python -m benchmarks.run [--photos 20] [--megapixels 24] [--out results.json]
+    python -m benchmarks.run --compare baseline.json --out new.json --max-regression 10
+
+Each stage is timed on its own against a freshly generated synthetic event
+and written as JSON so runs from different releases can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import generate_event, have_ffmpeg
+from vide import core, resources, settings, trace, transcode
+
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+
+class Context:
+    """Shared state for one run: the synthetic event plus folders the stages fill in."""
+    def __init__(self, args, root):
+        self.args = args
+        self.root = root
+        self.event = generate_event(os.path.join(root, "synthetic"), photos=args.photos,
+                                    megapixels=args.megapixels, videos=not args.no_video,
+                                    video_seconds=args.video_seconds, seed=args.seed)
+        self.input_dir = self.event["input_dir"]
+        self.template = self.event["template"]
+        self.event_folder = os.path.join(root, "event")
+        self.output_dir = os.path.join(self.event_folder, "output 1")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.imgs, self.vids = core.list_media(self.input_dir)
+        self.imgs.sort()
+        self.vids.sort()
+        self.hr_photos = []
+
+    def fresh_dir(self, name):
+        path = os.path.join(self.root, name)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        return path
+
+
+def timed(fn, repeat=1):
+    """Run ``fn`` ``repeat`` times; returns (median seconds, last result)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples), result
+
+
+def per_item(seconds, items, **extra):
+    out = {"seconds": round(seconds, 4), "items": items,
+           "per_item_ms": round(seconds * 1000 / items, 3) if items else None}
+    out.update(extra)
+    return out
+
+
+@benchmark("pairing")
+def bench_pairing(ctx):
+    # Pairing only looks at names, so empty files stand in for a full card.
+    card = ctx.fresh_dir("card")
+    pairs = 500
+    for i in range(pairs):
+        open(os.path.join(card, f"IMG_{i:04d}.JPG"), "w").close()
+        open(os.path.join(card, f"MVI_{i:04d}.MOV"), "w").close()
+    reps = 20
+    def run():
+        for _ in range(reps):
+            imgs, vids = core.list_media(card)
+            core.pair_files(imgs, vids)
+    secs, _ = timed(run, ctx.args.repeat)
+    return per_item(secs, reps, pairs=pairs)
+
+
+@benchmark("pairing_by_time")
+def bench_pairing_by_time(ctx):
+    """Capture-time pairing of the synthetic card, headers included; must agree with the file numbers."""
+    if not ctx.vids:
+        return {"skipped": "no videos (ffmpeg missing or --no-video)"}
+    reps = 5
+    def run():
+        for _ in range(reps):
+            pairs = core.match_files(ctx.imgs, ctx.vids, ctx.input_dir, mode="time")[0]
+        return pairs
+    secs, pairs = timed(run, ctx.args.repeat)
+    return per_item(secs, reps, pairs=len(pairs),
+                    agrees_with_numbers=sorted(pairs) == sorted(core.pair_files(ctx.imgs, ctx.vids)))
+
+
+@benchmark("preflight")
+def bench_preflight(ctx):
+    """Header-only check of the whole input folder, as run before a session starts."""
+    from vide import preflight
+    secs, report = timed(lambda: preflight.run(ctx.input_dir, ctx.event_folder), ctx.args.repeat)
+    return per_item(secs, len(report.checks), ok=report.ok,
+                    estimated_output_mb=report.needed // preflight.MB)
+
+
+@benchmark("process_file_photo")
+def bench_process_photo(ctx):
+    samples = []
+    for i, f in enumerate(ctx.imgs):
+        uid = f"bench_{i:05d}"
+        secs, _ = timed(lambda: core.process_file(f, "P", uid, ctx.input_dir, ctx.output_dir))
+        samples.append(secs)
+        ctx.hr_photos.append(os.path.join(ctx.event_folder, "digital", "photos",
+                                          core.get_new_filename(True, uid)))
+    return per_item(sum(samples), len(samples), max_ms=round(max(samples) * 1000, 3),
+                    megapixels=ctx.args.megapixels)
+
+
+@benchmark("process_file_video")
+def bench_process_video(ctx):
+    if not ctx.vids or not have_ffmpeg():
+        return {"skipped": "no videos (ffmpeg missing or --no-video)"}
+    samples = []
+    for i, f in enumerate(ctx.vids):
+        secs, _ = timed(lambda: core.process_file(f, "V", f"bench_{i:05d}", ctx.input_dir, ctx.output_dir))
+        samples.append(secs)
+    return per_item(sum(samples), len(samples), max_ms=round(max(samples) * 1000, 3),
+                    clip_seconds=ctx.args.video_seconds)
+
+
+@benchmark("transcoders")
+def bench_transcoders(ctx):
+    """Each video through every available transcoder: time, progress updates, output size."""
+    from vide import transcode
+    if not ctx.vids:
+        return {"skipped": "no videos (ffmpeg missing or --no-video)"}
+    results = {}
+    for name in transcode.BACKENDS:
+        if transcode.backend(name).name != name or (name == "ffmpeg" and not have_ffmpeg()):
+            results[name] = {"skipped": f"{name} unavailable"}
+            continue
+        out = ctx.fresh_dir(f"transcode_{name}")
+        updates = []
+        def run():
+            for i, f in enumerate(ctx.vids):
+                transcode.transcode(os.path.join(ctx.input_dir, f), os.path.join(out, f"{i}.mov"),
+                                    core.NORMAL_RATIO, progress=updates.append, name=name)
+        secs, _ = timed(run, ctx.args.repeat)
+        results[name] = {"per_video_ms": round(secs * 1000 / len(ctx.vids), 3),
+                         "progress_updates_per_video": round(len(updates) / len(ctx.vids) / ctx.args.repeat, 1),
+                         "kb_per_video": sum(os.path.getsize(os.path.join(out, x)) for x in os.listdir(out))
+                         // 1024 // len(ctx.vids)}
+    default = results.get(settings.get("transcoder"), {})
+    ran = [r for r in results.values() if "per_video_ms" in r]
+    if not ran:
+        return {"skipped": "no transcoder available"}
+    ms = default.get("per_video_ms") or ran[0]["per_video_ms"]
+    return {"seconds": round(ms * len(ctx.vids) / 1000, 4), "items": len(ctx.vids), "per_item_ms": ms,
+            "unit": "video", "backends": results}
+
+
+@benchmark("card_offload")
+def bench_card_offload(ctx):
+    """Sequential, verified copy of the card to a staging folder: throughput and time to the first landed file."""
+    from vide import offload
+    imgs, vids = core.list_media(ctx.input_dir)
+    # Without videos (--no-video, no ffmpeg) nothing pairs; the photos alone still make a card.
+    names = [f for pair in core.pair_files(imgs, vids) for f in pair] if vids else sorted(imgs)
+    def run():
+        card = offload.CardOffload(ctx.input_dir, ctx.fresh_dir("offload")).start(names)
+        t0 = time.perf_counter()
+        card.wait(names[0])
+        first = time.perf_counter() - t0
+        card.wait(names[-1])
+        card.close()
+        return first
+    secs, first = timed(run, ctx.args.repeat)
+    mb = sum(os.path.getsize(os.path.join(ctx.input_dir, f)) for f in names) / 2 ** 20
+    return per_item(secs, len(names), mb_per_s=round(mb / secs, 1), first_file_ms=round(first * 1000, 3))
+
+
+@benchmark("apply_templates")
+def bench_apply_templates(ctx):
+    photos = ctx.hr_photos or [os.path.join(ctx.input_dir, f) for f in ctx.imgs]
+    out = ctx.fresh_dir("template_output")
+    secs, _ = timed(lambda: core.apply_templates(photos, ctx.template, out, template_name="DNP 6x4"),
+                    ctx.args.repeat)
+    ctx.template_out = out
+    sheets = (len(photos) + 1) // 2
+    return per_item(secs, sheets, unit="sheet")
+
+
+# Runs apply_templates in a fresh interpreter so its peak RSS is not hidden by earlier stages.
+RENDER_CHILD = """
+import json, sys, time
+from vide import core
+a = json.loads(sys.argv[1])
+t0 = time.perf_counter()
+core.apply_templates(a["photos"], a["template"], a["out"], template_name="DNP 6x4", **a["options"])
+secs = time.perf_counter() - t0
+peak = None
+try:
+    # ru_maxrss survives exec on Linux (it would report the parent's peak); VmHWM does not.
+    with open("/proc/self/status") as f:
+        peak = next(int(l.split()[1]) * 1024 for l in f if l.startswith("VmHWM:"))
+except (OSError, StopIteration):
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+print(json.dumps({"seconds": secs, "peak_rss": peak}))
+"""
+
+PSNR_THRESHOLD = 40.0
+
+
+def render_in_child(photos, template, out, **options):
+    """``{"seconds", "peak_rss"}`` of one apply_templates run in a child process."""
+    arg = json.dumps({"photos": photos, "template": template, "out": out, "options": options})
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run([sys.executable, "-c", RENDER_CHILD, arg], cwd=root,
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def psnr(path_a, path_b):
+    """PSNR in dB between two sheets as printed, i.e. with any alpha flattened onto white."""
+    import math
+    from PIL import Image, ImageChops, ImageStat
+    def flat(path):
+        im = Image.open(path)
+        if im.mode == "RGBA":
+            bg = Image.new("RGB", im.size, "white")
+            bg.paste(im, mask=im.split()[3])
+            return bg
+        return im.convert("RGB")
+    rms = ImageStat.Stat(ImageChops.difference(flat(path_a), flat(path_b))).rms
+    mse = sum(r * r for r in rms) / len(rms)
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+@benchmark("composite_modes")
+def bench_composite_modes(ctx):
+    """Legacy full-size RGBA compositing against the reduced RGB path: speed, peak RSS, PSNR."""
+    photos = ctx.hr_photos or [os.path.join(ctx.input_dir, f) for f in ctx.imgs]
+    sheets = (len(photos) + 1) // 2
+    runs = {}
+    for mode, options in (("legacy", {"reduced": False}), ("reduced", {"reduced": True})):
+        out = ctx.fresh_dir(f"composite_{mode}")
+        runs[mode] = dict(render_in_child(photos, ctx.template, out, **options), out=out)
+    legacy, reduced = runs["legacy"], runs["reduced"]
+    names = sorted(x for x in os.listdir(legacy["out"]) if core.is_image_file(x))
+    worst = min(psnr(os.path.join(legacy["out"], n), os.path.join(reduced["out"], n)) for n in names)
+    extra = {"unit": "sheet", "legacy_per_item_ms": round(legacy["seconds"] * 1000 / sheets, 3),
+             "speedup": round(legacy["seconds"] / reduced["seconds"], 2),
+             "min_psnr_db": round(worst, 2), "psnr_ok": worst >= PSNR_THRESHOLD}
+    if legacy["peak_rss"] and reduced["peak_rss"]:
+        extra["legacy_peak_rss_mb"] = round(legacy["peak_rss"] / 2 ** 20, 1)
+        extra["peak_rss_mb"] = round(reduced["peak_rss"] / 2 ** 20, 1)
+    return per_item(reduced["seconds"], sheets, **extra)
+
+
+@benchmark("compositor")
+def bench_compositor(ctx):
+    """Time of the composite step alone (from trace spans) for the default Pillow compositor and the opt-in NumPy one."""
+    photos = ctx.hr_photos or [os.path.join(ctx.input_dir, f) for f in ctx.imgs]
+    sheets = (len(photos) + 1) // 2
+    composite_ms, outs = {}, {}
+    for name in ("pillow", "numpy"):
+        out = ctx.fresh_dir(f"compositor_{name}")
+        with trace.session(f"compositor {name}", directory=ctx.fresh_dir("traces"), enabled=True) as rec:
+            core.apply_templates(photos, ctx.template, out, template_name="DNP 6x4", compositor=name)
+        rows = {r[0]: r for r in rec.summary()}
+        setup = rows["composite_setup"][2] if "composite_setup" in rows else 0.0
+        composite_ms[name] = (rows["composite"][2] + setup) / sheets
+        outs[name] = out
+    from PIL import Image
+    identical = True
+    for n in sorted(x for x in os.listdir(outs["pillow"]) if core.is_image_file(x)):
+        with Image.open(os.path.join(outs["pillow"], n)) as a, Image.open(os.path.join(outs["numpy"], n)) as b:
+            identical = identical and a.mode == b.mode and a.size == b.size and a.tobytes() == b.tobytes()
+    return {"seconds": round(composite_ms["pillow"] * sheets / 1000, 4), "items": sheets,
+            "per_item_ms": round(composite_ms["pillow"], 3), "unit": "sheet",
+            "numpy_per_item_ms": round(composite_ms["numpy"], 3), "byte_identical": identical}
+
+
+@benchmark("image_backends")
+def bench_image_backends(ctx):
+    """Photo ingest and sheet rendering with each image backend: speed, peak RSS, PSNR against Pillow."""
+    from vide import imaging
+    photos = ctx.hr_photos or [os.path.join(ctx.input_dir, f) for f in ctx.imgs]
+    sheets = (len(photos) + 1) // 2
+    results, outs = {}, {}
+    for name in imaging.BACKENDS:
+        if imaging.backend(name).name != name:
+            results[name] = {"skipped": f"{name} backend unavailable"}
+            continue
+        out = ctx.fresh_dir(f"backend_{name}")
+        ingest_dir = os.path.join(out, "event", "output 1")
+        os.makedirs(ingest_dir)
+        # process_file takes its backend from the settings, which the environment overrides.
+        saved = os.environ.get("VIDE_IMAGE_BACKEND")
+        os.environ["VIDE_IMAGE_BACKEND"] = name
+        try:
+            secs, _ = timed(lambda: [core.process_file(f, "P", f"bench_{i:05d}", ctx.input_dir, ingest_dir)
+                                     for i, f in enumerate(ctx.imgs)])
+        finally:
+            if saved is None:
+                del os.environ["VIDE_IMAGE_BACKEND"]
+            else:
+                os.environ["VIDE_IMAGE_BACKEND"] = saved
+        outs[name] = os.path.join(out, "sheets")
+        os.makedirs(outs[name])
+        render = render_in_child(photos, ctx.template, outs[name], image_backend=name)
+        results[name] = {"ingest_per_photo_ms": round(secs * 1000 / len(ctx.imgs), 3),
+                         "render_per_sheet_ms": round(render["seconds"] * 1000 / sheets, 3)}
+        if render["peak_rss"]:
+            results[name]["render_peak_rss_mb"] = round(render["peak_rss"] / 2 ** 20, 1)
+    for name, out in outs.items():
+        if name != "pillow" and "pillow" in outs:
+            names = sorted(x for x in os.listdir(out) if core.is_image_file(x))
+            worst = min(psnr(os.path.join(outs["pillow"], n), os.path.join(out, n)) for n in names)
+            results[name]["min_psnr_db"] = round(worst, 2)
+            results[name]["psnr_ok"] = worst >= PSNR_THRESHOLD
+    default = results.get(settings.get("image_backend"), {})
+    ms = default.get("render_per_sheet_ms") or results["pillow"]["render_per_sheet_ms"]
+    return {"seconds": round(ms * sheets / 1000, 4), "items": sheets, "per_item_ms": ms,
+            "unit": "sheet", "backends": results}
+
+
+@benchmark("sheet_encoding")
+def bench_sheet_encoding(ctx):
+    """Encode time and size of one rendered sheet in each output format; checks DPI round-trips."""
+    from PIL import Image
+    out = getattr(ctx, "template_out", None)
+    if not out:
+        out = ctx.fresh_dir("encoding_sheets")
+        photos = ctx.hr_photos or [os.path.join(ctx.input_dir, f) for f in ctx.imgs]
+        core.apply_templates(photos[:2], ctx.template, out, template_name="DNP 6x4")
+    sheet = sorted(x for x in os.listdir(out) if core.is_image_file(x))[0]
+    with Image.open(os.path.join(out, sheet)) as im:
+        img = im.convert("RGB")
+    enc = ctx.fresh_dir("encoding")
+    reps = 5
+    formats = {}
+    for fmt, ext in core.SHEET_FORMATS.items():
+        path = os.path.join(enc, "sheet" + ext)
+        secs, _ = timed(lambda: [core.save_sheet(img, path, fmt) for _ in range(reps)], ctx.args.repeat)
+        with Image.open(path) as back:
+            dpi = [round(v) for v in back.info.get("dpi", (0, 0))]
+        formats[fmt] = {"encode_ms": round(secs * 1000 / reps, 3), "kb": os.path.getsize(path) // 1024,
+                        "dpi_ok": dpi == [300, 300]}
+    default = formats[settings.get("sheet_format")]
+    return {"seconds": round(default["encode_ms"] / 1000, 4), "items": 1,
+            "per_item_ms": default["encode_ms"], "unit": "sheet", "formats": formats,
+            "png_compress_level": settings.get("png_compress_level")}
+
+
+@benchmark("first_sheet")
+def bench_first_sheet(ctx):
+    """How soon a streamed render hands over its first sheet, against the time for all of them."""
+    photos = ctx.hr_photos or [os.path.join(ctx.input_dir, f) for f in ctx.imgs]
+    sheets = (len(photos) + 1) // 2
+    out = ctx.fresh_dir("first_sheet")
+    def run():
+        t0 = time.perf_counter()
+        first = []
+        core.drain(core.iter_templates(photos, ctx.template, out, template_name="DNP 6x4"),
+                   lambda path: first or first.append(time.perf_counter() - t0))
+        return first[0]
+    secs, first = timed(run, ctx.args.repeat)
+    return per_item(secs, sheets, unit="sheet", first_sheet_ms=round(first * 1000, 3))
+
+
+# First photo and first sheet of a session in a fresh interpreter, with or without the warm-up
+# the app runs after launch (which is not counted: it happens while the operator picks a card).
+FIRST_FILE_CHILD = """
+import json, os, sys, time
+a = json.loads(sys.argv[1])
+if a["warm"]:
+    from vide import warmup
+    warmup.warm_up(a["template"])
+from vide import core, resources
+t0 = time.perf_counter()
+resources.run_parallel([(1, core.process_file, (a["photo"], "P", "bench_first", a["input_dir"], a["out"]))])
+photo = time.perf_counter() - t0
+hr = os.path.join(os.path.dirname(a["out"]), "digital", "photos", core.get_new_filename(True, "bench_first"))
+os.makedirs(os.path.join(a["out"], "template_output"))
+t0 = time.perf_counter()
+core.apply_templates([hr], a["template"], os.path.join(a["out"], "template_output"), template_name="DNP 6x4")
+print(json.dumps({"photo": photo, "sheet": time.perf_counter() - t0}))
+"""
+
+
+@benchmark("warm_start")
+def bench_warm_start(ctx):
+    """First photo and first sheet of a fresh process, cold against after warmup.warm_up()."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = {}
+    for warm in (False, True):
+        event = ctx.fresh_dir(f"warm_start_{int(warm)}")
+        arg = json.dumps({"warm": warm, "template": ctx.template, "photo": ctx.imgs[0],
+                          "input_dir": ctx.input_dir, "out": os.path.join(event, "output 1")})
+        os.makedirs(os.path.join(event, "output 1"))
+        proc = subprocess.run([sys.executable, "-c", FIRST_FILE_CHILD, arg], cwd=root,
+                              capture_output=True, text=True, check=True)
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        key = "warm" if warm else "cold"
+        out[f"{key}_photo_ms"] = round(r["photo"] * 1000, 1)
+        out[f"{key}_sheet_ms"] = round(r["sheet"] * 1000, 1)
+    return per_item(out["warm_photo_ms"] / 1000 + out["warm_sheet_ms"] / 1000, 1, **out)
+
+
+@benchmark("create_pdf_from_images")
+def bench_pdf(ctx):
+    out = getattr(ctx, "template_out", None)
+    if not out:
+        return {"skipped": "apply_templates did not run"}
+    pdf = os.path.join(ctx.root, "print_session.pdf")
+    secs, _ = timed(lambda: core.create_pdf_from_images(out, pdf), ctx.args.repeat)
+    sheets = len([x for x in os.listdir(out) if core.is_image_file(x)])
+    return per_item(secs, sheets, unit="sheet", pdf_bytes=os.path.getsize(pdf))
+
+
+@benchmark("sync_event_from_folders")
+def bench_sync(ctx):
+    # Several sessions so the per-session listdir/exists cost shows.
+    sessions = 10
+    for i in range(2, sessions + 1):
+        dst = os.path.join(ctx.event_folder, f"output {i}")
+        if not os.path.exists(dst):
+            shutil.copytree(ctx.output_dir, dst)
+    reps = 20
+    def run():
+        for _ in range(reps):
+            core.sync_event_from_folders(ctx.event_folder)
+    secs, _ = timed(run, ctx.args.repeat)
+    return per_item(secs, reps, sessions=len(core.sessions))
+
+
+def machine_info():
+    import PIL
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pillow": PIL.__version__,
+        "ffmpeg": have_ffmpeg(),
+        # Worker count and x264 preset come from here unless the settings pin them.
+        "workers": resources.max_workers(),
+        "x264_preset": transcode.preset(),
+    }
+
+
+def compare(baseline, current, max_regression=None):
+    """Print per-stage deltas; returns True if no stage regressed beyond ``max_regression`` %."""
+    ok = True
+    print(f"{'stage':<28}{'baseline ms':>14}{'current ms':>14}{'delta':>10}")
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name, {})
+        b, c = base.get("per_item_ms"), cur.get("per_item_ms")
+        if b is None or c is None:
+            print(f"{name:<28}{'-':>14}{'-' if c is None else c:>14}{'':>10}")
+            continue
+        delta = (c - b) / b * 100 if b else 0.0
+        flag = ""
+        if max_regression is not None and delta > max_regression:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{name:<28}{b:>14.3f}{c:>14.3f}{delta:>9.1f}%{flag}")
+    return ok
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__,
+                                formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--photos", type=int, default=10, help="photo/video pairs in the synthetic event")
+    p.add_argument("--megapixels", type=float, default=24)
+    p.add_argument("--video-seconds", type=int, default=3)
+    p.add_argument("--no-video", action="store_true", help="skip video generation and video stages")
+    p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--repeat", type=int, default=1, help="repeats for whole-stage timings (median)")
+    p.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run only these stages")
+    p.add_argument("--out", help="write results JSON here")
+    p.add_argument("--compare", help="baseline results JSON to compare against")
+    p.add_argument("--max-regression", type=float, help="exit 1 if a stage is this many %% slower")
+    p.add_argument("--keep", action="store_true", help="keep the synthetic event directory")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    root = tempfile.mkdtemp(prefix="vide_bench_")
+    try:
+        t0 = time.perf_counter()
+        ctx = Context(args, root)
+        print(f"Generated synthetic event in {time.perf_counter() - t0:.1f}s: {root}", file=sys.stderr)
+        results = {}
+        for name, fn in BENCHMARKS.items():
+            if args.only and name not in args.only:
+                continue
+            print(f"  {name}...", file=sys.stderr, flush=True)
+            results[name] = fn(ctx)
+        report = {"meta": machine_info(),
+                  "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+                  "results": results}
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(baseline, report, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
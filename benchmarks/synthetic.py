@@ -0,0 +1,86 @@
+"""Synthetic event generator for the benchmark suite.
+
+Builds an input folder that looks like a booth camera dump: numbered JPEGs
+at a realistic megapixel count with random EXIF orientation and capture
+times, a paired short clip per photo rendered from ffmpeg's lavfi sources,
+and a 6x4 template PNG with transparent photo panels.
+"""
+
+import math
+import os
+import random
+import shutil
+import subprocess
+from datetime import datetime, timedelta
+
+from PIL import Image, ImageDraw
+
+EXIF_ORIENTATION = 0x0112
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 0x9003
+
+
+def have_ffmpeg():
+    return shutil.which("ffmpeg") is not None
+
+
+def make_jpeg(path, megapixels, orientation=1, taken=None, rng=None):
+    """Write a 3:2 JPEG of roughly ``megapixels`` with the given EXIF orientation."""
+    rng = rng or random.Random(0)
+    w = int(math.sqrt(megapixels * 1e6 * 3 / 2))
+    h = int(w * 2 / 3)
+    # Noise over gradients compresses like a real photo rather than a flat fill.
+    noise = Image.effect_noise((w, h), 40 + rng.randint(0, 20))
+    grad = Image.linear_gradient("L").resize((w, h))
+    grad_t = grad.transpose(Image.Transpose.ROTATE_90).resize((w, h))
+    img = Image.merge("RGB", (Image.blend(noise, grad, 0.6), grad_t, Image.blend(noise, grad_t, 0.3)))
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = orientation
+    if taken:
+        exif.get_ifd(EXIF_IFD)[EXIF_DATETIME_ORIGINAL] = taken.strftime("%Y:%m:%d %H:%M:%S")
+    img.save(path, "JPEG", quality=92, exif=exif)
+
+
+def make_video(path, seconds=3, size="1920x1080", fps=30, taken=None):
+    """Render a short H.264/AAC clip from lavfi test sources."""
+    cmd = [
+        "ffmpeg", "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest",
+    ]
+    if taken:
+        cmd += ["-metadata", f"creation_time={taken.strftime('%Y-%m-%dT%H:%M:%S')}Z"]
+    subprocess.run(cmd + [path], check=True)
+
+
+def make_template(path, width=1800, height=1200):
+    """6x4 template: opaque frame and footer with transparent photo panels on each half."""
+    tmpl = Image.new("RGBA", (width, height), (236, 28, 91, 255))
+    draw = ImageDraw.Draw(tmpl)
+    half = width // 2
+    for x0 in (0, half):
+        draw.rectangle((x0 + 47, 47, x0 + half - 48, height - 147), fill=(0, 0, 0, 0))
+        draw.rectangle((x0 + 60, height - 120, x0 + half - 60, height - 40), fill=(255, 255, 255, 200))
+    tmpl.save(path)
+
+
+def generate_event(root, photos=10, megapixels=24, videos=True, video_seconds=3, seed=1234):
+    """Create ``root/input`` and ``root/template.png``; returns a dict describing them."""
+    rng = random.Random(seed)
+    input_dir = os.path.join(root, "input")
+    os.makedirs(input_dir, exist_ok=True)
+    start = datetime(2025, 6, 14, 18, 0, 0)
+    videos = videos and have_ffmpeg()
+    for i in range(1, photos + 1):
+        taken = start + timedelta(seconds=45 * i + rng.randint(0, 10))
+        make_jpeg(os.path.join(input_dir, f"IMG_{i:04d}.JPG"), megapixels,
+                  orientation=rng.choice((1, 1, 3, 6, 8)), taken=taken, rng=rng)
+        if videos:
+            make_video(os.path.join(input_dir, f"MVI_{i:04d}.MOV"), seconds=video_seconds,
+                       taken=taken + timedelta(seconds=rng.randint(-2, 2)))
+    template = os.path.join(root, "template.png")
+    make_template(template)
+    return {"input_dir": input_dir, "template": template, "photos": photos,
+            "megapixels": megapixels, "videos": videos}
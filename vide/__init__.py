@@ -0,0 +1,5 @@
+"""Vide processing core.
+
+The modules in this package never import Qt; the desktop app (``VM_51.py``)
+and the ``python -m vide`` command line are both thin front ends over it.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from vide.cli import main
+
+sys.exit(main())
@@ -0,0 +1,191 @@
+"""Client for the Vide web API. Has no Qt dependency."""
+
+import json
+import logging
+import os
+import threading
+
+from vide.paths import APP_DIR
+
+
+API_URL = os.environ.get("VIDE_API_URL", "https://vide.website")
+AUTH_CACHE_FILE = os.path.join(APP_DIR, "auth.json")
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class ApiClient:
+    """Pooled, retrying client for the Vide web API.
+
+    Calls block, so the GUI runs them on a worker thread (see SignInWorker).
+    ``requests`` is only imported when the first call builds the session, so
+    constructing a client costs nothing at start-up. Access/refresh tokens are cached in AUTH_CACHE_FILE; the password is
+    never written to disk.
+    """
+    TOKEN_PATH = "/api/v1/token/"
+    REFRESH_PATH = "/api/v1/token/refresh/"
+    REFRESH_MARGIN = 30
+
+    def __init__(self, base_url=None, timeout=(5, 15), retries=3, backoff=0.5,
+                 cache_file=None):
+        self.base_url = (base_url or API_URL).rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_file = cache_file or AUTH_CACHE_FILE
+        self.email = None
+        self.access_token = None
+        self.refresh_token = None
+        self._lock = threading.Lock()
+        self._session = None
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                # Connect errors are retried for every method (nothing reached the server). Read
+                # errors and error statuses only for idempotent methods: a sign-in or token refresh
+                # POST the server already handled must not be sent twice.
+                retry = Retry(total=self.retries, connect=self.retries, read=self.retries,
+                              status=self.retries, backoff_factor=self.backoff,
+                              status_forcelist=(429, 500, 502, 503, 504),
+                              raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"Content-Type": "application/json"})
+                self._session = session
+            return self._session
+
+    @staticmethod
+    def token_expiry(token):
+        """``exp`` claim of a JWT (unverified), or None if it can't be read."""
+        import base64
+        try:
+            payload = token.split(".")[1]
+            payload += "=" * (-len(payload) % 4)
+            return json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        except Exception:
+            return None
+
+    def _token_valid(self, token):
+        import time
+        if not token:
+            return False
+        exp = self.token_expiry(token)
+        return exp is None or exp - self.REFRESH_MARGIN > time.time()
+
+    def _post(self, path, data):
+        import requests
+        try:
+            return self.session.post(self.base_url + path, json=data, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ApiError(f"Network error: {e}")
+
+    @staticmethod
+    def _error_message(response):
+        try:
+            detail = response.json().get("detail")
+        except Exception:
+            detail = None
+        return detail or f"Server returned {response.status_code}"
+
+    def sign_in(self, email, password):
+        r = self._post(self.TOKEN_PATH, {"email": email, "password": password})
+        if r.status_code != 200:
+            raise ApiError(self._error_message(r), r.status_code)
+        body = r.json()
+        with self._lock:
+            self.email = email
+            self.access_token = body.get("access")
+            self.refresh_token = body.get("refresh")
+        self.save_cache()
+
+    def refresh(self):
+        with self._lock:
+            refresh_token = self.refresh_token
+        if not refresh_token:
+            raise ApiError("Not signed in", 401)
+        r = self._post(self.REFRESH_PATH, {"refresh": refresh_token})
+        if r.status_code != 200:
+            if r.status_code in (400, 401):
+                self.sign_out()
+            raise ApiError(self._error_message(r), r.status_code)
+        body = r.json()
+        with self._lock:
+            self.access_token = body.get("access")
+            # Rotating refresh tokens are returned alongside the new access token.
+            self.refresh_token = body.get("refresh", refresh_token)
+        self.save_cache()
+
+    def request(self, method, path, **kwargs):
+        """Authenticated request; refreshes the access token when it is about to expire or rejected."""
+        import requests
+        if not self._token_valid(self.access_token) and self.refresh_token:
+            self.refresh()
+        kwargs.setdefault("timeout", self.timeout)
+        headers = dict(kwargs.pop("headers", None) or {})
+        for attempt in range(2):
+            headers["Authorization"] = f"Bearer {self.access_token}"
+            try:
+                r = self.session.request(method, self.base_url + path, headers=headers, **kwargs)
+            except requests.RequestException as e:
+                raise ApiError(f"Network error: {e}")
+            if r.status_code == 401 and attempt == 0 and self.refresh_token:
+                self.refresh()
+                continue
+            return r
+
+    def restore_session(self):
+        """Reuse cached tokens from a previous launch; True if still signed in."""
+        self.load_cache()
+        if self._token_valid(self.access_token):
+            return True
+        if self._token_valid(self.refresh_token):
+            try:
+                self.refresh()
+                return True
+            except ApiError as e:
+                logging.info(f"Cached session refresh failed: {e}")
+        return False
+
+    def sign_out(self):
+        with self._lock:
+            self.access_token = None
+            self.refresh_token = None
+        try:
+            os.remove(self.cache_file)
+        except OSError:
+            pass
+
+    def load_cache(self):
+        try:
+            with open(self.cache_file, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("base_url") != self.base_url:
+            return
+        with self._lock:
+            self.email = data.get("email")
+            self.access_token = data.get("access")
+            self.refresh_token = data.get("refresh")
+
+    def save_cache(self):
+        with self._lock:
+            data = {"base_url": self.base_url, "email": self.email,
+                    "access": self.access_token, "refresh": self.refresh_token}
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            fd = os.open(self.cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+        except OSError as e:
+            logging.error(f"Auth cache save error: {e}")
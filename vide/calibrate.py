@@ -0,0 +1,275 @@
+"""Measure this machine once and pick worker counts and the x264 preset for it.
+
+Booths range from dual-core laptops to 16-core desktops. A short
+micro-benchmark (a few seconds) runs the real photo ingest on a synthetic
+12 MP photo with 1, 2, 4 ... workers, renders one print sheet and, with
+each x264 preset tier, transcodes a test clip through the configured
+transcoder as many times at once as sessions would. From that it chooses:
+
+* ``workers`` - the smallest worker count within 10% of the best photo
+  throughput, so extra threads that only add memory and contention are not
+  started (hyper-threads, memory-bound laptops)
+* ``x264_preset`` - the slowest (best-compressing) tier, never slower than
+  ``medium``, with which a reference session (REFERENCE) is predicted to
+  finish within ``target_session_s``
+
+The profile is written to APP_DIR/profile.json. It runs in the background
+on first launch (``auto_calibrate``), again when the CPU count changes, and
+from Settings or ``python -m vide calibrate`` on demand. ``max_workers`` and
+``x264_preset`` in the settings still override it.
+"""
+
+import json
+import logging
+import math
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from vide import settings
+from vide.paths import APP_DIR
+
+
+PROFILE_FILE = os.path.join(APP_DIR, "profile.json")
+PROFILE_VERSION = 2
+# Best quality first; calibration never picks anything slower than the old fixed "medium".
+PRESET_TIERS = ("medium", "fast", "faster", "veryfast")
+PHOTO_MEGAPIXELS = 12
+# A busy booth session: photo/video pairs of 10 s clips at 30 fps.
+REFERENCE = {"pairs": 20, "video_seconds": 10, "fps": 30}
+# Workers within this share of the best photo throughput count as just as fast.
+SCALING_TOLERANCE = 0.9
+CLIP_SECONDS = 2
+
+_lock = threading.Lock()
+_profile = None
+_loaded = False
+
+
+def load():
+    """The saved profile, or None if there is none or it was made on other hardware."""
+    global _profile, _loaded
+    with _lock:
+        if not _loaded:
+            _loaded = True
+            try:
+                with open(PROFILE_FILE) as f:
+                    _profile = json.load(f)
+            except (OSError, ValueError):
+                _profile = None
+            if _profile and (_profile.get("version") != PROFILE_VERSION
+                             or _profile.get("cpu_count") != os.cpu_count()):
+                logging.info("Machine profile is out of date, it will be recalibrated")
+                _profile = None
+        return _profile
+
+
+def save(profile):
+    global _profile, _loaded
+    os.makedirs(APP_DIR, exist_ok=True)
+    with open(PROFILE_FILE + ".tmp", "w") as f:
+        json.dump(profile, f, indent=2)
+    os.replace(PROFILE_FILE + ".tmp", PROFILE_FILE)
+    with _lock:
+        _profile, _loaded = profile, True
+
+
+def needed():
+    return settings.get("auto_calibrate") and load() is None
+
+
+def _synthetic_photo(path, megapixels=PHOTO_MEGAPIXELS):
+    """A JPEG with camera-like entropy: smooth colour fields plus fine grain."""
+    from PIL import Image
+    w = int(math.sqrt(megapixels * 1e6 * 4 / 3))
+    h = w * 3 // 4
+    small = (w // 16, h // 16)
+    coarse = Image.merge("RGB", (Image.effect_noise(small, 80), Image.linear_gradient("L").resize(small),
+                                 Image.effect_noise(small, 40)))
+    im = coarse.resize((w, h), Image.BICUBIC)
+    grain = Image.effect_noise((w, h), 12).convert("RGB")
+    Image.blend(im, grain, 0.15).save(path, "JPEG", quality=92)
+    return path
+
+
+def _synthetic_template(path):
+    from PIL import Image, ImageDraw
+    im = Image.new("RGBA", (1800, 1200), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(im)
+    for x0 in (0, 900):
+        draw.rectangle((x0, 1050, x0 + 899, 1199), fill=(200, 20, 120, 255))
+        draw.rectangle((x0 + 4, 4, x0 + 895, 1045), outline=(255, 255, 255, 255), width=6)
+    im.save(path, "PNG")
+    return path
+
+
+def _worker_counts(cpus):
+    counts = {1, cpus}
+    n = 2
+    while n < cpus:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+
+def measure_photos(folder, photo):
+    """``{workers: photos per second}`` of the real photo ingest (HR + small copy)."""
+    from concurrent.futures import ThreadPoolExecutor
+    from vide import core
+    out = os.path.join(folder, "event", "output 1")
+    os.makedirs(out, exist_ok=True)
+    src, name = os.path.split(photo)
+    core.process_file(name, "P", "calibrate_warm", src, out)
+    rates = {}
+    task = 0
+    for n in _worker_counts(os.cpu_count() or 1):
+        jobs = max(4, 2 * n)
+        with ThreadPoolExecutor(max_workers=n, thread_name_prefix="vide-calibrate") as pool:
+            t0 = time.perf_counter()
+            list(pool.map(lambda i: core.process_file(name, "P", f"calibrate_{i}", src, out),
+                          range(task, task + jobs)))
+            rates[n] = jobs / (time.perf_counter() - t0)
+        task += jobs
+    return rates
+
+
+def measure_sheet(folder, photo):
+    """Seconds to render one two-photo print sheet the way core.iter_templates does."""
+    from PIL import Image
+    from vide import core, imaging
+    img = imaging.backend()
+    template = core.load_template(_synthetic_template(os.path.join(folder, "template.png")))
+    panel_w, panel_h = 900 - 2 * 47, 1200 - 47 - 146
+    samples = []
+    for i in range(3):
+        t0 = time.perf_counter()
+        background = Image.new("RGB", template.size, "white")
+        background.paste(template, (0, 0), template)
+        panels = []
+        for x in (47, 947):
+            im = img.open(photo, "RGB", fit=(panel_w, panel_h))
+            panels.append((img.cover(im, panel_w, panel_h, reducing_gap=2.0), (x, 47)))
+        sheet = img.composite(img.from_pil(background), panels)
+        core.save_sheet(sheet, os.path.join(folder, f"sheet_{i}{core.SHEET_FORMATS['png']}"), "png",
+                        backend=img)
+        samples.append(time.perf_counter() - t0)
+    return sorted(samples)[len(samples) // 2]
+
+
+def measure_x264(folder, encodes=1):
+    """``{preset: frames per second}`` of ``encodes`` transcodes at once through the configured
+    transcoder, with its own threading as in a session; empty without ffmpeg."""
+    from concurrent.futures import ThreadPoolExecutor
+    fps = {}
+    frames = CLIP_SECONDS * REFERENCE["fps"] * encodes
+    clip = os.path.join(folder, "clip.mp4")
+    try:
+        # A 1080p source like the cameras', made once with a fast lossless-ish encode.
+        subprocess.run(["ffmpeg", "-hide_banner", "-nostdin", "-y", "-f", "lavfi",
+                        "-i", f"testsrc2=size=1920x1080:rate={REFERENCE['fps']}", "-t", str(CLIP_SECONDS),
+                        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "18", clip],
+                       capture_output=True, check=True, timeout=120)
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.info(f"Calibration: x264 not measured ({e})")
+        return fps
+    from vide import core, transcode
+    def encode(preset, i):
+        transcode.transcode(clip, os.path.join(folder, f"clip_{preset}_{i}.mp4"), core.NORMAL_RATIO,
+                            x264_preset=preset)
+    with ThreadPoolExecutor(max_workers=encodes, thread_name_prefix="vide-calibrate") as pool:
+        for preset in PRESET_TIERS:
+            t0 = time.perf_counter()
+            try:
+                list(pool.map(encode, [preset] * encodes, range(encodes)))
+            except transcode.TranscodeError as e:
+                logging.info(f"Calibration: x264 preset {preset} failed ({e})")
+                continue
+            fps[preset] = frames / (time.perf_counter() - t0)
+    return fps
+
+
+def predict(photos_per_s, sheet_s, fps, workers, pairs=None, video_seconds=None):
+    """Seconds a session of ``pairs`` photo/video pairs should take on ``workers`` workers.
+
+    ``fps`` is the combined rate of ``workers`` transcodes at once (measure_x264); a session
+    with fewer pairs runs fewer at once. Print sheets render on the same pool, up to
+    ``workers`` at once (core.iter_templates).
+    """
+    pairs = pairs or REFERENCE["pairs"]
+    video_seconds = video_seconds or REFERENCE["video_seconds"]
+    photos = pairs / photos_per_s
+    videos = pairs * video_seconds * REFERENCE["fps"] * workers / (fps * min(workers, pairs)) if fps else 0
+    sheets = math.ceil(pairs / 2)
+    return photos + videos + sheets * sheet_s / min(workers, sheets)
+
+
+def choose_workers(rates):
+    """The smallest worker count within SCALING_TOLERANCE of the best photo throughput."""
+    best = max(rates.values())
+    return min(n for n, r in rates.items() if r >= best * SCALING_TOLERANCE)
+
+
+def choose(rates, sheet_s, x264_fps, target=None):
+    """``(workers, preset, predicted seconds)`` for the measured rates."""
+    target = target or settings.get("target_session_s")
+    workers = choose_workers(rates)
+    tiers = [p for p in PRESET_TIERS if p in x264_fps]
+    if not tiers:
+        return workers, None, predict(rates[workers], sheet_s, 0, workers)
+    for preset in tiers:
+        predicted = predict(rates[workers], sheet_s, x264_fps[preset], workers)
+        if predicted <= target:
+            return workers, preset, predicted
+    return workers, tiers[-1], predicted
+
+
+def run():
+    """Measure this machine, save and return its profile."""
+    from vide import imaging, transcode
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="vide-calibrate-") as folder:
+        photo = _synthetic_photo(os.path.join(folder, "IMG_0001.JPG"))
+        rates = measure_photos(folder, photo)
+        sheet_s = measure_sheet(folder, photo)
+        # A session runs this many transcodes at once, each with the transcoder's own threads.
+        encodes = choose_workers(rates)
+        x264_fps = measure_x264(folder, encodes)
+    target = settings.get("target_session_s")
+    workers, preset, predicted = choose(rates, sheet_s, x264_fps, target)
+    profile = {
+        "version": PROFILE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "cpu_count": os.cpu_count(),
+        "image_backend": imaging.backend().name,
+        "photos_per_s": {str(n): round(r, 2) for n, r in rates.items()},
+        "sheet_s": round(sheet_s, 3),
+        "transcoder": transcode.backend().name,
+        "x264_encodes": encodes,
+        "x264_fps": {p: round(f, 1) for p, f in x264_fps.items()},
+        "workers": workers,
+        "x264_preset": preset,
+        "target_session_s": target,
+        "predicted_session_s": round(predicted, 1),
+        "seconds": round(time.perf_counter() - t0, 1),
+    }
+    save(profile)
+    logging.info(f"Calibrated in {profile['seconds']} s: {describe(profile)}")
+    return profile
+
+
+def describe(profile=None):
+    """One line for Settings and the command line."""
+    profile = profile or load()
+    if not profile:
+        return "Not calibrated yet."
+    rate = profile["photos_per_s"].get(str(profile["workers"]))
+    fps = profile["x264_fps"].get(profile["x264_preset"])
+    return (f"{profile['workers']} worker(s), x264 preset {profile['x264_preset'] or 'medium (not measured)'}; "
+            f"{rate} photos/s, {profile['sheet_s']:.2f} s/sheet"
+            + (f", {fps:.0f} fps over {profile['x264_encodes']} {profile['transcoder']} encode(s)"
+               if fps else "")
+            + f"; a {REFERENCE['pairs']}-pair session in about {profile['predicted_session_s']:.0f} s "
+              f"(calibrated {profile['created'].replace('T', ' ')})")
@@ -0,0 +1,358 @@
+"""Headless front end: ``python -m vide process|render|custom|print|preflight|calibrate``.
+
+Runs the same pipeline as the desktop app without a display, so large jobs
+and overnight reprocessing can be scripted on a server.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+
+from vide import calibrate, core, preflight, printing, resources, settings, trace
+from vide.registry import PhotoRegistry
+
+
+RATIOS = {
+    "1:1": 1.0,
+    "16:9": 16 / 9,
+    "4:5": 4 / 5,
+    "5:7": 5 / 7,
+    "4:3": 4 / 3,
+    "2:5": 2 / 5,
+    "3:2": 3 / 2,
+}
+
+
+def _progress(label):
+    def cb(val):
+        print(f"\r{label}... {val}%", end="", file=sys.stderr, flush=True)
+        if val >= 100:
+            print(file=sys.stderr)
+    return cb
+
+
+def _open_event(event_folder, template_name=None):
+    """Create the event folder if needed and load its sessions; returns the event template file."""
+    os.makedirs(event_folder, exist_ok=True)
+    data_path = os.path.join(event_folder, core.DATA_FILE)
+    if not os.path.exists(data_path):
+        with open(data_path, "w") as f:
+            f.write(f"Template: {template_name or 'DNP 6x4'}\n")
+    core.sync_event_from_folders(event_folder)
+    if template_name:
+        core.current_template = template_name
+    tfs = sorted(x for x in os.listdir(event_folder) if core.is_image_file(os.path.join(event_folder, x)))
+    return os.path.join(event_folder, tfs[0]) if tfs else None
+
+
+def _template_path(args, event_folder, event_template):
+    if args.no_template:
+        return None
+    if args.template:
+        dest = os.path.join(event_folder, os.path.basename(args.template))
+        if os.path.abspath(args.template) != os.path.abspath(dest):
+            shutil.copy(args.template, dest)
+        return dest
+    return event_template
+
+
+def _spooler(args, event_folder):
+    """A started PrintSpooler for ``--printer``/``--backend``, else the event's printers.json, else
+    the print settings; None when printing is set to "viewer". Finished jobs are reported on stderr."""
+    if args.printer:
+        printers = [printing.Printer(b) for b in (printing.make_backend(args.backend, n) for n in args.printer) if b]
+    else:
+        printers = printing.load_printers(event_folder)
+        if printers is None:
+            backend = printing.make_backend(args.backend)
+            printers = [printing.Printer(backend)] if backend else []
+    if not printers:
+        print("Print backend is 'viewer'; pass --backend lp|windows|fake.", file=sys.stderr)
+        return None
+    done = set()
+    def report(job):
+        if not job.active and job.id not in done:
+            done.add(job.id)
+            print(f"{os.path.basename(job.path)}: {job.state}"
+                  + (f" ({job.error})" if job.error else ""), file=sys.stderr)
+    return printing.PrintSpooler(printers, listener=report).start()
+
+
+def _print_summary(jobs):
+    failed = [j for j in jobs if j.state != printing.DONE]
+    used = sorted({j.printer for j in jobs if j.printer})
+    print(f"{len(jobs) - len(failed)}/{len(jobs)} sheets printed on {', '.join(used) or 'default printer'}")
+    return 1 if failed else 0
+
+
+def _sheet_printer(args, event_folder):
+    """``(spooler, jobs, sheet_callback)`` for ``--print``: each sheet is spooled as soon as it renders.
+
+    The spooler is None without ``--print`` and when no printer is configured.
+    """
+    spooler = _spooler(args, event_folder) if args.print else None
+    jobs = []
+    return spooler, jobs, spooler and (lambda path: jobs.append(spooler.submit(path)))
+
+
+def _finish_printing(spooler, jobs):
+    if spooler is None:
+        return 0
+    try:
+        spooler.wait()
+    finally:
+        spooler.stop()
+    return _print_summary(jobs)
+
+
+def _report(report):
+    print(report.summary(), file=sys.stderr)
+    if report.mode == "time":
+        for row in report.pairing():
+            print("  {} <- {} {}".format(*row).rstrip(), file=sys.stderr)
+    for line in report.warnings():
+        print(f"Warning: {line}", file=sys.stderr)
+    for line in report.problems():
+        print(f"Problem: {line}", file=sys.stderr)
+    return report.ok
+
+
+def cmd_preflight(args):
+    return 0 if _report(preflight.run(args.input, os.path.abspath(args.event))) else 1
+
+
+def cmd_calibrate(args):
+    profile = calibrate.run() if args.force or calibrate.load() is None else calibrate.load()
+    print(calibrate.describe(profile))
+    print(f"Profile: {calibrate.PROFILE_FILE}", file=sys.stderr)
+    return 0
+
+
+def cmd_process(args):
+    event_folder = os.path.abspath(args.event)
+    template_path = _template_path(args, event_folder, _open_event(event_folder, args.template_name))
+    report = None
+    if settings.get("preflight") and not args.skip_preflight:
+        report = preflight.run(args.input, event_folder)
+        if not _report(report):
+            print("Fix the problems above or pass --skip-preflight.", file=sys.stderr)
+            return 2
+    registry = PhotoRegistry(event_folder)
+    spooler, jobs, sheet_callback = _sheet_printer(args, event_folder)
+    if args.print and spooler is None:
+        return 2
+    output_directory = core.create_output_directory(event_folder, in_progress=True)
+    try:
+        paired = core.process_directory(args.input, output_directory,
+                                        progress_callback=_progress("Processing files"),
+                                        registry=registry, pairs=report and report.pairs)
+        registry.save()
+        core.make_duplicates({os.path.join(output_directory, p): args.copies for p in paired})
+        entry = core.finish_session(event_folder, args.input, output_directory, paired, template_path,
+                                    position_adjustment_mm=args.adjust, registry=registry,
+                                    progress_callback=_progress("Applying templates"),
+                                    sheet_callback=sheet_callback)
+    except Exception:
+        if spooler:
+            spooler.stop()
+        if os.path.exists(output_directory):
+            shutil.rmtree(output_directory)
+        raise
+    finally:
+        registry.close()
+    print(f"{entry['output']}: {entry['targets']} targets, {entry['prints']} prints")
+    return _finish_printing(spooler, jobs)
+
+
+def cmd_render(args):
+    output_directory = os.path.abspath(args.session)
+    event_folder = os.path.abspath(args.event) if args.event else os.path.dirname(output_directory)
+    template_path = _template_path(args, event_folder, _open_event(event_folder))
+    if not template_path:
+        print("No template found for this event; pass --template.", file=sys.stderr)
+        return 2
+    spooler, jobs, sheet_callback = _sheet_printer(args, event_folder)
+    if args.print and spooler is None:
+        return 2
+    custom = os.path.isdir(os.path.join(output_directory, "print"))
+    hr_folder = os.path.join(output_directory, "print") if custom else os.path.join(event_folder, "digital", "photos")
+    template_out = os.path.join(output_directory, "template_output")
+    if os.path.exists(template_out):
+        shutil.rmtree(template_out)
+    os.makedirs(template_out)
+    registry = PhotoRegistry(event_folder)
+    try:
+        photos = core.normalize_output_photos(output_directory)
+        prints = core.render_session(photos, hr_folder, template_path, template_out,
+                                     position_adjustment_mm=args.adjust,
+                                     progress_callback=_progress("Applying templates"),
+                                     registry=registry, sheet_callback=sheet_callback)
+    except Exception:
+        if spooler:
+            spooler.stop()
+        raise
+    finally:
+        registry.close()
+    core.update_event_data(event_folder)
+    print(f"{template_out}: {prints} sheets")
+    return _finish_printing(spooler, jobs)
+
+
+def cmd_custom(args):
+    event_folder = os.path.abspath(args.event)
+    event_template = _open_event(event_folder)
+    ratio = RATIOS[args.ratio]
+    orientation = "landscape" if args.landscape else "portrait"
+    if args.landscape and ratio < 1 or not args.landscape and ratio > 1:
+        ratio = 1.0 / ratio
+    if args.no_crop and not args.minimize:
+        print("Enable crop or --minimize.", file=sys.stderr)
+        return 2
+    template_path = None
+    if args.apply_template:
+        template_path = core.custom_template_path(ratio, orientation,
+                                                  _template_path(args, event_folder, event_template), True)
+    files = []
+    for f in args.files:
+        if os.path.isdir(f):
+            files.extend(sorted(os.path.join(f, x) for x in os.listdir(f)
+                                if core.is_image_file(x) or core.is_video_file(x)))
+        else:
+            files.append(f)
+    registry = PhotoRegistry(event_folder)
+    output_directory = core.create_custom_output_directory(event_folder, in_progress=True)
+    try:
+        photos, videos = core.process_custom_files(files, output_directory, ratio,
+                                                   minimize=args.minimize, do_crop=not args.no_crop,
+                                                   registry=registry,
+                                                   progress_callback=_progress("Processing custom files"))
+        registry.save()
+        core.make_duplicates({p: args.copies for p in photos})
+        core.finish_custom_session(event_folder, output_directory, len(files),
+                                   template_path=template_path,
+                                   position_adjustment_mm=args.adjust, registry=registry,
+                                   progress_callback=_progress("Applying templates"))
+    except Exception:
+        if os.path.exists(output_directory):
+            shutil.rmtree(output_directory)
+        raise
+    finally:
+        registry.close()
+    print(f"{output_directory}: {len(photos)} photos, {len(videos)} videos")
+    return 0
+
+
+def cmd_print(args):
+    folder = os.path.abspath(args.folder)
+    session = folder
+    if os.path.isdir(os.path.join(folder, "template_output")):
+        folder = os.path.join(folder, "template_output")
+    else:
+        session = os.path.dirname(folder)
+    # The event's printers.json applies if the session sits in an event that has one.
+    spooler = _spooler(args, os.path.dirname(session))
+    if spooler is None:
+        return 2
+    try:
+        jobs = [spooler.submit(p, copies=args.copies) for p in
+                sorted((os.path.join(folder, f) for f in os.listdir(folder) if core.is_image_file(f)),
+                       key=os.path.getmtime)]
+        if not jobs:
+            print(f"No sheets in {folder}", file=sys.stderr)
+            return 2
+        spooler.wait()
+    finally:
+        spooler.stop()
+    return _print_summary(jobs)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="vide", description="Headless Vide pipeline.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log to stderr")
+    parser.add_argument("--trace", action="store_true", help="record per-stage timings (Chrome trace + summary)")
+    parser.add_argument("--profile", action="store_true", help="run the command under cProfile")
+    parser.add_argument("--trace-dir", help="where to write traces (default ~/.vide/traces)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def print_args(p):
+        p.add_argument("--backend", choices=list(printing.BACKENDS), help="default: print_backend setting")
+        p.add_argument("--printer", action="append",
+                       help="printer queue name; repeat to balance over several (default: the event's "
+                            "printers.json, else the printer setting)")
+
+    def template_args(p):
+        p.add_argument("--template", help="template image (copied into the event folder)")
+        p.add_argument("--no-template", action="store_true", help="skip print sheets")
+        p.add_argument("--adjust", type=float, default=0, help="template position adjustment in mm")
+
+    p = sub.add_parser("process", help="process a folder of paired photos/videos into a new session")
+    p.add_argument("input", help="folder with the camera photos and videos")
+    p.add_argument("event", help="event folder (created if missing)")
+    p.add_argument("--template-name", choices=list(core.TEMPLATES), help="print layout for a new event")
+    p.add_argument("--copies", type=int, default=1, help="prints per photo")
+    p.add_argument("--skip-preflight", action="store_true", help="start without checking the input first")
+    template_args(p)
+    p.add_argument("--print", action="store_true", help="spool each sheet to the printer as soon as it renders")
+    print_args(p)
+    p.set_defaults(func=cmd_process)
+
+    p = sub.add_parser("preflight", help="check a folder for unreadable or unpairable files and disk space")
+    p.add_argument("input", help="folder with the camera photos and videos")
+    p.add_argument("event", help="event folder the session would go to")
+    p.set_defaults(func=cmd_preflight)
+
+    p = sub.add_parser("calibrate", help="measure this machine and pick worker counts and the x264 preset")
+    p.add_argument("--force", action="store_true", help="measure again even if a profile exists")
+    p.set_defaults(func=cmd_calibrate)
+
+    p = sub.add_parser("render", help="re-render the print sheets of an existing session")
+    p.add_argument("session", help="session output folder")
+    p.add_argument("--event", help="event folder (default: parent of the session)")
+    template_args(p)
+    p.add_argument("--print", action="store_true", help="spool each sheet to the printer as soon as it renders")
+    print_args(p)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("custom", help="custom mode: crop/minimize arbitrary files into a new custom session")
+    p.add_argument("event", help="event folder (created if missing)")
+    p.add_argument("files", nargs="+", help="files or folders to process")
+    p.add_argument("--ratio", choices=list(RATIOS), default="4:5")
+    p.add_argument("--landscape", action="store_true")
+    p.add_argument("--minimize", action="store_true")
+    p.add_argument("--no-crop", action="store_true")
+    p.add_argument("--apply-template", action="store_true", help="render sheets (4:5 portrait only)")
+    p.add_argument("--copies", type=int, default=1, help="prints per photo")
+    template_args(p)
+    p.set_defaults(func=cmd_custom)
+
+    p = sub.add_parser("print", help="send a session's print sheets to a printer queue")
+    p.add_argument("folder", help="session output folder or folder of sheets")
+    print_args(p)
+    p.add_argument("--copies", type=int, default=1)
+    p.set_defaults(func=cmd_print)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s:%(levelname)s:%(message)s")
+    try:
+        with trace.session(f"{args.command}", profile=args.profile or None,
+                           directory=args.trace_dir, enabled=args.trace or None) as rec:
+            memory = resources.RssMonitor(args.command).start()
+            try:
+                status = args.func(args)
+            finally:
+                peak = memory.stop()
+        if rec:
+            print(rec.summary_table(), file=sys.stderr)
+            if peak:
+                print(f"Peak RSS: {peak // resources.MB} MB", file=sys.stderr)
+        return status
+    except Exception as e:
+        logging.error(f"{args.command} failed: {e}")
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
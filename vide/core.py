@@ -0,0 +1,1252 @@
+"""GUI-free Vide pipeline: pairing, photo/video processing, templates and event data.
+
+Nothing in this module imports Qt, so it can be driven by the desktop app,
+the ``python -m vide`` command line or a benchmark script alike.
+"""
+
+import os, subprocess, shutil, logging, re, random, sys, threading
+from datetime import datetime
+
+from vide import imaging, resources, settings, trace, transcode
+
+# Pillow (and, through vide.resources, concurrent.futures) is imported inside
+# the functions that use it so that importing this module stays cheap at GUI
+# start-up.
+
+
+# -----------------------------------------------------------------------------
+#                           CONSTANTS & GLOBALS
+# -----------------------------------------------------------------------------
+DATA_FILE = "event_data.txt"
+# Dropped into a session folder while a job is still writing it; sync skips such folders.
+IN_PROGRESS_MARKER = ".in_progress"
+
+# Only DNP 6x4 mode is supported.
+TEMPLATES = {
+    "DNP 6x4": {
+        "width": 1800,
+        "height": 1200,
+        "margin_top": 4,
+        "margin_left": 4,
+        "margin_right": 4,
+        "margin_bottom": 12.4,
+    },
+}
+
+sessions = []
+current_template = None
+
+NORMAL_RATIO = 4 / 5
+used_random_numbers = set()
+# Serializes event data updates (sessions list, event_data.txt, folder renumbering)
+# between jobs finishing on different threads.
+event_lock = threading.RLock()
+
+# -----------------------------------------------------------------------------
+#                           HELPER FUNCTIONS
+# -----------------------------------------------------------------------------
+def is_image_file(fp):
+    return fp.lower().endswith((".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff"))
+
+def is_video_file(fp):
+    return fp.lower().endswith((".mov", ".mp4", ".avi", ".mkv"))
+
+def extract_number(fname):
+    match_custom = re.match(r".*?\b(\d+)\s*\(custom\)", fname, re.IGNORECASE)
+    if match_custom:
+        return int(match_custom.group(1))
+    nums = re.findall(r"(\d+)", fname)
+    return int(nums[-1]) if nums else None
+
+def create_output_directory(base_dir, folder_name="output", in_progress=False):
+    i = 1
+    while True:
+        new_dir = os.path.join(base_dir, f"{folder_name} {i}")
+        if not os.path.exists(new_dir):
+            try:
+                os.makedirs(new_dir)
+            except FileExistsError:
+                i += 1
+                continue
+            if in_progress:
+                mark_in_progress(new_dir)
+            return new_dir
+        i += 1
+
+def mark_in_progress(folder):
+    with open(os.path.join(folder, IN_PROGRESS_MARKER), "w") as f:
+        f.write(str(os.getpid()))
+
+def clear_in_progress(folder):
+    try:
+        os.remove(os.path.join(folder, IN_PROGRESS_MARKER))
+    except FileNotFoundError:
+        pass
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        # No cheap check without psutil; treat the marker as left over from a crash.
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def is_in_progress(folder):
+    """True while a live process is still writing ``folder`` (stale markers are ignored)."""
+    try:
+        with open(os.path.join(folder, IN_PROGRESS_MARKER), "r") as f:
+            pid = int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return False
+    return _pid_alive(pid)
+
+def generate_unique_id():
+    today = datetime.now().strftime("%Y%m%d")
+    while True:
+        rand_val = random.randint(10000, 99999)
+        if rand_val not in used_random_numbers:
+            used_random_numbers.add(rand_val)
+            return f"{today}_{rand_val}"
+
+def get_new_filename(is_photo=True, unique_id=None, copy_num=None):
+    if is_photo:
+        return f"{unique_id}_p{'_copy' + str(copy_num) if copy_num else ''}.jpg"
+    else:
+        return f"{unique_id}_v{'_copy' + str(copy_num) if copy_num else ''}.mov"
+
+def crop_to_aspect_ratio(image, ratio=0.8):
+    return image.crop(imaging.aspect_box(*image.size, ratio))
+
+def custom_crop(image, ratio):
+    return image.crop(imaging.aspect_box(*image.size, ratio))
+
+# --- New sorting key to group duplicate copies together ---
+def sort_key_with_copies(filepath):
+    base = os.path.splitext(os.path.basename(filepath))[0]
+    base_clean = re.sub(r"\s*\(\d+\)$", "", base)
+    m = re.search(r"_copy(\d+)", base, re.IGNORECASE)
+    if m:
+        copy_num = int(m.group(1))
+        base_clean = re.sub(r"_copy\d+", "", base, flags=re.IGNORECASE)
+    else:
+        copy_num = 0
+    return (base_clean, copy_num)
+
+# -----------------------------------------------------------------------------
+#             FOLDER REORDER & EVENT DATA FUNCTIONS
+# -----------------------------------------------------------------------------
+def reorder_output_folders(event_folder):
+    outs = [f for f in os.listdir(event_folder) if f.startswith("output")]
+    if any(is_in_progress(os.path.join(event_folder, f)) for f in outs):
+        # Never renumber under a running job; the next update after it finishes will.
+        return
+    outs.sort(key=extract_number)
+    exp_normal = 1
+    for fold in outs:
+        m = re.search(r"(\d+)$", fold)
+        if not m:
+            continue
+        num = int(m.group(1))
+        if num != exp_normal:
+            old_path = os.path.join(event_folder, fold)
+            new_path = os.path.join(event_folder, f"output {exp_normal}")
+            os.rename(old_path, new_path)
+        exp_normal += 1
+
+def sync_event_from_folders(event_folder, application=None):
+    """Rebuild ``sessions`` from the event's output folders, skipping ones still in progress."""
+    with event_lock:
+        _sync_event_from_folders(event_folder)
+
+def _sync_event_from_folders(event_folder):
+    global current_template
+    sessions.clear()
+    current_template, entries = scan_sessions(event_folder)
+    sessions.extend(entries)
+
+def scan_sessions(event_folder):
+    """``(template name, session entries)`` of an event as found on disk; changes no module state."""
+    template = "DNP 6x4"
+    data_path = os.path.join(event_folder, DATA_FILE)
+    if os.path.exists(data_path):
+        try:
+            with open(data_path, "r") as f:
+                lines = f.readlines()
+            template = lines[0].split(": ")[1].strip()
+        except:
+            pass
+    entries = []
+    outs = [f for f in os.listdir(event_folder) if f.startswith("output")]
+    outs.sort(key=extract_number)
+    for idx, fold in enumerate(outs, start=1):
+        op = os.path.join(event_folder, fold)
+        if is_in_progress(op):
+            continue
+        t_out = os.path.join(op, "template_output")
+        tg = len([x for x in os.listdir(op) if is_image_file(os.path.join(op, x))])
+        pr = 0
+        if os.path.exists(t_out):
+            pr = len([x for x in os.listdir(t_out) if is_image_file(os.path.join(t_out, x))])
+        entries.append(session_entry(op, op, tg, pr, event_folder, "(custom)" in fold.lower()))
+    return template, entries
+
+def session_entry(folder, output, targets, print_files, event_folder, custom=False):
+    return {
+        "folder": folder,
+        "output": output,
+        "targets": targets,
+        "prints": print_files * 2,
+        "print_files": print_files,
+        "event_digital_folder": os.path.join(event_folder, "digital"),
+        "custom": custom
+    }
+
+def update_event_data(event_folder):
+    with event_lock, trace.span("catalog_update"):
+        _update_event_data(event_folder)
+
+def _update_event_data(event_folder):
+    reorder_output_folders(event_folder)
+    sync_event_from_folders(event_folder)
+    write_event_data(event_folder, current_template, sessions)
+
+def write_event_data(event_folder, template, entries):
+    """Write the event's ``event_data.txt`` summary of ``entries``."""
+    data_path = os.path.join(event_folder, DATA_FILE)
+    total_sess = len(entries)
+    total_targets = sum(s["targets"] for s in entries)
+    total_print_files = sum(s["print_files"] for s in entries)
+    total_prints = total_print_files * 2
+    with open(data_path, "w") as f:
+        f.write(f"Template: {template}\n")
+        f.write(f"Total Sessions: {total_sess}\n")
+        f.write(f"Total Targets: {total_targets}\n")
+        f.write(f"Total Prints: {total_prints}\n\n")
+        f.write("Sessions Data:\nSession # | Targets | Prints\n")
+        for i, se in enumerate(entries, start=1):
+            f.write(f"{i} | {se['targets']} | {se['prints']}\n")
+
+# -----------------------------------------------------------------------------
+#                           CREATE PDF & OPEN PRINT DIALOG
+# -----------------------------------------------------------------------------
+class PdfBuilder:
+    """Builds a PDF one page per :meth:`add`, appending to the file, so only one sheet is decoded at a time.
+
+    Used as a sheet consumer the PDF grows while the session renders.
+    """
+    def __init__(self, pdf_path):
+        self.path = pdf_path
+        self.pages = 0
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+
+    def add(self, sheet_path):
+        from PIL import Image
+        with trace.span("pdf_page", page=self.pages), Image.open(sheet_path) as im:
+            im.convert("RGB").save(self.path, "PDF", append=self.pages > 0, quality=100)
+        self.pages += 1
+
+def create_pdf_from_images(folder, pdf_path):
+    fs = [os.path.join(folder, x) for x in os.listdir(folder) if is_image_file(os.path.join(folder, x))]
+    if not fs:
+        return
+    fs.sort()
+    pdf = PdfBuilder(pdf_path)
+    with trace.span("pdf", pages=len(fs)):
+        for fp in fs:
+            pdf.add(fp)
+
+def open_print_dialog(folder):
+    """Opens the folder for printing by generating a PDF (on Windows) or opening the images sorted by modification date."""
+    if os.path.exists(folder):
+        items = sorted(
+            [os.path.join(folder, f) for f in os.listdir(folder) if is_image_file(os.path.join(folder, f))],
+            key=os.path.getmtime
+        )
+        if items:
+            try:
+                if sys.platform == "win32":
+                    pdf_path = os.path.join(folder, "print_session.pdf")
+                    create_pdf_from_images(folder, pdf_path)
+                    os.startfile(pdf_path)
+                elif sys.platform == "darwin":
+                    subprocess.run(["open"] + items)
+                else:
+                    subprocess.run(["xdg-open"] + items)
+            except Exception as e:
+                logging.error(f"Print error: {e}")
+
+# -----------------------------------------------------------------------------
+#                           PROCESS DIRECTORY FUNCTION
+# -----------------------------------------------------------------------------
+def list_media(input_dir):
+    fs = os.listdir(input_dir)
+    imgs, vids = [], []
+    for f in fs:
+        fp = os.path.join(input_dir, f)
+        if os.path.isfile(fp):
+            if is_image_file(fp):
+                imgs.append(f)
+            elif is_video_file(fp):
+                vids.append(f)
+    return imgs, vids
+
+def pair_files(imgs, vids, input_dir=None, mode=None):
+    """Pair each image with a video by file number: exact, else nearest below, else nearest above.
+    In "time" mode (see :func:`match_files`) by capture time instead.
+
+    Raises ValueError if an image is left without a video.
+    """
+    pairs, unpaired, _ = match_files(imgs, vids, input_dir, mode)
+    if unpaired:
+        logging.error(f"No video found for {unpaired[0]}")
+        raise ValueError(f"No video found for {unpaired[0]}")
+    return pairs
+
+def match_files(imgs, vids, input_dir=None, mode=None):
+    """The pairing of :func:`pair_files` as ``(pairs, unpaired images, unused videos)``.
+
+    ``mode`` is the ``pairing`` setting by default: "number" pairs on file
+    names, "time" on capture times read from the headers in ``input_dir``
+    (see :func:`match_by_time`).
+    """
+    if (mode or settings.get("pairing")) == "time" and input_dir:
+        times = {f: capture_time(os.path.join(input_dir, f)) for f in imgs + vids}
+        return match_by_time(imgs, vids, times)[:3]
+    return match_numbers(imgs, vids)
+
+def match_numbers(imgs, vids):
+    images_info = [{"file": i, "num": extract_number(i)} for i in imgs]
+    videos_info = [{"file": v, "num": extract_number(v)} for v in vids]
+    images_info.sort(key=lambda x: x["num"] if x["num"] else float("inf"))
+    videos_info.sort(key=lambda x: x["num"] if x["num"] else float("inf"))
+    used_videos = set()
+    pairs = []
+    unpaired = []
+    for i_data in images_info:
+        inum = i_data["num"]
+        ifile = i_data["file"]
+        exact = None
+        for v_data in videos_info:
+            if v_data["num"] == inum and v_data["file"] not in used_videos:
+                exact = v_data
+                break
+        if exact:
+            pairs.append((ifile, exact["file"]))
+            used_videos.add(exact["file"])
+            continue
+        cands = [v for v in videos_info if v["num"] and inum is not None and v["num"] <= inum
+                 and v["file"] not in used_videos]
+        if cands:
+            best = max(cands, key=lambda x: x["num"])
+            pairs.append((ifile, best["file"]))
+            used_videos.add(best["file"])
+            continue
+        cands = [v for v in videos_info if v["num"] and inum is not None and v["num"] > inum
+                 and v["file"] not in used_videos]
+        if cands:
+            best = min(cands, key=lambda x: x["num"])
+            pairs.append((ifile, best["file"]))
+            used_videos.add(best["file"])
+            continue
+        unpaired.append(ifile)
+    return pairs, unpaired, [v["file"] for v in videos_info if v["file"] not in used_videos]
+
+# -----------------------------------------------------------------------------
+#                           CAPTURE TIME PAIRING
+# -----------------------------------------------------------------------------
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 0x9003
+EXIF_OFFSET_TIME_ORIGINAL = 0x9011
+EXIF_SUBSEC_TIME_ORIGINAL = 0x9291
+EXIF_DATETIME = 0x0132
+# QuickTime/MP4 times count seconds from 1904-01-01.
+MAC_EPOCH_OFFSET = 2082844800
+# Camera and video clocks may differ by a whole time zone (many cameras write
+# local time where MP4 wants UTC); shifts are tried in these steps up to this far.
+CLOCK_STEP = 15 * 60
+MAX_CLOCK_OFFSET = 14 * 3600
+
+def exif_capture_time(exif):
+    """POSIX seconds of DateTimeOriginal (else DateTime) in a Pillow ``Exif``; None if absent.
+
+    Without an OffsetTimeOriginal the camera's local time is read as if it were UTC.
+    """
+    sub = exif.get_ifd(EXIF_IFD)
+    value = sub.get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+    try:
+        t = datetime.strptime(str(value).strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+    seconds = (t - datetime(1970, 1, 1)).total_seconds()
+    frac = str(sub.get(EXIF_SUBSEC_TIME_ORIGINAL) or "").strip("\x00 ")
+    if frac.isdigit():
+        seconds += float(f"0.{frac}")
+    m = re.match(r"([+-])(\d\d):(\d\d)", str(sub.get(EXIF_OFFSET_TIME_ORIGINAL) or ""))
+    if m:
+        seconds -= (1 if m.group(1) == "+" else -1) * (int(m.group(2)) * 3600 + int(m.group(3)) * 60)
+    return seconds
+
+def _atoms(f, end):
+    """``(type, payload start, payload end)`` of the MP4/QuickTime boxes from here to ``end``."""
+    pos = f.tell()
+    while pos + 8 <= end:
+        f.seek(pos)
+        head = f.read(8)
+        if len(head) < 8:
+            return
+        size, kind = int.from_bytes(head[:4], "big"), head[4:]
+        start = pos + 8
+        if size == 1:
+            size = int.from_bytes(f.read(8), "big")
+            start += 8
+        elif size == 0:
+            size = end - pos
+        if size < start - pos:
+            return
+        yield kind, start, pos + size
+        pos += size
+
+def video_capture_time(path):
+    """POSIX seconds of the ``mvhd`` creation time of an MP4/MOV; None if absent or not MP4/MOV.
+
+    Only box headers are read: the movie header is found by seeking past the media data.
+    """
+    try:
+        with open(path, "rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            for kind, start, stop in _atoms(f, end):
+                if kind != b"moov":
+                    continue
+                f.seek(start)
+                for kind, start, _ in _atoms(f, stop):
+                    if kind == b"mvhd":
+                        f.seek(start)
+                        head = f.read(12)
+                        created = (int.from_bytes(head[4:12], "big") if head[:1] == b"\x01"
+                                   else int.from_bytes(head[4:8], "big"))
+                        return created - MAC_EPOCH_OFFSET if created else None
+                return None
+    except OSError:
+        return None
+    return None
+
+def capture_time(path):
+    """When a photo or video was taken, in POSIX seconds, from its header; None if unknown."""
+    if is_video_file(path):
+        return video_capture_time(path)
+    try:
+        from PIL import Image
+        with Image.open(path) as im:
+            return exif_capture_time(im.getexif())
+    except Exception:
+        return None
+
+def _merge(imgs, vids, times, shift, tolerance):
+    """Sorted merge of timed images and videos (video times moved by ``shift``): each image takes
+    the closest free video within ``tolerance`` seconds; returns ``[(image, video, gap)]``."""
+    pairs = []
+    j = 0
+    for img in imgs:
+        t = times[img]
+        while j < len(vids) and times[vids[j]] + shift < t - tolerance:
+            j += 1
+        if j == len(vids):
+            break
+        # A later video closer to this image wins; the earlier one is left for no one.
+        while j + 1 < len(vids) and abs(times[vids[j + 1]] + shift - t) < abs(times[vids[j]] + shift - t):
+            j += 1
+        gap = times[vids[j]] + shift - t
+        if abs(gap) <= tolerance:
+            pairs.append((img, vids[j], gap))
+            j += 1
+    return pairs
+
+def clock_offset(imgs, vids, times, tolerance):
+    """Whole quarter hours to add to video times so most images find a video; 0 unless a shift pairs more."""
+    candidates = {0}
+    for i in imgs:
+        for v in vids:
+            d = times[i] - times[v]
+            if abs(d) <= MAX_CLOCK_OFFSET + CLOCK_STEP:
+                candidates.add(round(d / CLOCK_STEP) * CLOCK_STEP)
+    return max(sorted(candidates, key=abs), key=lambda c: len(_merge(imgs, vids, times, c, tolerance)))
+
+def match_by_time(imgs, vids, times, tolerance=None):
+    """Pair images and videos on capture time, ``times`` mapping each name to POSIX seconds or None.
+
+    Both sides are sorted by time and merged, every image taking the nearest
+    free video within ``tolerance`` seconds (the ``pairing_tolerance_s``
+    setting by default), after shifting video times by the whole number of
+    quarter hours that pairs the most files. Files without a capture time
+    fall back to number pairing among what is left.
+
+    Returns ``(pairs, unpaired images, unused videos, gaps, offset)``: ``gaps``
+    maps each paired image to the video's time minus the photo's in seconds
+    (None when paired by number), ``offset`` is the clock shift applied.
+    """
+    if tolerance is None:
+        tolerance = settings.get("pairing_tolerance_s")
+    timed_imgs = sorted((f for f in imgs if times.get(f) is not None), key=lambda f: (times[f], f))
+    timed_vids = sorted((f for f in vids if times.get(f) is not None), key=lambda f: (times[f], f))
+    offset = clock_offset(timed_imgs, timed_vids, times, tolerance) if timed_imgs and timed_vids else 0
+    merged = _merge(timed_imgs, timed_vids, times, offset, tolerance)
+    gaps = {img: gap for img, _, gap in merged}
+    used = {vid for _, vid, _ in merged}
+    untimed = [f for f in imgs if times.get(f) is None]
+    rest, unpaired, unused = match_numbers(untimed, [v for v in vids if v not in used])
+    gaps.update((img, None) for img, _ in rest)
+    pairs = [(img, vid) for img, vid, _ in merged] + rest
+    unpaired = [f for f in timed_imgs if f not in gaps] + unpaired
+    return pairs, unpaired, unused, gaps, offset
+
+# Rough seconds per unit of work, used only to weight progress between photos and videos.
+PHOTO_COST_PER_MPX = 0.02
+VIDEO_COST_PER_MB = 0.25
+# The same for a photo known only by its file size (a 12 MP camera JPEG is about 4 MB).
+PHOTO_COST_PER_MB = 0.06
+
+# Peak decoded memory of one task, for the memory budget. A photo is held as
+# the decoded image plus the transposed and resized copies. Video work in the
+# ffmpeg executable only costs this process a small fixed share; PyAV decodes
+# and encodes in-process (about 100 MB for 1080p with threaded decoding).
+DECODED_COPIES = 3
+VIDEO_TASK_BYTES = 64 * 1024 * 1024
+PYAV_TASK_BYTES = 160 * 1024 * 1024
+
+def image_size(path):
+    """``(width, height)`` from the image header without decoding pixels; None if unreadable."""
+    try:
+        return imaging.backend().size(path)
+    except Exception:
+        return None
+
+def decoded_bytes(path, bands=3, copies=DECODED_COPIES):
+    size = image_size(path)
+    if size is None:
+        return 0
+    return size[0] * size[1] * bands * copies
+
+def estimate_task(path):
+    """``(cost, decoded_bytes)`` of processing a file: cost weights progress, bytes feed the memory budget."""
+    try:
+        if is_image_file(path):
+            size = image_size(path)
+            if size is None:
+                return 1.0, 0
+            w, h = size
+            return max(w * h / 1e6, 0.1) * PHOTO_COST_PER_MPX, w * h * 3 * DECODED_COPIES
+        mem = PYAV_TASK_BYTES if transcode.backend().name == "pyav" else VIDEO_TASK_BYTES
+        return max(os.path.getsize(path) / 1e6, 0.1) * VIDEO_COST_PER_MB, mem
+    except Exception:
+        return 1.0, 0
+
+def estimate_cost(path):
+    """Expected relative processing cost of a file: megapixels for photos, size for videos."""
+    return estimate_task(path)[0]
+
+def estimate_cost_from_size(path):
+    """:func:`estimate_cost` from ``os.stat`` alone, for a card file that is not to be opened yet."""
+    try:
+        mb = max(os.path.getsize(path) / 1e6, 0.1)
+    except OSError:
+        return 1.0
+    return mb * (PHOTO_COST_PER_MB if is_image_file(path) else VIDEO_COST_PER_MB)
+
+def process_directory(input_dir, output_dir, progress_callback=None, registry=None, should_stop=None,
+                      offload=None, pairs=None):
+    """Pair and process a card's photos and videos; returns the output photo names, or None if stopped.
+
+    With ``offload`` (default: the ``card_offload`` setting, see
+    :mod:`vide.offload`) the card is first copied to local disk in pair
+    order, and each task starts as soon as its own file has landed. Nothing
+    on the card is opened before the copy starts: progress is weighted by
+    file size and each task's memory is estimated from its staged copy.
+
+    ``pairs`` is the preflight's ``[(image, video)]`` pairing of the same
+    folder; without it "time" pairing reads the capture times again, from
+    the staged copies when offloading.
+    """
+    from vide import offload as card
+    imgs, vids = list_media(input_dir)
+    staged = card.CardOffload(input_dir) if (card.wanted(input_dir) if offload is None else offload) else None
+    tasks = []
+    paired_images = []
+    failed = threading.Event()
+    def stopped():
+        return failed.is_set() or bool(should_stop and should_stop())
+    def add(f, kind, uid):
+        path = os.path.join(input_dir, f)
+        if staged:
+            tasks.append((estimate_cost_from_size(path), _staged_file,
+                          (failed, f, kind, uid, staged.dest, output_dir, registry, should_stop, input_dir),
+                          lambda: estimate_task(os.path.join(staged.dest, f))[1],
+                          lambda: staged.wait(f, stopped) is not None))
+        else:
+            cost, mem = estimate_task(path)
+            tasks.append((cost, process_file, (f, kind, uid, input_dir, output_dir, registry, should_stop), mem))
+    try:
+        if pairs is None and staged and settings.get("pairing") == "time":
+            # Capture times are in the headers: copy the card in file-number order and read them there.
+            staged.start(sorted(imgs + vids, key=lambda f: (extract_number(f) or float("inf"), f)))
+            for f in imgs + vids:
+                if staged.wait(f, stopped) is None:
+                    return None
+            pairs = pair_files(imgs, vids, staged.dest)
+        elif pairs is None:
+            pairs = pair_files(imgs, vids, input_dir)
+        for (img_f, vid_f) in pairs:
+            uid = generate_unique_id()
+            photo_name = get_new_filename(True, uid)
+            paired_images.append(photo_name)
+            add(img_f, "P", uid)
+            add(vid_f, "V", uid)
+        for i in imgs:
+            if "_copy" in i.lower():
+                uid = generate_unique_id()
+                c_m = re.search(r"_copy(\d+)", i.lower())
+                cnum = c_m.group(1) if c_m else "1"
+                copy_name = get_new_filename(True, uid, cnum)
+                paired_images.append(copy_name)
+                add(i, "P", uid)
+        if staged and not staged.names:
+            staged.start([t[2][1] for t in tasks])
+        if resources.run_parallel(tasks, progress_callback, should_stop) is None:
+            return None
+    except Exception as e:
+        logging.error(f"process_directory error: {e}")
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        raise
+    finally:
+        if staged:
+            staged.close()
+    return paired_images
+
+def _staged_file(failed, *args):
+    # Tasks still waiting for their file from the card give up once one has failed.
+    try:
+        return process_file(*args)
+    except Exception:
+        failed.set()
+        raise
+
+# -----------------------------------------------------------------------------
+#                           APPLY TEMPLATES (WITH OFFSET)
+# -----------------------------------------------------------------------------
+PANEL_MANIFEST = "panels.json"
+SHEET_FORMATS = {"png": ".png", "jpeg": ".jpg", "tiff": ".tif"}
+
+def save_sheet(img, path, fmt, dpi=300, backend=None):
+    """Encode a print sheet as ``fmt`` (a SHEET_FORMATS key) with its DPI in the file header.
+
+    ``img`` belongs to ``backend`` (an imaging backend; Pillow by default).
+    """
+    (backend or imaging.backend("pillow")).save_sheet(img, path, fmt, dpi)
+
+def _file_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+
+# Decoded templates by file version; every render of a session (and Print Selected) reuses one.
+TEMPLATE_CACHE = 4
+_templates = {}
+_templates_lock = threading.Lock()
+
+def load_template(path):
+    """The template image at ``path`` as RGBA, decoded once per file version. Shared: never modify it."""
+    from PIL import Image
+    key = tuple(_file_key(path) or (os.path.abspath(path),))
+    with _templates_lock:
+        im = _templates.get(key)
+    if im is None:
+        with trace.span("template_load"):
+            im = Image.open(path).convert("RGBA")
+        with _templates_lock:
+            _templates[key] = im
+            while len(_templates) > TEMPLATE_CACHE:
+                del _templates[next(iter(_templates))]
+    return im
+
+def load_panel_index(template_dirs, layout):
+    """Map photo file keys to ``(sheet_path, side)`` for panels already rendered with ``layout``.
+
+    ``template_dirs`` are earlier apply_templates outputs (a session's
+    template_output); a sheet is only used while the photo, the template and
+    the sheet itself are unchanged since it was written.
+    """
+    import json
+    index = {}
+    for d in template_dirs:
+        mp = os.path.join(d, PANEL_MANIFEST)
+        if not os.path.exists(mp):
+            continue
+        try:
+            with open(mp, "r") as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logging.error(f"Panel manifest error {mp}: {e}")
+            continue
+        if manifest.get("layout") != layout:
+            continue
+        for sheet, (sheet_key, keys) in manifest.get("sheets", {}).items():
+            sheet_path = os.path.join(d, sheet)
+            if _file_key(sheet_path) != sheet_key:
+                continue
+            for side, k in enumerate(keys):
+                if k and _file_key(k[0]) == k:
+                    index[tuple(k)] = (sheet_path, side)
+    return index
+
+def drain(stream, *consumers):
+    """Hand each sheet of an :func:`iter_templates` stream to ``consumers`` as it arrives.
+
+    Returns the sheet paths, or None if the render was stopped. ``None``
+    consumers are skipped, so optional ones can be passed as they are.
+    """
+    consumers = [c for c in consumers if c]
+    written = []
+    while True:
+        try:
+            path = next(stream)
+        except StopIteration as end:
+            return written if end.value else None
+        written.append(path)
+        for consume in consumers:
+            consume(path)
+
+def apply_templates(photo_paths, template_path, template_out_dir, *args, sheet_callback=None, **kwargs):
+    """Render two photos per sheet; returns the sheet paths, or None if stopped.
+
+    Takes the arguments of :func:`iter_templates`. ``sheet_callback(path)``
+    is called as each sheet is written, so printing can start before the
+    last sheet is rendered.
+    """
+    return drain(iter_templates(photo_paths, template_path, template_out_dir, *args, **kwargs),
+                 sheet_callback)
+
+def iter_templates(photo_paths, template_path, template_out_dir,
+                   position_adjustment_mm=0, progress_callback=None,
+                   template_name=None, registry=None, should_stop=None, reuse_dirs=(),
+                   reduced=None, compositor=None, sheet_format=None, image_backend=None):
+    """Render two photos per sheet as ``print_N.<ext>``, yielding each sheet path once it is written.
+
+    The generator returns True when every sheet is done and False if
+    ``should_stop`` fired (see :func:`drain`). Sheets render on the shared
+    pool, up to ``max_workers`` ahead of the consumer, each holding a CPU slot
+    and its memory reservation; they are yielded in order once written, so a
+    slow consumer never holds a slot.
+
+    A ``panels.json`` manifest records which photo ended up where, so a later
+    render with the same layout (Print Selected) can crop finished panels out
+    of the sheets in ``reuse_dirs`` instead of decoding and resizing the HR
+    photos again.
+
+    With ``reduced`` (the ``reduced_decode`` setting by default) photos stay
+    RGB, JPEGs are decoded at the smallest DCT scale still covering the panel
+    and LANCZOS runs after an integer reduce; only the template uses alpha.
+
+    ``image_backend`` ("pillow" or "vips", the ``image_backend`` setting by
+    default) decodes, resizes, composites and encodes; with libvips the work
+    is deferred, so it shows up in the "encode" span. For Pillow,
+    ``compositor`` ("pillow" or the opt-in "numpy", the ``compositor``
+    setting by default) picks how panels are laid onto the template; both
+    give byte-identical sheets. ``sheet_format`` ("png", "jpeg" or "tiff", the
+    ``sheet_format`` setting by default) picks the file encoding.
+    """
+    import json
+    from collections import deque
+    from concurrent.futures import wait
+    from itertools import islice
+    from PIL import Image
+    img = imaging.backend(image_backend)
+    if template_name is None:
+        template_name = current_template
+    tinfo = TEMPLATES[template_name]
+    tW, tH = tinfo["width"], tinfo["height"]
+    m_top = tinfo["margin_top"]
+    m_left = tinfo["margin_left"]
+    m_right = tinfo["margin_right"]
+    m_bottom = tinfo["margin_bottom"]
+    dpi = 300
+    px_top = int(m_top * dpi / 25.4)
+    px_left = int(m_left * dpi / 25.4)
+    px_right = int(m_right * dpi / 25.4)
+    px_bottom = int(m_bottom * dpi / 25.4)
+    px_adjust = int(position_adjustment_mm * dpi / 25.4)
+    if reduced is None:
+        reduced = settings.get("reduced_decode")
+    mode = "RGB" if reduced else "RGBA"
+    if sheet_format is None:
+        sheet_format = settings.get("sheet_format")
+    if sheet_format not in SHEET_FORMATS:
+        raise ValueError(f"Unknown sheet format {sheet_format!r}")
+    template = load_template(template_path)
+    final_photos = []
+    for p in photo_paths:
+        manual = registry.manual_crop_for(p) if registry else None
+        final_photos.append(manual or p)
+    final_photos.sort(key=sort_key_with_copies)
+    if len(final_photos) % 2 != 0:
+        final_photos.append(final_photos[-1])
+    total = len(final_photos)
+    half_w = (tW // 2) - px_left - px_right
+    av_h = tH - px_top - px_bottom
+    paste_x = px_adjust if px_adjust >= 0 else 0
+    origins = [(paste_x + px_left, px_top), (paste_x + (tW // 2) + px_left, px_top)]
+    layout = {"template": template_name, "template_file": _file_key(template_path),
+              "adjust_px": px_adjust, "panel": [half_w, av_h], "origins": origins, "mode": mode,
+              "format": sheet_format}
+    # Cropping panels back out of JPEG sheets would compress them a second time.
+    reuse = {}
+    if reuse_dirs and sheet_format != "jpeg":
+        reuse = load_panel_index(reuse_dirs, json.loads(json.dumps(layout)))
+    def panel(path, open_sheet):
+        key = _file_key(path)
+        hit = reuse.get(tuple(key)) if key else None
+        if hit:
+            sheet_path, side = hit
+            if open_sheet[0] != sheet_path:
+                with trace.span("decode", reused=True):
+                    open_sheet[:] = [sheet_path, img.open(sheet_path, mode)]
+            x, y = origins[side]
+            return img.crop(open_sheet[1], (x, y, x + half_w, y + av_h)), key
+        with trace.span("decode"):
+            im = img.open(path, mode, fit=(half_w, av_h) if reduced else None)
+        with trace.span("resize_crop"):
+            return img.cover(im, half_w, av_h, reducing_gap=2.0 if reduced else None), key
+    final_width = tW + abs(px_adjust)
+    # Panels are opaque and never overlap the other half's template, so a
+    # sheet is the template-on-white background with two rectangles copied
+    # in. The background is blended once and reused for every sheet.
+    with trace.span("composite_setup"):
+        base = Image.new(mode, (tW, tH), "white")
+        base.paste(template, (0, 0), template)
+        base.paste(template, (tW // 2, 0), template)
+        background = Image.new(mode, (final_width, tH), "white")
+        background.paste(base, (paste_x, 0))
+    np = None
+    if img.name == "pillow" and (compositor or settings.get("compositor")) == "numpy":
+        try:
+            import numpy as np
+        except ImportError:
+            logging.info("NumPy not installed, using the Pillow compositor")
+    if np is not None:
+        # Each worker thread reuses its sheet buffer, so no sheet-sized allocation per sheet.
+        with trace.span("composite_setup"):
+            background = np.asarray(background)
+        canvases = threading.local()
+        def compose(r1, r2):
+            canvas = getattr(canvases, "canvas", None)
+            if canvas is None:
+                canvas = canvases.canvas = np.empty_like(background)
+            np.copyto(canvas, background)
+            for r, (x, y) in zip((r1, r2), origins):
+                canvas[y:y + av_h, x:x + half_w] = np.asarray(r)
+            return Image.fromarray(canvas)
+    else:
+        background = img.from_pil(background)
+        def compose(r1, r2):
+            return img.composite(background, zip((r1, r2), origins))
+    mp = os.path.join(template_out_dir, PANEL_MANIFEST)
+    if os.path.exists(mp):
+        os.remove(mp)
+    # Two RGBA sheets (base and final) plus both photos decoded as RGBA with their copies.
+    bands = len(mode)
+    sheet_bytes = (tW + abs(px_adjust)) * tH * bands * 2
+    def render(i):
+        with trace.span("template_render", sheet=i // 2):
+            open_sheet = [None, None]
+            r1, k1 = panel(final_photos[i], open_sheet)
+            r2, k2 = panel(final_photos[i+1], open_sheet)
+            with trace.span("composite"):
+                final_img = compose(r1, r2)
+            outp = os.path.join(template_out_dir, f"print_{i // 2}{SHEET_FORMATS[sheet_format]}")
+            with trace.span("encode", format=sheet_format):
+                save_sheet(final_img, outp, sheet_format, dpi, backend=img)
+            return outp, [_file_key(outp), [k1, k2]]
+    sheets = {}
+    pool = resources.executor()
+    ahead = resources.max_workers()
+    starts = iter(range(0, total, 2))
+    pending = deque()
+    done = 0
+    try:
+        while True:
+            if should_stop and should_stop():
+                return False
+            for i in islice(starts, ahead - len(pending)):
+                mem = sheet_bytes + sum(decoded_bytes(p, bands=bands) for p in final_photos[i:i + 2])
+                pending.append(pool.submit(trace.call, resources.run_reserved, mem, render, i))
+            if not pending:
+                break
+            outp, entry = pending.popleft().result()
+            sheets[os.path.basename(outp)] = entry
+            done += 2
+            if progress_callback:
+                progress_callback(int(done / total * 100))
+            yield outp
+    finally:
+        for f in pending:
+            f.cancel()
+        wait(pending)
+    try:
+        with open(mp, "w") as f:
+            json.dump({"version": 1, "layout": layout, "sheets": sheets}, f)
+    except OSError as e:
+        logging.error(f"Panel manifest save error: {e}")
+    return True
+
+# -----------------------------------------------------------------------------
+#                           PROCESS FILE FUNCTION
+# -----------------------------------------------------------------------------
+def process_file(file_name, file_type, unique_id, input_dir, output_dir, registry=None, should_stop=None,
+                 source_dir=None):
+    """Make the HR and small copies of one photo or video; returns the small copy's path.
+
+    A video transcode stops early when ``should_stop`` fires and returns None.
+    ``source_dir`` is where the registry records the original when ``input_dir``
+    holds a staged copy of it.
+    """
+    with trace.span("process_file", file=file_name):
+        return _process_file(file_name, file_type, unique_id, input_dir, output_dir, registry, should_stop,
+                             source_dir)
+
+def _process_file(file_name, file_type, unique_id, input_dir, output_dir, registry=None, should_stop=None,
+                  source_dir=None):
+    input_path = os.path.join(input_dir, file_name)
+    copy_num_match = re.search(r"_copy(\d+)", file_name.lower())
+    copy_num = copy_num_match.group(1) if copy_num_match else None
+    is_photo = (file_type.upper() == "P")
+    digital_folder = os.path.join(os.path.dirname(output_dir), "digital")
+    digi_photos = os.path.join(digital_folder, "photos")
+    digi_videos = os.path.join(digital_folder, "videos")
+    os.makedirs(digi_photos, exist_ok=True)
+    os.makedirs(digi_videos, exist_ok=True)
+    if is_photo:
+        hr_filename = get_new_filename(True, unique_id, copy_num)
+        hr_path = os.path.join(digi_photos, hr_filename)
+        img = imaging.backend()
+        try:
+            with trace.span("decode"):
+                im = img.open(input_path, mode=None)
+            with trace.span("crop"):
+                auto_crop = img.crop(im, imaging.aspect_box(*img.dimensions(im), NORMAL_RATIO))
+            with trace.span("encode"):
+                img.save_jpeg(auto_crop, hr_path, 95)
+            if registry:
+                registry.register(hr_path, os.path.join(source_dir or input_dir, file_name))
+        except Exception as e:
+            logging.error(f"Photo HR error: {e}")
+            raise
+        out_path = os.path.join(output_dir, hr_filename)
+        try:
+            with trace.span("decode"):
+                mini = img.open(hr_path, mode=None)
+            with trace.span("resize"):
+                mini = img.thumbnail(mini, 1200)
+            with trace.span("encode"):
+                img.save_jpeg(mini, out_path, 85)
+        except Exception as e:
+            logging.error(f"Minimize photo error: {e}")
+            raise
+        return out_path
+    else:
+        hr_filename = get_new_filename(False, unique_id, copy_num)
+        hr_path = os.path.join(digi_videos, hr_filename)
+        try:
+            with trace.span("copy"):
+                shutil.copy(input_path, hr_path)
+        except Exception as e:
+            logging.error(f"Video copy error: {e}")
+            raise
+        out_path = os.path.join(output_dir, hr_filename)
+        try:
+            return transcode.transcode(hr_path, out_path, NORMAL_RATIO,
+                                       progress=resources.report_progress, should_stop=should_stop)
+        except Exception as e:
+            logging.error(f"Video compress error: {e}")
+            raise
+
+# -----------------------------------------------------------------------------
+#                           CUSTOM MODE PROCESSING
+# -----------------------------------------------------------------------------
+def create_custom_output_directory(event_folder, in_progress=False):
+    custom_dir = os.path.join(event_folder, "custom mode")
+    os.makedirs(custom_dir, exist_ok=True)
+    i = 1
+    while True:
+        new_dir = os.path.join(custom_dir, f"output {i} (custom)")
+        if not os.path.exists(new_dir):
+            try:
+                os.makedirs(new_dir)
+            except FileExistsError:
+                i += 1
+                continue
+            if in_progress:
+                mark_in_progress(new_dir)
+            return new_dir
+        i += 1
+
+def custom_template_path(ratio, orientation, template_path, apply_template):
+    """Template to use for a custom session; only 4:5 portrait sessions fit the DNP sheet."""
+    if abs(ratio - 0.8) < 1e-3 and orientation == "portrait" and template_path and apply_template:
+        return template_path
+    return None
+
+def process_custom_file(f, unique_id, output_directory, ratio, minimize=False, do_crop=True, registry=None,
+                        should_stop=None):
+    """Process one custom mode file; returns ``(is_photo, out_path)``, out_path None if stopped."""
+    print_dir = os.path.join(output_directory, "print")
+    if is_image_file(f):
+        img = imaging.backend()
+        new_photo_name = get_new_filename(True, unique_id)
+        hi_res_path = os.path.join(print_dir, new_photo_name)
+        try:
+            with trace.span("decode"):
+                im = img.open(f, mode=None)
+        except Exception as e:
+            raise RuntimeError(f"Failed to open image {f}: {e}")
+        if do_crop:
+            with trace.span("crop"):
+                im = img.crop(im, imaging.aspect_box(*img.dimensions(im), ratio))
+        try:
+            with trace.span("encode"):
+                img.save_jpeg(im, hi_res_path, 95)
+            if registry:
+                registry.register(hi_res_path, f)
+        except Exception as e:
+            raise RuntimeError(f"Failed to save hi-res for {f}: {e}")
+        out_path = os.path.join(output_directory, new_photo_name)
+        if minimize:
+            with trace.span("resize"):
+                mini = img.thumbnail(im, 1200)
+            with trace.span("encode"):
+                img.save_jpeg(mini, out_path, 85)
+        else:
+            with trace.span("copy"):
+                shutil.copy(hi_res_path, out_path)
+        return True, out_path
+    new_video_name = get_new_filename(False, unique_id)
+    hi_res_path = os.path.join(print_dir, new_video_name)
+    try:
+        with trace.span("copy"):
+            shutil.copy(f, hi_res_path)
+    except Exception as e:
+        raise RuntimeError(f"Failed to copy video {f}: {e}")
+    out_path = os.path.join(output_directory, new_video_name)
+    try:
+        out_path = transcode.transcode(hi_res_path, out_path, ratio,
+                                       progress=resources.report_progress, should_stop=should_stop)
+    except Exception as e:
+        raise RuntimeError(f"Video compress error {f}: {e}")
+    return False, out_path
+
+def process_custom_files(files, output_directory, ratio, minimize=False, do_crop=True,
+                         registry=None, progress_callback=None, should_stop=None):
+    """Run custom mode over ``files``; returns ``(photos, videos)`` or None if stopped."""
+    os.makedirs(os.path.join(output_directory, "print"), exist_ok=True)
+    # IDs are handed out in file order up front so naming does not depend on scheduling.
+    tasks = []
+    for f in files:
+        cost, mem = estimate_task(f)
+        tasks.append((cost, _traced_custom_file,
+                      (f, generate_unique_id(), output_directory, ratio, minimize, do_crop, registry,
+                       should_stop), mem))
+    results = resources.run_parallel(tasks, progress_callback, should_stop)
+    if results is None:
+        return None
+    photos = [out for is_photo, out in results if is_photo]
+    videos = [out for is_photo, out in results if not is_photo]
+    return photos, videos
+
+def _traced_custom_file(f, *args):
+    with trace.span("process_file", file=os.path.basename(f)):
+        return process_custom_file(f, *args)
+
+# -----------------------------------------------------------------------------
+#                           SESSION FINISHING
+# -----------------------------------------------------------------------------
+def make_duplicates(duplicates, should_stop=None):
+    """Copy each photo ``count - 1`` times as ``_copyN``; returns False if stopped."""
+    with trace.span("duplicates"):
+        for path, count in duplicates.items():
+            for i in range(count - 1):
+                cp = os.path.splitext(path)[0] + f"_copy{i+1}" + os.path.splitext(path)[1]
+                shutil.copy(path, cp)
+            if should_stop and should_stop():
+                return False
+    return True
+
+def normalize_output_photos(output_directory):
+    """Strip `` (N)`` suffixes from output photo names; returns the normalized paths."""
+    photos = [os.path.join(output_directory, f)
+              for f in os.listdir(output_directory)
+              if is_image_file(os.path.join(output_directory, f))]
+    return normalize_photo_names(photos)
+
+def normalize_photo_names(photos):
+    normalized = []
+    for mp in photos:
+        dn, fn = os.path.split(mp)
+        b, e = os.path.splitext(fn)
+        b = re.sub(r"\s*\(\d+\)$", "", b)
+        np = os.path.join(dn, b + e)
+        if np != mp:
+            os.rename(mp, np)
+        normalized.append(np)
+    return normalized
+
+def resolve_hr_photos(photo_paths, hr_folder):
+    """Prefer the HR copy in ``hr_folder`` of each photo, falling back to the photo itself."""
+    hr_list = []
+    for np in photo_paths:
+        hrp = os.path.join(hr_folder, os.path.basename(np))
+        hr_list.append(hrp if os.path.exists(hrp) else np)
+    return hr_list
+
+def count_prints(template_out):
+    if template_out and os.path.exists(template_out):
+        return len([x for x in os.listdir(template_out) if is_image_file(os.path.join(template_out, x))])
+    return 0
+
+def render_session(photo_paths, hr_folder, template_path, template_out,
+                   position_adjustment_mm=0, progress_callback=None, registry=None,
+                   template_name=None, should_stop=None, sheet_callback=None):
+    """Apply the template to a session's photos (HR copies where available).
+
+    Returns the number of sheets, or None if ``should_stop`` fired.
+    """
+    hr_list = resolve_hr_photos(photo_paths, hr_folder)
+    # The Windows print PDF is built page by page while the sheets render.
+    pdf = PdfBuilder(os.path.join(template_out, "print_session.pdf")) if sys.platform == "win32" else None
+    stream = iter_templates(hr_list, template_path, template_out,
+                            position_adjustment_mm=position_adjustment_mm,
+                            progress_callback=progress_callback,
+                            template_name=template_name,
+                            registry=registry,
+                            should_stop=should_stop)
+    if drain(stream, sheet_callback, pdf and pdf.add) is None:
+        return None
+    return count_prints(template_out)
+
+def render_selected_photos(selected_photos, copies_dict, hr_folder, template_path, tmpl_out,
+                           position_adjustment_mm=0, template_name=None, registry=None,
+                           progress_callback=None, should_stop=None, reuse_dirs=(), sheet_callback=None):
+    """Render sheets for a hand-picked selection of output photos (Print Selected).
+
+    Panels already on the sheets in ``reuse_dirs`` (normally the session's
+    template_output) are reused. Returns the sheet paths, or None if stopped.
+    """
+    photos_paths = []
+    for p in selected_photos:
+        c = copies_dict[p]
+        for i in range(c):
+            if c > 1:
+                base, ext = os.path.splitext(os.path.basename(p))
+                copy_name = f"{base}_copy{i + 1}{ext}"
+                cp = os.path.join(os.path.dirname(p), copy_name)
+                shutil.copy(p, cp)
+                photos_paths.append(cp)
+            else:
+                photos_paths.append(p)
+    try:
+        normalized = normalize_photo_names(photos_paths)
+        return apply_templates(resolve_hr_photos(normalized, hr_folder), template_path, tmpl_out,
+                               position_adjustment_mm=position_adjustment_mm,
+                               progress_callback=progress_callback,
+                               template_name=template_name,
+                               registry=registry,
+                               should_stop=should_stop,
+                               reuse_dirs=reuse_dirs,
+                               sheet_callback=sheet_callback)
+    finally:
+        for x in photos_paths:
+            if "_copy" in os.path.basename(x).lower():
+                try:
+                    os.remove(x)
+                except:
+                    pass
+
+def finish_session(event_folder, input_folder, output_directory, paired_images, template_path,
+                   position_adjustment_mm=0, registry=None, progress_callback=None, should_stop=None,
+                   sheet_callback=None):
+    """Render and record a normal session once duplicates are in place.
+
+    Returns the new session entry, or None if ``should_stop`` fired.
+    """
+    if template_path:
+        template_out = os.path.join(output_directory, "template_output")
+        os.makedirs(template_out, exist_ok=True)
+    else:
+        template_out = None
+    normalized = normalize_output_photos(output_directory)
+    if template_out:
+        if progress_callback:
+            progress_callback(0)
+        render_session(normalized, os.path.join(event_folder, "digital", "photos"),
+                       template_path, template_out,
+                       position_adjustment_mm=position_adjustment_mm,
+                       progress_callback=progress_callback, registry=registry,
+                       should_stop=should_stop, sheet_callback=sheet_callback)
+        if should_stop and should_stop():
+            return None
+    for f in os.listdir(output_directory):
+        if "_copy" in f.lower():
+            try:
+                os.remove(os.path.join(output_directory, f))
+            except:
+                pass
+    entry = session_entry(input_folder, output_directory, len(paired_images),
+                          count_prints(template_out), event_folder, False)
+    with event_lock:
+        clear_in_progress(output_directory)
+        sessions.append(entry)
+        update_event_data(event_folder)
+    return entry
+
+def finish_custom_session(event_folder, output_directory, total_count, template_path=None,
+                          position_adjustment_mm=0, registry=None, progress_callback=None,
+                          sheet_callback=None):
+    """Render (when a template is given) and record a custom mode session."""
+    template_out = None
+    if template_path:
+        template_out = os.path.join(output_directory, "template_output")
+        os.makedirs(template_out, exist_ok=True)
+    normalized = normalize_output_photos(output_directory)
+    if template_out:
+        render_session(normalized, os.path.join(output_directory, "print"),
+                       template_path, template_out,
+                       position_adjustment_mm=position_adjustment_mm,
+                       progress_callback=progress_callback, registry=registry,
+                       sheet_callback=sheet_callback)
+    entry = session_entry(output_directory, output_directory, total_count,
+                          count_prints(template_out), event_folder, True)
+    with event_lock:
+        clear_in_progress(output_directory)
+        sessions.append(entry)
+        update_event_data(event_folder)
+    return entry
+
+def open_path(path):
+    if sys.platform == "win32":
+        os.startfile(path)
+    elif sys.platform == "darwin":
+        subprocess.run(["open", path])
+    else:
+        subprocess.run(["xdg-open", path])
+
@@ -0,0 +1,364 @@
+"""Work on a local mirror of an event folder that lives on a network share.
+
+On a NAS every ``listdir``, ``exists`` and ``getsize`` of the session scan,
+the duplicates dialog and the render is a network round trip, and sheets are
+written over SMB. With staging the app works in a local mirror of the event
+(``staging_dir``, default APP_DIR/events) and an EventSync thread copies
+finished work to the share in the background:
+
+* on open, the share's top-level files (templates, ``printers.json``) are
+  pulled into the mirror when missing or newer there
+* after each session, and every ``sync_interval_s``, new and changed files
+  of the mirror are pushed; sessions still being written are left for later
+* a session folder gets its remote name when it is first pushed: the next
+  free ``output N`` on the share, so two booths on one event never write into
+  each other's sessions; the name is kept in the local folder's
+  ``.vide_remote`` marker
+* a file that exists on the share but was not pushed from this mirror (the
+  other booth wrote it) and differs in size is never overwritten; ours is
+  stored next to it as ``name (booth).ext`` and reported as a conflict
+* ``event_data.txt`` on the share is rebuilt from the share's own folders
+  after each push, so it counts both booths' sessions
+
+The photo registry holds local paths and stays with the mirror. The
+``event_staging`` setting turns staging on for network paths ("auto"),
+for every event ("always") or off ("never").
+"""
+
+import hashlib
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from vide import core, settings
+from vide.paths import APP_DIR
+
+
+MANIFEST = ".vide_sync.json"
+REMOTE_MARKER = ".vide_remote"
+# Never pushed: per-mirror state, the catalog (rebuilt on the share) and partial files.
+LOCAL_ONLY = {MANIFEST, REMOTE_MARKER, core.IN_PROGRESS_MARKER, core.DATA_FILE, "photo_registry.json"}
+PARTIAL = (".part", ".tmp")
+SESSION_DIR = re.compile(r"^output \d+( \(custom\))?$")
+NETWORK_FS = {"smbfs", "cifs", "smb3", "smb2", "nfs", "nfs4", "afpfs", "webdav", "davfs", "fuse.sshfs", "9p"}
+CHUNK = 4 * 1024 * 1024
+
+
+def _mounts():
+    """``[(mount point, file system type)]``, longest mount point first."""
+    mounts = []
+    try:
+        import psutil
+        mounts = [(p.mountpoint, p.fstype) for p in psutil.disk_partitions(all=True)]
+    except ImportError:
+        if sys.platform.startswith("linux"):
+            try:
+                with open("/proc/mounts") as f:
+                    mounts = [(l.split()[1].replace("\\040", " "), l.split()[2]) for l in f if len(l.split()) > 2]
+            except OSError:
+                pass
+        elif sys.platform == "darwin":
+            try:
+                out = subprocess.run(["mount"], capture_output=True, text=True, timeout=5).stdout
+            except (OSError, subprocess.TimeoutExpired):
+                out = ""
+            for m in re.finditer(r" on (.+) \((\w+)", out):
+                mounts.append((m.group(1), m.group(2)))
+    return sorted(mounts, key=lambda m: len(m[0]), reverse=True)
+
+
+def is_network_path(path):
+    """Whether ``path`` is on a network share (SMB, NFS, AFP, ...)."""
+    path = os.path.abspath(path)
+    if sys.platform == "win32":
+        if path.startswith("\\\\"):
+            return True
+        try:
+            import ctypes
+            return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + "\\") == 4  # DRIVE_REMOTE
+        except Exception:
+            return False
+    for mount, fstype in _mounts():
+        if path == mount or path.startswith(mount.rstrip("/") + "/"):
+            return fstype.lower() in NETWORK_FS
+    return False
+
+
+def wanted(event_folder, mode=None):
+    """Whether ``event_folder`` should be worked on through a local mirror (``event_staging`` setting)."""
+    mode = mode or settings.get("event_staging")
+    if mode == "always":
+        return True
+    if mode == "never":
+        return False
+    return is_network_path(event_folder)
+
+
+def mirror_path(remote):
+    """The persistent local mirror of the event at ``remote``."""
+    root = settings.get("staging_dir") or os.path.join(APP_DIR, "events")
+    remote = os.path.abspath(remote)
+    digest = hashlib.sha1(remote.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(root, f"{os.path.basename(remote)}-{digest}")
+
+
+def booth_name():
+    return re.sub(r"[^\w.-]+", "-", settings.get("booth_name") or platform.node() or "booth")
+
+
+class SyncStatus:
+    """A snapshot of an EventSync for the UI."""
+    def __init__(self, state="idle", files_done=0, files_total=0, bytes_done=0, bytes_total=0,
+                 conflicts=(), error=None, last_sync=None):
+        self.state = state
+        self.files_done = files_done
+        self.files_total = files_total
+        self.bytes_done = bytes_done
+        self.bytes_total = bytes_total
+        self.conflicts = list(conflicts)
+        self.error = error
+        self.last_sync = last_sync
+
+    @property
+    def pending(self):
+        return self.files_total - self.files_done
+
+    def describe(self):
+        if self.state == "syncing":
+            text = (f"Syncing to share: {self.files_done}/{self.files_total} files, "
+                    f"{self.bytes_done // 2 ** 20}/{self.bytes_total // 2 ** 20} MB")
+        elif self.state == "offline":
+            text = f"Share unreachable, will retry: {self.error}"
+        elif self.last_sync:
+            text = f"Synced to share at {time.strftime('%H:%M:%S', time.localtime(self.last_sync))}"
+        else:
+            text = "Not synced yet"
+        if self.conflicts:
+            text += f" ({len(self.conflicts)} conflict(s) kept as separate copies)"
+        return text
+
+
+class EventSync:
+    """Mirrors the event at ``remote`` into ``local`` and pushes finished work back on a thread.
+
+    ``listener(status)`` is called from the sync thread whenever the status changes.
+    """
+    def __init__(self, remote, local=None, listener=None, interval=None):
+        self.remote = os.path.abspath(remote)
+        self.local = local or mirror_path(remote)
+        self.listener = listener
+        self.interval = interval if interval is not None else settings.get("sync_interval_s")
+        self.booth = booth_name()
+        self._status = SyncStatus()
+        self._manifest = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._waiters = []
+        self._sessions = {}
+        self._thread = None
+
+    # ---- lifecycle ----------------------------------------------------------
+    def open(self):
+        """Pull the share's top-level files into the mirror and start the sync thread."""
+        os.makedirs(self.local, exist_ok=True)
+        self._load_manifest()
+        try:
+            self.pull()
+        except OSError as e:
+            logging.error(f"Event sync: could not read {self.remote}: {e}")
+            self._set(state="offline", error=str(e))
+        self._thread = threading.Thread(target=self._run, name="event-sync", daemon=True)
+        self._thread.start()
+        self._wake.set()
+        return self
+
+    def request(self):
+        """Push new work soon (after a session finished or sheets were re-rendered)."""
+        self._wake.set()
+
+    def close(self, wait=False, timeout=None):
+        """Stop after the push under way; with ``wait`` push everything pending first."""
+        if wait and self._thread:
+            self.flush(timeout)
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def flush(self, timeout=None):
+        """Wait for a push of everything written so far; returns False on timeout."""
+        done = threading.Event()
+        with self._lock:
+            self._waiters.append(done)
+        self._wake.set()
+        return done.wait(timeout)
+
+    def status(self):
+        with self._lock:
+            s = self._status
+            return SyncStatus(s.state, s.files_done, s.files_total, s.bytes_done, s.bytes_total,
+                              s.conflicts, s.error, s.last_sync)
+
+    def _set(self, **changes):
+        with self._lock:
+            for k, v in changes.items():
+                setattr(self._status, k, v)
+        if self.listener:
+            self.listener(self.status())
+
+    # ---- manifest -----------------------------------------------------------
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.local, MANIFEST)) as f:
+                self._manifest = json.load(f).get("files", {})
+        except (OSError, ValueError):
+            self._manifest = {}
+
+    def _save_manifest(self):
+        path = os.path.join(self.local, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"remote": self.remote, "files": self._manifest}, f)
+        os.replace(path + ".tmp", path)
+
+    # ---- pull ---------------------------------------------------------------
+    def pull(self):
+        """Copy the share's top-level files (templates, printers.json, the catalog for a new
+        mirror) into the mirror when missing or newer there."""
+        for name in os.listdir(self.remote):
+            src = os.path.join(self.remote, name)
+            dst = os.path.join(self.local, name)
+            if not os.path.isfile(src) or name in (MANIFEST, REMOTE_MARKER):
+                continue
+            if name == core.DATA_FILE and os.path.exists(dst):
+                continue
+            if not os.path.exists(dst) or os.path.getmtime(src) > os.path.getmtime(dst) + 1:
+                shutil.copy2(src, dst)
+                # Pulled files are the share's own; never push them back as ours.
+                self._manifest[name] = [os.path.getsize(dst), os.stat(dst).st_mtime_ns]
+        self._save_manifest()
+
+    # ---- push ---------------------------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            with self._lock:
+                waiting, self._waiters = self._waiters, []
+            try:
+                self.push()
+            except OSError as e:
+                logging.error(f"Event sync to {self.remote} failed: {e}")
+                self._set(state="offline", error=str(e))
+            for done in waiting:
+                done.set()
+
+    def _remote_session(self, local_dir):
+        """The share's folder for a local session folder, allocating a free one on first push."""
+        marker = os.path.join(local_dir, REMOTE_MARKER)
+        try:
+            with open(marker) as f:
+                rel = f.read().strip()
+            if rel:
+                return rel
+        except OSError:
+            pass
+        if local_dir.endswith("(custom)"):
+            path = core.create_custom_output_directory(self.remote)
+        else:
+            path = core.create_output_directory(self.remote)
+        rel = os.path.relpath(path, self.remote)
+        with open(marker, "w") as f:
+            f.write(rel)
+        return rel
+
+    def _plan(self):
+        """``[(local path, remote relative path, size)]`` of everything not yet on the share."""
+        plan = []
+        for root, dirs, files in os.walk(self.local):
+            dirs.sort()
+            parts = os.path.relpath(root, self.local).split(os.sep)
+            session = next((i for i, p in enumerate(parts) if SESSION_DIR.match(p)), None)
+            if session is None:
+                rel_root = os.path.join(*parts)
+            else:
+                folder = os.path.join(self.local, *parts[:session + 1])
+                if core.is_in_progress(folder):
+                    dirs[:] = []
+                    continue
+                if folder not in self._sessions:
+                    self._sessions[folder] = self._remote_session(folder)
+                rel_root = os.path.join(self._sessions[folder], *parts[session + 1:])
+            for name in sorted(files):
+                if name in LOCAL_ONLY or name.endswith(PARTIAL):
+                    continue
+                path = os.path.join(root, name)
+                rel = os.path.normpath(os.path.join(rel_root, name))
+                st = os.stat(path)
+                if self._manifest.get(rel, [None, None])[:2] != [st.st_size, st.st_mtime_ns]:
+                    plan.append((path, rel, st.st_size))
+        return plan
+
+    def push(self):
+        """Copy every new or changed file of the mirror to the share, then rebuild its catalog."""
+        # Local folders are renumbered when a session is deleted; the marker moves with them.
+        self._sessions = {}
+        plan = self._plan()
+        if not plan:
+            self._set(state="idle", error=None, last_sync=time.time(), files_done=0, files_total=0,
+                      bytes_done=0, bytes_total=0)
+            return
+        self._set(state="syncing", error=None, files_done=0, files_total=len(plan),
+                  bytes_done=0, bytes_total=sum(p[2] for p in plan))
+        done_bytes = 0
+        try:
+            for i, (path, rel, size) in enumerate(plan, start=1):
+                if self._stop.is_set():
+                    return
+                self._push_file(path, rel)
+                done_bytes += size
+                self._set(files_done=i, bytes_done=done_bytes)
+                if i % 50 == 0:
+                    self._save_manifest()
+        finally:
+            self._save_manifest()
+        template, entries = core.scan_sessions(self.remote)
+        core.write_event_data(self.remote, template, entries)
+        self._set(state="idle", last_sync=time.time())
+        logging.info(f"Event sync: pushed {len(plan)} file(s), {done_bytes // 2 ** 20} MB to {self.remote}")
+
+    def _push_file(self, path, rel):
+        st = os.stat(path)
+        known = self._manifest.get(rel)
+        # A file once kept as a conflict copy keeps going there; entry is [size, mtime_ns(, target)].
+        target = os.path.join(self.remote, known[2] if known and len(known) > 2 else rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        entry = [st.st_size, st.st_mtime_ns]
+        if known is None and os.path.exists(target):
+            if os.path.getsize(target) == st.st_size:
+                # Same name and size from the other booth or an earlier run: already there.
+                self._manifest[rel] = entry
+                return
+            stem, ext = os.path.splitext(target)
+            target = f"{stem} ({self.booth}){ext}"
+            entry.append(os.path.relpath(target, self.remote))
+            logging.error(f"Event sync conflict: {rel} differs on the share; keeping ours as "
+                          f"{os.path.basename(target)}")
+            with self._lock:
+                self._status.conflicts.append(rel)
+        tmp = target + ".part"
+        with open(path, "rb") as fi, open(tmp, "wb") as fo:
+            shutil.copyfileobj(fi, fo, CHUNK)
+        os.replace(tmp, target)
+        shutil.copystat(path, target)
+        self._manifest[rel] = entry
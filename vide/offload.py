@@ -0,0 +1,188 @@
+"""Copy a camera card to local disk before (and while) a session processes it.
+
+Pointed straight at an SD card, ingest would decode photos and copy videos
+from it with several threads at once, and card readers are slow at random,
+concurrent reads. A CardOffload instead reads the card from one thread, file
+after file in pair order, in large sequential chunks, hashing each file as it
+is read and again once it has landed, so a bad read is retried instead of
+processed. Processing of a file starts as soon as it has landed: tasks wait
+for their own file only, not for the whole card.
+
+The ``card_offload`` setting decides when a session offloads: "auto" (the
+input is on removable media), "always" or "never". Staged copies go to
+``offload_dir`` (APP_DIR/offload by default) and are removed when the session
+ends.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+
+from vide import settings, trace
+from vide.paths import APP_DIR
+
+
+CHUNK = 8 * 1024 * 1024
+# A file whose copy does not hash like the card's is read again this many times.
+ATTEMPTS = 2
+
+
+class OffloadError(Exception):
+    pass
+
+
+def staging_root():
+    return settings.get("offload_dir") or os.path.join(APP_DIR, "offload")
+
+
+def is_removable(path):
+    """Best guess whether ``path`` is on a card or USB stick rather than an internal disk."""
+    path = os.path.abspath(path)
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            drive = os.path.splitdrive(path)[0] + "\\"
+            return ctypes.windll.kernel32.GetDriveTypeW(drive) == 2  # DRIVE_REMOVABLE
+        except Exception:
+            return False
+    if sys.platform == "darwin":
+        return path.startswith("/Volumes/")
+    return path.startswith(("/media/", "/run/media/", "/mnt/"))
+
+
+def wanted(input_dir, mode=None):
+    """Whether a session reading ``input_dir`` should offload it first (``card_offload`` setting)."""
+    mode = mode or settings.get("card_offload")
+    if mode == "always":
+        return True
+    if mode == "never":
+        return False
+    return is_removable(input_dir)
+
+
+def _digest(path):
+    h = hashlib.blake2b()
+    buf = bytearray(CHUNK)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                return h.hexdigest()
+            h.update(view[:n])
+
+
+class CardOffload:
+    """Copies ``names`` from ``card_dir`` into ``dest`` on a background thread, in the given order."""
+    def __init__(self, card_dir, dest=None):
+        self.card_dir = card_dir
+        if dest is None:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            dest = os.path.join(staging_root(), f"{os.path.basename(os.path.normpath(card_dir))}-{stamp}")
+        self.dest = dest
+        self.names = []
+        self.landed = {}
+        self.error = None
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.seconds = 0.0
+        self._cancelled = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self, names):
+        seen = set()
+        self.names = [n for n in names if not (n in seen or seen.add(n))]
+        self.bytes_total = sum(os.path.getsize(os.path.join(self.card_dir, n)) for n in self.names)
+        os.makedirs(self.dest, exist_ok=True)
+        self._thread = threading.Thread(target=trace.call, args=(self._run,), name="card-offload",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        t0 = time.perf_counter()
+        try:
+            for name in self.names:
+                if self._cancelled:
+                    return
+                with trace.span("offload", file=name):
+                    digest = self._copy(name)
+                if digest is None:
+                    return
+                with self._cond:
+                    self.landed[name] = digest
+                    self._cond.notify_all()
+            logging.info(f"Offloaded {len(self.names)} file(s), {self.bytes_total // 2 ** 20} MB from "
+                         f"{self.card_dir} in {time.perf_counter() - t0:.1f} s")
+        except Exception as e:
+            logging.error(f"Card offload error: {e}")
+            with self._cond:
+                self.error = str(e)
+                self._cond.notify_all()
+        finally:
+            self.seconds = time.perf_counter() - t0
+
+    def _copy(self, name):
+        src = os.path.join(self.card_dir, name)
+        dst = os.path.join(self.dest, name)
+        tmp = dst + ".part"
+        buf = bytearray(CHUNK)
+        view = memoryview(buf)
+        for attempt in range(1, ATTEMPTS + 1):
+            h = hashlib.blake2b()
+            copied = 0
+            with open(src, "rb", buffering=0) as fi, open(tmp, "wb") as fo:
+                while True:
+                    if self._cancelled:
+                        return None
+                    n = fi.readinto(buf)
+                    if not n:
+                        break
+                    h.update(view[:n])
+                    fo.write(view[:n])
+                    copied += n
+                    with self._cond:
+                        self.bytes_done += n
+            digest = h.hexdigest()
+            if _digest(tmp) == digest:
+                os.replace(tmp, dst)
+                shutil.copystat(src, dst)
+                return digest
+            logging.error(f"Checksum mismatch copying {name} (attempt {attempt})")
+            with self._cond:
+                self.bytes_done -= copied
+        raise OffloadError(f"{name} did not copy cleanly from {self.card_dir}")
+
+    def wait(self, name, should_stop=None):
+        """Block until ``name`` has landed; returns its local path, or None if stopped or cancelled.
+        Raises OffloadError once the offload has failed."""
+        with self._cond:
+            while name not in self.landed:
+                if self.error:
+                    raise OffloadError(self.error)
+                if self._cancelled or (should_stop and should_stop()):
+                    return None
+                self._cond.wait(0.2)
+        return os.path.join(self.dest, name)
+
+    def progress(self):
+        """Share of the card's bytes copied so far, 0-1."""
+        return self.bytes_done / self.bytes_total if self.bytes_total else 1.0
+
+    def cancel(self):
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    def close(self):
+        """Stop copying and remove the staged files."""
+        self.cancel()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        shutil.rmtree(self.dest, ignore_errors=True)
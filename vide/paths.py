@@ -0,0 +1,7 @@
+"""Per-user locations for Vide state (auth cache, logs, settings)."""
+
+import os
+
+
+APP_DIR = os.environ.get("VIDE_HOME") or os.path.join(os.path.expanduser("~"), ".vide")
+LOG_DIR = os.path.join(APP_DIR, "logs")
@@ -0,0 +1,244 @@
+"""Header-only check of a card folder before a session is created.
+
+Reads every file's header (image size, EXIF orientation and capture time,
+video container, duration and creation time) on a short-lived pool of I/O
+threads, pairs the files the way :func:`core.process_directory` will and
+estimates what the session writes to
+the event folder. A run over a full card takes a second or two, so unpairable
+images, corrupt files and a full disk are reported before any work starts
+instead of failing a session halfway through.
+"""
+
+import logging
+import math
+import os
+import shutil
+import time
+
+from vide import core, imaging, offload, settings, transcode
+
+
+MB = 1024 * 1024
+
+# A truncated copy (card pulled mid-write) keeps a valid header, so images are
+# also checked for their end marker in the last few KB.
+END_MARKERS = {".jpg": b"\xff\xd9", ".jpeg": b"\xff\xd9", ".png": b"IEND"}
+TAIL_BYTES = 64 * 1024
+
+# Bytes per pixel of what a session writes, measured on booth output with some
+# headroom: the 4:5 HR copy (JPEG q95 4:4:4), the 1200 px copy (q85) and the
+# 1800x1200 print sheet in each sheet format.
+HR_BYTES_PER_PX = 0.7
+SMALL_BYTES_PER_PX = 0.3
+SMALL_SIDE = 1200
+SHEET_PIXELS = 1800 * 1200
+SHEET_BYTES_PER_PX = {"png": 1.6, "jpeg": 0.5, "tiff": 3.0}
+# The 480-line H.264 copy; the HR video is a straight copy of the original.
+SMALL_VIDEO_BYTES_PER_SEC = 250 * 1024
+# Space that should stay free after the session, for duplicates and the OS.
+FREE_HEADROOM = 512 * MB
+
+
+class FileCheck:
+    """Header facts about one input file; ``error`` is set when it cannot be read."""
+    def __init__(self, name, kind, size):
+        self.name = name
+        self.kind = kind
+        self.size = size
+        self.width = self.height = 0
+        self.orientation = 1
+        self.seconds = 0.0
+        self.taken = None
+        self.error = None
+
+    @property
+    def portrait(self):
+        w, h = (self.height, self.width) if self.orientation in (5, 6, 7, 8) else (self.width, self.height)
+        return h > w
+
+
+def check_image(path):
+    from PIL import Image
+    fc = FileCheck(os.path.basename(path), "P", os.path.getsize(path))
+    try:
+        with Image.open(path) as im:
+            fc.width, fc.height = im.size
+            exif = im.getexif()
+            fc.orientation = exif.get(0x0112, 1)
+            fc.taken = core.exif_capture_time(exif)
+        marker = END_MARKERS.get(os.path.splitext(path)[1].lower())
+        if marker:
+            with open(path, "rb") as f:
+                f.seek(max(fc.size - TAIL_BYTES, 0))
+                if marker not in f.read():
+                    fc.error = "truncated (no end of image)"
+    except Exception as e:
+        fc.error = str(e) or type(e).__name__
+    return fc
+
+
+def check_video(path):
+    fc = FileCheck(os.path.basename(path), "V", os.path.getsize(path))
+    try:
+        fc.width, fc.height, fc.seconds = transcode.info(path)
+    except transcode.TranscodeError as e:
+        fc.error = str(e)
+    fc.taken = core.video_capture_time(path)
+    return fc
+
+
+def estimate_output_bytes(checks, sheet_format=None):
+    """Bytes a session of ``checks`` (good files only) writes into the event folder."""
+    fmt = sheet_format or settings.get("sheet_format")
+    total = 0
+    photos = 0
+    for fc in checks:
+        if fc.kind == "P":
+            photos += 1
+            l, t, r, b = imaging.aspect_box(fc.width, fc.height, core.NORMAL_RATIO)
+            area = (r - l) * (b - t)
+            total += area * HR_BYTES_PER_PX
+            total += min(area, SMALL_SIDE * SMALL_SIDE * core.NORMAL_RATIO) * SMALL_BYTES_PER_PX
+        else:
+            total += fc.size + fc.seconds * SMALL_VIDEO_BYTES_PER_SEC
+    total += math.ceil(photos / 2) * SHEET_PIXELS * SHEET_BYTES_PER_PX.get(fmt, 3.0)
+    return int(total)
+
+
+class PreflightReport:
+    def __init__(self, input_dir, checks, pairs, unpaired, unused, needed, free, seconds,
+                 mode="number", gaps=None, offset=0, staging=None):
+        self.input_dir = input_dir
+        self.checks = checks
+        self.pairs = pairs
+        self.mode = mode
+        # Image -> video minus photo capture time in seconds (None: paired by number), "time" mode only.
+        self.gaps = gaps or {}
+        self.offset = offset
+        # (bytes, free bytes) of the card offload when it stages on another disk than the event.
+        self.staging = staging
+        self.unpaired = unpaired
+        self.unused = unused
+        self.needed = needed
+        self.free = free
+        self.seconds = seconds
+
+    @property
+    def corrupt(self):
+        return [fc for fc in self.checks if fc.error]
+
+    def problems(self):
+        """Reasons the session would fail; it should not be started while there are any."""
+        out = []
+        if not self.pairs:
+            out.append("No photo/video pairs found.")
+        for fc in self.corrupt:
+            out.append(f"Unreadable {'photo' if fc.kind == 'P' else 'video'} {fc.name}: {fc.error}")
+        taken = {fc.name: fc.taken for fc in self.checks}
+        for name in self.unpaired:
+            if self.mode == "time" and taken.get(name) is not None:
+                out.append(f"No video within {settings.get('pairing_tolerance_s'):g} s of {name}")
+            else:
+                out.append(f"No video for {name}")
+        if self.free is not None and self.needed > self.free:
+            out.append(f"Not enough disk space: needs about {self.needed // MB} MB, "
+                       f"{self.free // MB} MB free.")
+        if self.staging and self.staging[1] is not None and self.staging[0] > self.staging[1]:
+            out.append(f"Not enough space to copy the card: needs {self.staging[0] // MB} MB in "
+                       f"{offload.staging_root()}, {self.staging[1] // MB} MB free.")
+        return out
+
+    def warnings(self):
+        out = []
+        for name in self.unused:
+            out.append(f"Video {name} has no photo and will be skipped.")
+        if self.mode == "time":
+            by_number = sum(1 for g in self.gaps.values() if g is None)
+            if by_number:
+                out.append(f"{by_number} photo(s) have no capture time and were paired by file number.")
+            if self.offset:
+                out.append(f"Video clock is {_clock(-self.offset)} from the camera's; pairs allow for it.")
+        if self.free is not None and self.needed <= self.free < self.needed + FREE_HEADROOM:
+            out.append(f"Disk almost full: {(self.free - self.needed) // MB} MB left after this session.")
+        return out
+
+    def pairing(self):
+        """``(photo, video, gap)`` rows for the pairing report; gap is "" when paired by file number."""
+        rows = []
+        for img, vid in self.pairs:
+            gap = self.gaps.get(img)
+            rows.append((img, vid, "" if gap is None else f"{gap:+.1f} s"))
+        return rows
+
+    @property
+    def ok(self):
+        return not self.problems()
+
+    def summary(self):
+        photos = [fc for fc in self.checks if fc.kind == "P"]
+        portrait = sum(1 for fc in photos if not fc.error and fc.portrait)
+        free = f"{self.free // MB} MB free" if self.free is not None else "free space unknown"
+        return (f"{len(photos)} photo(s) ({portrait} portrait), "
+                f"{len(self.checks) - len(photos)} video(s), {len(self.pairs)} pair(s) by "
+                f"{'capture time' if self.mode == 'time' else 'file number'}. "
+                f"Output about {self.needed // MB} MB, {free}. Checked in {self.seconds:.1f} s.")
+
+
+def _clock(seconds):
+    sign = "-" if seconds < 0 else "+"
+    m = int(abs(seconds)) // 60
+    return f"{sign}{m // 60}:{m % 60:02d}"
+
+
+def _disk(path):
+    """``(free bytes, device)`` of the disk ``path`` is or will be on; free is None if unknown."""
+    # A folder that does not exist yet will be on the disk of its nearest existing parent.
+    folder = os.path.abspath(path)
+    while not os.path.isdir(folder) and os.path.dirname(folder) != folder:
+        folder = os.path.dirname(folder)
+    try:
+        return shutil.disk_usage(folder).free, os.stat(folder).st_dev
+    except OSError:
+        return None, None
+
+
+def run(input_dir, event_folder):
+    """Check ``input_dir`` for a new session of ``event_folder``; returns a PreflightReport."""
+    from concurrent.futures import ThreadPoolExecutor
+    t0 = time.perf_counter()
+    imgs, vids = core.list_media(input_dir)
+    jobs = [(check_image, f) for f in imgs] + [(check_video, f) for f in vids]
+    # Header reads wait on the disk (and ffmpeg start-up), not the CPU, and must not
+    # queue behind the memory budget of a running session, so they get their own threads.
+    with ThreadPoolExecutor(max_workers=min(32, 4 * (os.cpu_count() or 1)),
+                            thread_name_prefix="vide-preflight") as pool:
+        checks = list(pool.map(lambda j: j[0](os.path.join(input_dir, j[1])), jobs))
+    bad = {fc.name for fc in checks if fc.error}
+    good_imgs = [f for f in imgs if f not in bad]
+    good_vids = [f for f in vids if f not in bad]
+    mode = settings.get("pairing")
+    gaps, offset = {}, 0
+    if mode == "time":
+        times = {fc.name: fc.taken for fc in checks}
+        pairs, unpaired, unused, gaps, offset = core.match_by_time(good_imgs, good_vids, times)
+    else:
+        pairs, unpaired, unused = core.match_files(good_imgs, good_vids, mode="number")
+    paired = {f for pair in pairs for f in pair}
+    needed = estimate_output_bytes([fc for fc in checks if fc.name in paired])
+    free, device = _disk(event_folder)
+    staging = None
+    if offload.wanted(input_dir):
+        # The staged card lives until ingest ends, next to the output on the same disk.
+        staged = sum(fc.size for fc in checks if fc.name in paired)
+        staging_free, staging_device = _disk(offload.staging_root())
+        if staging_device == device:
+            needed += staged
+        else:
+            staging = (staged, staging_free)
+    report = PreflightReport(input_dir, checks, pairs, unpaired, unused, needed, free,
+                             time.perf_counter() - t0, mode=mode, gaps=gaps, offset=offset,
+                             staging=staging)
+    logging.info(f"Preflight {input_dir}: {report.summary()}")
+    for line in report.problems():
+        logging.info(f"Preflight: {line}")
+    return report
@@ -0,0 +1,588 @@
+"""Background print spooler that sends rendered sheets straight to a printer queue.
+
+Sheets are submitted as soon as they exist; a daemon thread hands them to a
+backend one at a time and polls the backend until each job has left the
+printer queue. Backends:
+
+* ``lp`` - CUPS ``lp``/``lpstat``/``cancel`` (Linux and macOS)
+* ``windows`` - the shell "print"/"printto" verb of the file's default app
+* ``fake`` - copies each page into a folder, for testing without a printer
+* ``viewer`` - no spooling; the old behaviour of opening the sheets for printing
+
+The backend and queue come from the ``print_backend`` and ``printer``
+settings, or from the event's ``printers.json`` when it registers several
+printers; sheets are then balanced across them.
+"""
+
+import itertools
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from vide import settings, trace
+from vide.paths import APP_DIR
+
+
+QUEUED, SENDING, PRINTING, DONE, FAILED, CANCELLED = (
+    "queued", "sending", "printing", "done", "failed", "cancelled")
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class PrintError(Exception):
+    pass
+
+
+class LpBackend:
+    name = "lp"
+
+    def __init__(self, printer=None):
+        self.printer = printer or None
+
+    def _run(self, cmd):
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise PrintError(f"{cmd[0]}: {e}")
+
+    def submit(self, path, copies, title):
+        cmd = ["lp", "-n", str(copies), "-t", title]
+        if self.printer:
+            cmd += ["-d", self.printer]
+        proc = self._run(cmd + [path])
+        m = re.search(r"request id is (\S+)", proc.stdout)
+        if proc.returncode != 0 or not m:
+            raise PrintError((proc.stderr or proc.stdout).strip() or f"lp exited with {proc.returncode}")
+        return m.group(1)
+
+    def status(self, job_id):
+        cmd = ["lpstat", "-o"] + ([self.printer] if self.printer else [])
+        proc = self._run(cmd)
+        if proc.returncode != 0:
+            raise PrintError(proc.stderr.strip() or "lpstat failed")
+        active = {line.split()[0] for line in proc.stdout.splitlines() if line.strip()}
+        return PRINTING if job_id in active else DONE
+
+    def cancel(self, job_id):
+        self._run(["cancel", job_id])
+
+
+class WindowsBackend:
+    """Prints through the file's default application; Windows reports no job status back."""
+    name = "windows"
+
+    def __init__(self, printer=None):
+        self.printer = printer or None
+
+    def submit(self, path, copies, title):
+        try:
+            for _ in range(copies):
+                if self.printer:
+                    os.startfile(path, "printto", f'"{self.printer}"')
+                else:
+                    os.startfile(path, "print")
+        except OSError as e:
+            raise PrintError(str(e))
+        return title
+
+    def status(self, job_id):
+        return DONE
+
+    def cancel(self, job_id):
+        pass
+
+
+class FakeBackend:
+    """Writes each copy into ``directory`` and reports it printing for ``seconds_per_page``.
+
+    A file named ``offline`` in the directory (all fake printers) or in the
+    printer's own subfolder makes submissions fail, which is how retry and
+    failover are exercised without a real printer.
+    """
+    name = "fake"
+
+    def __init__(self, printer=None, directory=None, seconds_per_page=None):
+        self.printer = printer or "fake"
+        self.directory = directory or settings.get("fake_printer_dir") or os.path.join(APP_DIR, "fake_printer")
+        self.seconds_per_page = (settings.get("fake_printer_seconds") if seconds_per_page is None
+                                 else seconds_per_page)
+        self._counter = itertools.count(1)
+        self._due = {}
+        self._busy_until = 0.0
+        self._lock = threading.Lock()
+
+    def submit(self, path, copies, title):
+        out = os.path.join(self.directory, self.printer)
+        os.makedirs(out, exist_ok=True)
+        if os.path.exists(os.path.join(self.directory, "offline")) or os.path.exists(os.path.join(out, "offline")):
+            raise PrintError(f"{self.printer} is offline")
+        with self._lock:
+            job_id = f"{self.printer}-{next(self._counter)}"
+            # Pages come out one after another, like a real printer.
+            self._busy_until = max(time.monotonic(), self._busy_until) + self.seconds_per_page * copies
+            self._due[job_id] = self._busy_until
+        for c in range(copies):
+            shutil.copy(path, os.path.join(out, f"{job_id}_{c + 1}_{os.path.basename(path)}"))
+        return job_id
+
+    def status(self, job_id):
+        with self._lock:
+            due = self._due.get(job_id)
+        return PRINTING if due is not None and time.monotonic() < due else DONE
+
+    def cancel(self, job_id):
+        with self._lock:
+            self._due.pop(job_id, None)
+
+
+BACKENDS = {"lp": LpBackend, "windows": WindowsBackend, "fake": FakeBackend}
+
+
+def backend_name():
+    """The configured backend, with ``auto`` resolved for this platform (``viewer`` if none fits)."""
+    name = settings.get("print_backend")
+    if name == "auto":
+        if sys.platform == "win32":
+            return "windows"
+        return "lp" if shutil.which("lp") else "viewer"
+    return name
+
+
+def make_backend(name=None, printer=None):
+    """A backend instance, or None for ``viewer`` (no spooling)."""
+    name = name or backend_name()
+    if name == "viewer":
+        return None
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown print backend {name!r}")
+    return BACKENDS[name](printer if printer is not None else settings.get("printer"))
+
+
+PRINTERS_FILE = "printers.json"
+DEFAULT_PPM = 6.0
+
+
+def load_printers(event_folder):
+    """Printers registered for an event in ``printers.json``; None when the event has none.
+
+    The file holds ``{"printers": [{"name": "DNP-1", "backend": "lp", "ppm": 7}, ...]}``;
+    ``backend`` defaults to the print_backend setting and ``ppm`` seeds the speed
+    estimate until real pages have been timed.
+    """
+    path = os.path.join(event_folder, PRINTERS_FILE) if event_folder else None
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f).get("printers", [])
+    except Exception as e:
+        logging.error(f"Could not read {path}: {e}")
+        return None
+    printers = []
+    for entry in entries:
+        try:
+            backend = make_backend(entry.get("backend") or None, entry["name"])
+        except (KeyError, ValueError) as e:
+            logging.error(f"Skipping printer {entry!r}: {e}")
+            continue
+        if backend is not None:
+            printers.append(Printer(backend, entry.get("ppm", DEFAULT_PPM)))
+    return printers or None
+
+
+def save_printers(event_folder, names, backend=None):
+    path = os.path.join(event_folder, PRINTERS_FILE)
+    entries = [{"name": n, "backend": backend} if backend else {"name": n} for n in names]
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"printers": entries}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def default_printers():
+    """The single printer from the settings, or [] for the viewer backend."""
+    backend = make_backend()
+    return [Printer(backend)] if backend else []
+
+
+class PrintJob:
+    _ids = itertools.count(1)
+
+    def __init__(self, path, copies=1, session=None, group=None):
+        self.id = next(self._ids)
+        self.path = path
+        self.copies = copies
+        self.session = session
+        # Jobs of one group (one rendered batch of sheets) go to the same printer.
+        self.group = group or os.path.dirname(path)
+        self.state = QUEUED
+        self.attempts = 0
+        self.error = ""
+        self.backend_id = None
+        self.printer = None
+        self.created = time.time()
+        self.sent = None
+        self.finished = None
+
+    @property
+    def active(self):
+        return self.state not in FINISHED
+
+    def __repr__(self):
+        return f"<PrintJob {self.id} {os.path.basename(self.path)} {self.state}>"
+
+
+class Printer:
+    """One printer queue: its backend, the jobs assigned to it and its measured speed."""
+    # Weight of the newest page time in the running seconds-per-page estimate.
+    SPEED_WEIGHT = 0.3
+
+    def __init__(self, backend, ppm=DEFAULT_PPM):
+        self.backend = backend
+        self.name = backend.printer or backend.name
+        self.seconds_per_page = 60.0 / max(float(ppm), 0.1)
+        self.queue = deque()
+        self.printing = []
+        self.enabled = True
+        self.down_until = 0.0
+        self.pages_done = 0
+        self.last_done = None
+        self.thread = None
+        self.last_poll = 0.0
+
+    @property
+    def ppm(self):
+        return 60.0 / self.seconds_per_page
+
+    @property
+    def available(self):
+        return self.enabled and time.monotonic() >= self.down_until
+
+    def pages(self):
+        return sum(j.copies for j in self.queue) + sum(j.copies for j in self.printing)
+
+    def eta(self, extra_pages=0):
+        """Seconds until this printer would finish its queue plus ``extra_pages``."""
+        return (self.pages() + extra_pages) * self.seconds_per_page
+
+    def record_done(self, jobs):
+        """Update the speed estimate from jobs seen finished in one status poll."""
+        now = time.monotonic()
+        pages = sum(j.copies for j in jobs)
+        # The printer was busy from the earlier of the first send and the previous finish.
+        start = max(min(j.sent or now for j in jobs), self.last_done or 0.0)
+        self.last_done = now
+        self.pages_done += pages
+        if pages and now > start:
+            spp = (now - start) / pages
+            self.seconds_per_page += self.SPEED_WEIGHT * (spp - self.seconds_per_page)
+
+    def describe(self):
+        state = "disabled" if not self.enabled else "ok" if self.available else "down"
+        return f"{self.name}: {state}, {self.pages()} page(s) queued, {self.ppm:.1f} ppm"
+
+
+class PrintSpooler:
+    """Spreads PrintJobs over one or more printers, each fed by its own daemon thread.
+
+    A new group of sheets goes to the printer that would finish it first given
+    its queue depth and measured pages per minute; later sheets of the group
+    follow it there so a session comes out of one printer. A job whose
+    submission fails MAX_ATTEMPTS times takes its printer down for DOWN_SECONDS
+    and moves that printer's waiting groups to the others (failover); with no
+    printer left the job fails. ``listener(job)`` is called from the spooler
+    threads on every state change.
+    """
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 2.0
+    POLL_INTERVAL = 1.0
+    DOWN_SECONDS = 60.0
+
+    def __init__(self, printers, listener=None):
+        if not isinstance(printers, (list, tuple)):
+            printers = [Printer(printers)]
+        self.printers = []
+        self.listener = listener
+        self.jobs = []
+        self._groups = {}
+        self._cond = threading.Condition()
+        self._stop = False
+        self.set_printers(printers)
+
+    @property
+    def backend(self):
+        return self.printers[0].backend if self.printers else None
+
+    def set_printers(self, printers):
+        """Use ``printers`` for new jobs; printers dropped from the list finish what they have."""
+        with self._cond:
+            by_name = {p.name: p for p in self.printers}
+            for p in printers:
+                old = by_name.pop(p.name, None)
+                if old is not None and old.backend.name == p.backend.name:
+                    old.enabled = True
+                    continue
+                self.printers.append(p)
+                if old is not None:
+                    old.enabled = False
+                if self._started():
+                    self._start_printer(p)
+            for old in by_name.values():
+                old.enabled = False
+            self._cond.notify_all()
+
+    def _started(self):
+        return any(p.thread is not None for p in self.printers)
+
+    def _start_printer(self, printer):
+        printer.thread = threading.Thread(target=self._run, args=(printer,),
+                                          name=f"print-{printer.name}", daemon=True)
+        printer.thread.start()
+
+    def start(self):
+        with self._cond:
+            self._stop = False
+            for p in self.printers:
+                if p.thread is None:
+                    self._start_printer(p)
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for p in self.printers:
+            if p.thread is not None:
+                p.thread.join(timeout=5)
+                p.thread = None
+
+    def _pick(self, group, pages, exclude=None, force=False):
+        """Printer for ``pages`` more of ``group``; caller holds the lock.
+
+        ``force`` (an operator's retry) also considers printers that are down,
+        bringing the chosen one back up.
+        """
+        current = self._groups.get(group)
+        if current is not None and current.available and current is not exclude:
+            return current
+        candidates = [p for p in self.printers if p.available and p is not exclude]
+        if not candidates and force:
+            candidates = [p for p in self.printers if p.enabled and p is not exclude]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda p: p.eta(pages))
+        best.down_until = 0.0
+        self._groups[group] = best
+        return best
+
+    def _enqueue(self, job, exclude=None, force=False):
+        """Assign and queue ``job``; caller holds the lock. Returns False if no printer is up."""
+        printer = self._pick(job.group, job.copies, exclude, force)
+        if printer is None:
+            return False
+        job.printer = printer.name
+        printer.queue.append(job)
+        self._cond.notify_all()
+        return True
+
+    def submit(self, path, copies=1, session=None, group=None):
+        job = PrintJob(path, copies, session, group)
+        with self._cond:
+            self.jobs.append(job)
+            if not self._enqueue(job):
+                job.state, job.error, job.finished = FAILED, "no printer available", time.time()
+        self._changed(job)
+        return job
+
+    def submit_folder(self, folder, session=None):
+        """Queue every sheet in ``folder`` in the order they were rendered."""
+        from vide.core import is_image_file
+        sheets = sorted((os.path.join(folder, f) for f in os.listdir(folder) if is_image_file(f)),
+                        key=os.path.getmtime)
+        return [self.submit(p, session=session) for p in sheets]
+
+    def retry(self, job):
+        with self._cond:
+            if job.active:
+                return False
+            job.state, job.error, job.attempts, job.finished = QUEUED, "", 0, None
+            if not self._enqueue(job, force=True):
+                job.state, job.error, job.finished = FAILED, "no printer available", time.time()
+        self._changed(job)
+        return True
+
+    def reprint(self, job):
+        return self.submit(job.path, job.copies, job.session, job.group)
+
+    def _printer_of(self, job):
+        for p in self.printers:
+            if job in p.queue or job in p.printing:
+                return p
+        return None
+
+    def cancel(self, job):
+        with self._cond:
+            if not job.active:
+                return False
+            printer = self._printer_of(job)
+            if printer is not None:
+                if job in printer.queue:
+                    printer.queue.remove(job)
+                if job in printer.printing:
+                    printer.printing.remove(job)
+            backend_id = job.backend_id if job.state == PRINTING else None
+            job.state, job.finished = CANCELLED, time.time()
+        if backend_id and printer is not None:
+            try:
+                printer.backend.cancel(backend_id)
+            except PrintError as e:
+                logging.error(f"Cancel print job {backend_id}: {e}")
+        self._changed(job)
+        return True
+
+    def cancel_queued(self, prefix):
+        """Cancel jobs not yet handed to a printer whose sheet lies under ``prefix``."""
+        with self._cond:
+            jobs = [j for p in self.printers for j in p.queue if j.path.startswith(prefix)]
+        for j in jobs:
+            self.cancel(j)
+        return len(jobs)
+
+    def active_jobs(self, session=None):
+        with self._cond:
+            return [j for j in self.jobs if j.active and (session is None or j.session == session)]
+
+    def wait(self, timeout=None):
+        """Block until no job is active; returns False on timeout."""
+        end = None if timeout is None else time.monotonic() + timeout
+        while self.active_jobs():
+            if end is not None and time.monotonic() > end:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _changed(self, job):
+        if self.listener:
+            try:
+                self.listener(job)
+            except Exception as e:
+                logging.error(f"Print listener error: {e}")
+
+    def _set(self, job, state, error=""):
+        with self._cond:
+            if job.state == CANCELLED:
+                return
+            job.state, job.error = state, error
+            if state in FINISHED:
+                job.finished = time.time()
+        self._changed(job)
+
+    def _run(self, printer):
+        while True:
+            with self._cond:
+                while not self._stop and not printer.queue and not printer.printing:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                job = None
+                if printer.queue and printer.available:
+                    job = printer.queue.popleft()
+                    job.state = SENDING
+                    job.attempts += 1
+            if job:
+                self._changed(job)
+                self._send(printer, job)
+            self._poll(printer)
+            with self._cond:
+                if not self._stop and (printer.printing or printer.queue) and not (
+                        printer.queue and printer.available):
+                    self._cond.wait(self.POLL_INTERVAL)
+
+    def _send(self, printer, job):
+        title = os.path.basename(job.path)
+        try:
+            with trace.span("print_submit", sheet=title, printer=printer.name):
+                job.backend_id = printer.backend.submit(job.path, job.copies, title)
+        except (PrintError, OSError) as e:
+            logging.error(f"Print {title} on {printer.name} (attempt {job.attempts}): {e}")
+            if job.attempts < self.MAX_ATTEMPTS:
+                self._set(job, QUEUED, str(e))
+                # Other jobs and printers notify the condition too; only stop or cancel end the wait early.
+                deadline = time.monotonic() + self.RETRY_DELAY
+                with self._cond:
+                    while job.state == QUEUED and not self._stop:
+                        left = deadline - time.monotonic()
+                        if left <= 0:
+                            break
+                        self._cond.wait(left)
+                    if job.state == QUEUED:
+                        printer.queue.appendleft(job)
+            else:
+                self._fail_over(printer, job, str(e))
+            return
+        job.sent = time.monotonic()
+        with self._cond:
+            if job.state == CANCELLED:
+                return
+            printer.printing.append(job)
+        self._set(job, PRINTING)
+
+    def _fail_over(self, printer, job, error):
+        """Take ``printer`` down and move ``job`` and its waiting jobs to the other printers."""
+        moved, failed = [], []
+        with self._cond:
+            printer.down_until = time.monotonic() + self.DOWN_SECONDS
+            waiting = [job] + list(printer.queue)
+            printer.queue.clear()
+            for g in [g for g, p in self._groups.items() if p is printer]:
+                del self._groups[g]
+            for j in waiting:
+                if j.state == CANCELLED:
+                    continue
+                j.attempts = 0
+                j.state = QUEUED
+                if self._enqueue(j, exclude=printer):
+                    moved.append(j)
+                else:
+                    # Nowhere to go: the failed job fails, the rest wait for the printer to return.
+                    if j is job:
+                        failed.append(j)
+                    else:
+                        printer.queue.append(j)
+        logging.warning(f"Printer {printer.name} down for {self.DOWN_SECONDS:.0f} s after: {error}; "
+                        f"moved {len(moved)} job(s) to other printers")
+        for j in failed:
+            self._set(j, FAILED, error)
+        for j in moved:
+            self._set(j, QUEUED, f"moved from {printer.name}")
+
+    def _poll(self, printer):
+        if time.monotonic() - printer.last_poll < self.POLL_INTERVAL:
+            return
+        printer.last_poll = time.monotonic()
+        with self._cond:
+            printing = list(printer.printing)
+        finished = []
+        for job in printing:
+            try:
+                state = printer.backend.status(job.backend_id)
+            except PrintError as e:
+                logging.error(f"Print status {job.backend_id}: {e}")
+                continue
+            if state != PRINTING:
+                finished.append((job, state))
+        with self._cond:
+            for job, state in finished:
+                if job in printer.printing:
+                    printer.printing.remove(job)
+            done = [job for job, state in finished if state == DONE]
+            if done:
+                printer.record_done(done)
+        for job, state in finished:
+            self._set(job, state)
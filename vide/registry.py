@@ -0,0 +1,169 @@
+"""Per-event photo registry shared by the GUI, the workers and the CLI."""
+
+import json
+import logging
+import os
+import re
+import threading
+
+from vide import trace
+
+
+class PhotoRegistry:
+    """Per-event map of processed photos: HR file, source file and manual crop.
+
+    Records are keyed by output basename (``_copy`` suffix stripped) and are
+    also indexed by HR path and source path, so every lookup is a dict hit.
+    The registry is persisted to the event folder so reopened events keep
+    their crop state; ``close()`` saves it and drops everything from memory.
+    """
+    FILE_NAME = "photo_registry.json"
+
+    def __init__(self, event_folder=None):
+        self.event_folder = event_folder
+        self._lock = threading.RLock()
+        self._records = {}
+        self._by_hr = {}
+        self._by_source = {}
+        self._dirty = False
+        if event_folder:
+            self.load()
+
+    @staticmethod
+    def key_for(path):
+        return re.sub(r"_copy\d+", "", os.path.basename(path), flags=re.IGNORECASE)
+
+    def _index(self, key, rec):
+        if rec.get("hr"):
+            self._by_hr[rec["hr"]] = key
+        if rec.get("source"):
+            self._by_source[rec["source"]] = key
+
+    def register(self, hr_path, source_path):
+        key = self.key_for(hr_path)
+        with self._lock:
+            rec = self._records.setdefault(key, {"hr": None, "source": None, "crop": None, "rect": None})
+            rec["hr"] = hr_path
+            rec["source"] = source_path
+            self._index(key, rec)
+            self._dirty = True
+
+    def find(self, output_path):
+        """Return ``(hr_path, source_path)`` for an output photo, or ``(None, None)``."""
+        with self._lock:
+            rec = self._records.get(self.key_for(output_path))
+            if not rec or not rec.get("hr"):
+                return None, None
+            return rec["hr"], rec["source"]
+
+    def hr_for_source(self, source_path):
+        with self._lock:
+            key = self._by_source.get(source_path)
+            return self._records[key]["hr"] if key else None
+
+    def manual_crop_for(self, path):
+        """Manual crop file for an HR or output path, if one was applied."""
+        with self._lock:
+            key = self._by_hr.get(path)
+            if key is None:
+                key = self.key_for(path)
+            rec = self._records.get(key)
+            if rec and rec.get("crop") and (path == rec["crop"] or path == rec.get("hr")):
+                return rec["crop"]
+            return None
+
+    def crop_rect(self, output_path):
+        with self._lock:
+            rec = self._records.get(self.key_for(output_path))
+            if rec and rec.get("crop") == output_path and rec.get("rect"):
+                return tuple(rec["rect"])
+            return None
+
+    def set_manual_crop(self, output_path, rect):
+        key = self.key_for(output_path)
+        with self._lock:
+            rec = self._records.setdefault(key, {"hr": None, "source": None, "crop": None, "rect": None})
+            rec["crop"] = output_path
+            rec["rect"] = list(rect)
+            self._dirty = True
+
+    def clear_manual_crop(self, output_path):
+        """Forget the manual crop of ``output_path``; returns the crop file it used."""
+        with self._lock:
+            rec = self._records.get(self.key_for(output_path))
+            if not rec or rec.get("crop") != output_path:
+                return None
+            crop = rec["crop"]
+            rec["crop"] = None
+            rec["rect"] = None
+            self._dirty = True
+            return crop
+
+    def _path_file(self):
+        return os.path.join(self.event_folder, self.FILE_NAME)
+
+    def _to_disk(self, p):
+        if p and os.path.isabs(p):
+            rel = os.path.relpath(p, self.event_folder)
+            if not rel.startswith(".."):
+                return rel
+        return p
+
+    def _from_disk(self, p):
+        if p and not os.path.isabs(p):
+            return os.path.join(self.event_folder, p)
+        return p
+
+    def load(self):
+        path = self._path_file()
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.error(f"Photo registry load error: {e}")
+            return
+        with self._lock:
+            for key, rec in data.get("photos", {}).items():
+                rec = {
+                    "hr": self._from_disk(rec.get("hr")),
+                    "source": self._from_disk(rec.get("source")),
+                    "crop": self._from_disk(rec.get("crop")),
+                    "rect": rec.get("rect"),
+                }
+                self._records[key] = rec
+                self._index(key, rec)
+            self._dirty = False
+
+    def save(self):
+        if not self.event_folder:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            photos = {}
+            for key, rec in self._records.items():
+                photos[key] = {
+                    "hr": self._to_disk(rec["hr"]),
+                    "source": self._to_disk(rec["source"]),
+                    "crop": self._to_disk(rec["crop"]),
+                    "rect": rec["rect"],
+                }
+            path = self._path_file()
+            tmp = path + ".tmp"
+            try:
+                with trace.span("catalog_update", what="registry"):
+                    with open(tmp, "w") as f:
+                        json.dump({"version": 1, "photos": photos}, f)
+                    os.replace(tmp, path)
+                self._dirty = False
+            except Exception as e:
+                logging.error(f"Photo registry save error: {e}")
+
+    def close(self):
+        self.save()
+        with self._lock:
+            self._records.clear()
+            self._by_hr.clear()
+            self._by_source.clear()
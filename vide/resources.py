@@ -0,0 +1,308 @@
+"""CPU and memory limits shared by every job running in this process.
+
+Photo/video tasks of all sessions run on one thread pool, and each unit of
+CPU-heavy work (a process_file task, a template sheet) holds a slot of one
+semaphore of the same size. So two sessions running at once, one ingesting
+and one rendering, together never use more than ``max_workers`` cores.
+
+Each unit also reserves its estimated decoded-image footprint from one
+MemoryBudget before it starts, so a batch of 45 MP photos cannot have every
+worker holding full-resolution buffers at once and push the machine into swap.
+"""
+
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+from vide import calibrate, settings, trace
+
+
+_lock = threading.Lock()
+_executor = None
+_slots = None
+
+
+def max_workers():
+    """The ``max_workers`` setting, else the calibrated count, else one per CPU."""
+    n = settings.get("max_workers")
+    if n > 0:
+        return n
+    profile = calibrate.load()
+    return profile["workers"] if profile else (os.cpu_count() or 1)
+
+
+def _ensure():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            n = max_workers()
+            _slots = threading.BoundedSemaphore(n)
+            _executor = ThreadPoolExecutor(max_workers=n, thread_name_prefix="vide-worker")
+    return _executor
+
+
+def executor():
+    """The process-wide pool for photo/video tasks."""
+    return _ensure()
+
+
+def prestart():
+    """Start every pool thread now, so the first task of a session does not wait for one."""
+    pool = _ensure()
+    n = max_workers()
+    # Each call parks a thread until n are running; a busy pool just breaks the barrier.
+    barrier = threading.Barrier(n, timeout=2)
+    def park():
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+    for _ in range(n):
+        pool.submit(park)
+
+
+_interactive = None
+INTERACTIVE_WORKERS = 4
+
+
+def interactive():
+    """A few threads for short work the GUI waits on (dialog thumbnails). Session tasks can
+    hold every thread of the shared pool while they wait for memory, so this never queues
+    behind them."""
+    global _interactive
+    with _lock:
+        if _interactive is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _interactive = ThreadPoolExecutor(max_workers=min(INTERACTIVE_WORKERS, os.cpu_count() or 1),
+                                              thread_name_prefix="vide-interactive")
+    return _interactive
+
+
+@contextmanager
+def cpu_slot():
+    """Hold one of the shared CPU slots for the enclosed work."""
+    _ensure()
+    _slots.acquire()
+    try:
+        yield
+    finally:
+        _slots.release()
+
+
+def run_in_slot(fn, *args, **kwargs):
+    with cpu_slot():
+        return fn(*args, **kwargs)
+
+
+# -----------------------------------------------------------------------------
+#                           MEMORY BUDGET
+# -----------------------------------------------------------------------------
+MB = 1024 * 1024
+
+
+def total_memory():
+    try:
+        import psutil
+        return psutil.virtual_memory().total
+    except ImportError:
+        pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return 8 * 1024 * MB
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None if it cannot be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+    return None
+
+
+class MemoryBudget:
+    """Admits work while the sum of its estimated footprints fits under ``limit`` bytes.
+
+    A reservation larger than the whole budget is still admitted once nothing
+    else is running, so an oversized photo is processed alone rather than never.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        self.waits = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes):
+        nbytes = max(int(nbytes), 0)
+        with self._cond:
+            if self.used and self.used + nbytes > self.limit:
+                self.waits += 1
+                with trace.span("memory_wait", mb=nbytes // MB):
+                    while self.used and self.used + nbytes > self.limit:
+                        self._cond.wait()
+            self.used += nbytes
+            self.peak = max(self.peak, self.used)
+        return nbytes
+
+    def release(self, nbytes):
+        with self._cond:
+            self.used -= nbytes
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, nbytes):
+        n = self.acquire(nbytes)
+        try:
+            yield
+        finally:
+            self.release(n)
+
+
+_budget = None
+
+
+def memory_budget():
+    """The process-wide MemoryBudget; ``memory_budget_mb`` setting, default half of RAM."""
+    global _budget
+    with _lock:
+        if _budget is None:
+            mb = settings.get("memory_budget_mb")
+            limit = mb * MB if mb > 0 else total_memory() // 2
+            _budget = MemoryBudget(limit)
+            logging.info(f"Memory budget {limit // MB} MB")
+    return _budget
+
+
+def run_reserved(nbytes, fn, *args, **kwargs):
+    """Run ``fn`` once ``nbytes`` fit in the memory budget, holding a CPU slot."""
+    with memory_budget().reserve(nbytes), cpu_slot():
+        return fn(*args, **kwargs)
+
+
+class RssMonitor:
+    """Samples this process's RSS and the budget in use on a daemon thread, keeping peaks for one session."""
+    def __init__(self, name, interval=0.25):
+        self.name = name
+        self.interval = interval
+        self.peak = 0
+        self.peak_reserved = 0
+        self._waits = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._waits = memory_budget().waits
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="rss-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        rss = current_rss()
+        if rss and rss > self.peak:
+            self.peak = rss
+        self.peak_reserved = max(self.peak_reserved, memory_budget().used)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def stop(self):
+        """Stop sampling and log the session's peaks; returns peak RSS in bytes (0 if unknown)."""
+        if self._thread is None:
+            return self.peak
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+        self._sample()
+        budget = memory_budget()
+        rss = f"{self.peak // MB} MB" if self.peak else "unknown"
+        logging.info(f"{self.name}: peak RSS {rss}, peak reserved {self.peak_reserved // MB} of "
+                     f"{budget.limit // MB} MB budget, {budget.waits - self._waits} task(s) waited for memory")
+        return self.peak
+
+
+_task = threading.local()
+
+
+def report_progress(fraction):
+    """Called from inside a :func:`run_parallel` task with how far along it is (0-1), so a long
+    video moves the bar while it runs. A no-op anywhere else."""
+    share = getattr(_task, "share", None)
+    if share is not None:
+        share[0] = fraction
+
+
+def _run_task(share, nbytes, ready, fn, *args):
+    if ready and not ready():
+        return None
+    if callable(nbytes):
+        nbytes = nbytes()
+    _task.share = share
+    try:
+        return run_reserved(nbytes, fn, *args)
+    finally:
+        _task.share = None
+
+
+def run_parallel(tasks, progress_callback=None, should_stop=None):
+    """Run ``(cost, fn, args[, mem_bytes[, ready]])`` tasks on the shared pool; returns results in task order.
+
+    Progress is reported as the share of total ``cost`` finished, so one long
+    video moves the bar more than a small photo; running tasks add the part
+    they passed to :func:`report_progress`. Returns None if
+    ``should_stop`` fires; the first task error is re-raised. In both cases
+    remaining tasks are cancelled and running ones waited for first. Each task
+    waits for ``mem_bytes`` of the memory budget before it takes a CPU slot.
+    ``ready()``, if given, is called before either; it may block until the
+    task's input exists, and a false return skips the task (its result is None).
+    ``mem_bytes`` may be a callable, evaluated after ``ready()``, when the
+    estimate needs that input.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+    pool = executor()
+    shares = [[0.0] for _ in tasks]
+    futures = [pool.submit(trace.call, _run_task, share, t[3] if len(t) > 3 else 0,
+                           t[4] if len(t) > 4 else None, t[1], *t[2])
+               for t, share in zip(tasks, shares)]
+    cost_of = {f: max(t[0], 0) for f, t in zip(futures, tasks)}
+    share_of = dict(zip(futures, shares))
+    total = sum(cost_of.values()) or 1
+    done_cost = 0
+    reported = -1
+    pending = set(futures)
+    def abort():
+        for f in futures:
+            f.cancel()
+        wait(futures)
+    while pending:
+        if should_stop and should_stop():
+            abort()
+            return None
+        finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+        for f in finished:
+            try:
+                f.result()
+            except Exception:
+                abort()
+                raise
+            done_cost += cost_of[f]
+        if progress_callback:
+            running = sum(cost_of[f] * min(share_of[f][0], 1.0) for f in pending)
+            percent = int((done_cost + running) / total * 100)
+            if percent != reported:
+                reported = percent
+                progress_callback(percent)
+    return [f.result() for f in futures]
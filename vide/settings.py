@@ -0,0 +1,139 @@
+"""User settings stored as JSON in APP_DIR/settings.json.
+
+Every key can be overridden from the environment as ``VIDE_<KEY>`` (upper
+case), which is how support asks an operator to switch something on for one
+launch without touching the file.
+"""
+
+import json
+import logging
+import os
+import threading
+
+from vide.paths import APP_DIR
+
+
+SETTINGS_FILE = os.path.join(APP_DIR, "settings.json")
+
+DEFAULTS = {
+    # Record per-stage timing spans and write a trace per session.
+    "trace": False,
+    # Run the whole session under cProfile (implies a trace directory).
+    "profile": False,
+    # Where traces and profiles go; empty means APP_DIR/traces.
+    "trace_dir": "",
+    # Cores shared by all running sessions; 0 means the calibrated count (else one per CPU).
+    "max_workers": 0,
+    # Ceiling for the estimated decoded-image memory of running tasks; 0 means half of RAM.
+    "memory_budget_mb": 0,
+    # Image library for decode/crop/resize/encode: "pillow" or "vips" (pyvips, optional; falls back to Pillow).
+    "image_backend": "pillow",
+    # Video transcoder: "ffmpeg" (the executable) or "pyav" (in-process, optional; falls back to ffmpeg).
+    "transcoder": "ffmpeg",
+    # libx264 preset of the small videos; empty means the calibrated tier (else "medium").
+    "x264_preset": "",
+    # Measure the machine in the background on first launch to pick workers and the x264 preset.
+    "auto_calibrate": True,
+    # Seconds a 20-pair session should take; calibration picks a faster preset to stay under it.
+    "target_session_s": 120.0,
+    # How photos find their video: "number" (file names) or "time" (capture time in the headers).
+    "pairing": "number",
+    # Largest gap between a photo's and its video's capture time in "time" pairing, in seconds.
+    "pairing_tolerance_s": 30.0,
+    # Copy the card to local disk before processing it: "auto" (input on removable media), "always", "never".
+    "card_offload": "auto",
+    # Where offloaded cards are staged while a session ingests them; empty means APP_DIR/offload.
+    "offload_dir": "",
+    # Work on events through a local mirror synced back in the background: "auto" (event on a
+    # network share), "always", "never".
+    "event_staging": "auto",
+    # Where mirrors of network events are kept; empty means APP_DIR/events.
+    "staging_dir": "",
+    # Seconds between background syncs of a mirrored event (sessions also sync as they finish).
+    "sync_interval_s": 60.0,
+    # Name of this booth in conflict copies on a shared event; empty means the computer's name.
+    "booth_name": "",
+    # Check a card's files and the free disk space before a session starts.
+    "preflight": True,
+    # Render print sheets in RGB from reduced-size JPEG decodes (False: legacy full-size RGBA).
+    "reduced_decode": True,
+    # How panels are laid onto the template: "pillow" or "numpy" (opt-in, needs NumPy;
+    # byte-identical sheets but slower than Pillow's paste onto the shared background).
+    "compositor": "pillow",
+    # Print sheet encoding: "png", "jpeg" (4:4:4) or "tiff" (uncompressed).
+    "sheet_format": "png",
+    # zlib level for PNG sheets, 0-9.
+    "png_compress_level": 1,
+    # Quality for JPEG sheets.
+    "jpeg_quality": 95,
+    # Where sheets are printed: "auto" (lp, or the Windows print verb), "lp", "windows",
+    # "fake" (a folder, for testing) or "viewer" (open the sheets for printing by hand).
+    "print_backend": "auto",
+    # Printer queue name; empty means the system default printer.
+    "printer": "",
+    # Send each sheet of a new session to the printer as soon as it is rendered.
+    "auto_print": False,
+    # Output folder and seconds per page of the fake printer; empty folder means APP_DIR/fake_printer.
+    "fake_printer_dir": "",
+    "fake_printer_seconds": 2.0,
+    # Log the GUI thread's stack when the event loop is blocked this long; 0 disables.
+    "stall_threshold_ms": 500,
+}
+
+_lock = threading.Lock()
+_values = None
+
+
+def _coerce(value, default):
+    if isinstance(default, bool):
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+
+def load():
+    global _values
+    with _lock:
+        values = {}
+        if os.path.exists(SETTINGS_FILE):
+            try:
+                with open(SETTINGS_FILE, "r") as f:
+                    values = json.load(f)
+            except Exception as e:
+                logging.error(f"Could not read {SETTINGS_FILE}: {e}")
+        _values = values
+    return values
+
+
+def get(key):
+    default = DEFAULTS[key]
+    env = os.environ.get(f"VIDE_{key.upper()}")
+    if env is not None:
+        try:
+            return _coerce(env, default)
+        except ValueError:
+            logging.error(f"Ignoring invalid VIDE_{key.upper()}={env!r}")
+    values = _values if _values is not None else load()
+    if key in values:
+        try:
+            return _coerce(values[key], default)
+        except (TypeError, ValueError):
+            logging.error(f"Ignoring invalid setting {key}={values[key]!r}")
+    return default
+
+
+def set(key, value):
+    """Persist ``key`` to the settings file (environment overrides still win)."""
+    if key not in DEFAULTS:
+        raise KeyError(key)
+    values = dict(_values if _values is not None else load())
+    values[key] = value
+    os.makedirs(APP_DIR, exist_ok=True)
+    tmp = SETTINGS_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(values, f, indent=2)
+    os.replace(tmp, SETTINGS_FILE)
+    load()
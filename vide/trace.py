@@ -0,0 +1,227 @@
+"""Per-stage timing spans for a processing session.
+
+Pipeline code wraps its stages in ``with trace.span("decode"):``. While no
+session is being traced ``span`` returns a shared no-op object, so the cost
+of leaving the calls in is one global lookup.
+
+A traced session writes, to ``settings.get("trace_dir")`` or APP_DIR/traces:
+
+* ``<stamp>_<name>.trace.json`` - Chrome trace-event JSON (chrome://tracing, Perfetto)
+* ``<stamp>_<name>.summary.txt`` - count/total/mean/p95/max per stage
+* ``<stamp>_<name>.prof`` and ``.profile.txt`` - cProfile output, if profiling was on
+
+Tracing is switched on with the ``trace`` setting (``VIDE_TRACE=1``) and
+profiling with ``profile`` (``VIDE_PROFILE=1``).
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from vide import settings
+from vide.paths import APP_DIR
+
+
+_active = None
+_lock = threading.Lock()
+
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "args", "t0")
+    def __init__(self, recorder, name, args):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, self.t0, time.perf_counter_ns(), self.args)
+        return False
+
+
+def span(name, **args):
+    """Time the enclosed block as stage ``name`` (no-op unless a session is traced)."""
+    rec = _active
+    if rec is None:
+        return _NULL
+    return _Span(rec, name, args)
+
+
+def enabled():
+    return _active is not None
+
+
+class Recorder:
+    def __init__(self, name, profile=False):
+        self.name = name
+        self.profile = profile
+        self.started = datetime.now()
+        self.t0 = time.perf_counter_ns()
+        self.events = []
+        self.threads = {}
+        self.profiles = []
+        self._lock = threading.Lock()
+        self._session_profile = None
+        self._depth = 1
+
+    def add(self, name, t0, t1, args):
+        th = threading.current_thread()
+        with self._lock:
+            self.threads[th.ident] = th.name
+            self.events.append((name, t0, t1, th.ident, args))
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+                  for tid, tname in self.threads.items()]
+        for name, t0, t1, tid, args in self.events:
+            ev = {"name": name, "cat": "vide", "ph": "X", "pid": pid, "tid": tid,
+                  "ts": (t0 - self.t0) / 1000, "dur": (t1 - t0) / 1000}
+            if args:
+                ev["args"] = {k: str(v) for k, v in args.items()}
+            events.append(ev)
+        return {"traceEvents": events, "displayTimeUnit": "ms",
+                "otherData": {"session": self.name, "started": self.started.isoformat(timespec="seconds")}}
+
+    def summary(self):
+        """Rows of (stage, count, total_ms, mean_ms, p95_ms, max_ms), slowest total first."""
+        by_name = {}
+        for name, t0, t1, _tid, _args in self.events:
+            by_name.setdefault(name, []).append((t1 - t0) / 1e6)
+        rows = []
+        for name, durs in by_name.items():
+            durs.sort()
+            p95 = durs[min(len(durs) - 1, int(round(0.95 * (len(durs) - 1))))]
+            rows.append((name, len(durs), sum(durs), sum(durs) / len(durs), p95, durs[-1]))
+        rows.sort(key=lambda r: r[2], reverse=True)
+        return rows
+
+    def summary_table(self):
+        lines = [f"Session: {self.name}",
+                 f"{'stage':<22}{'count':>7}{'total ms':>12}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name, count, total, mean, p95, mx in self.summary():
+            lines.append(f"{name:<22}{count:>7}{total:>12.1f}{mean:>10.1f}{p95:>10.1f}{mx:>10.1f}")
+        return "\n".join(lines)
+
+    def write(self, directory=None):
+        directory = directory or settings.get("trace_dir") or os.path.join(APP_DIR, "traces")
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.name).strip("_") or "session"
+        base = os.path.join(directory, f"{self.started:%Y%m%d_%H%M%S}_{slug}")
+        with open(base + ".trace.json", "w") as f:
+            json.dump(self.chrome_trace(), f)
+        table = self.summary_table()
+        with open(base + ".summary.txt", "w") as f:
+            f.write(table + "\n")
+        if self.profiles:
+            import io
+            import pstats
+            out = io.StringIO()
+            stats = pstats.Stats(*self.profiles, stream=out)
+            stats.dump_stats(base + ".prof")
+            stats.sort_stats("cumulative").print_stats(60)
+            with open(base + ".profile.txt", "w") as f:
+                f.write(out.getvalue())
+        logging.info(f"Trace written to {base}.trace.json\n{table}")
+        return base
+
+
+def _profile_enable():
+    import cProfile
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError:
+        # Another profiler already owns this thread (or, on 3.12+, the interpreter).
+        return None
+    return prof
+
+
+def start(name, profile=None, enabled=None):
+    """Begin tracing a session; returns its Recorder, or None when tracing is off.
+
+    ``profile`` and ``enabled`` default to the ``profile`` and ``trace``
+    settings. Sessions that start while another is traced (a custom session
+    during a normal one, say) are folded into the running trace.
+    """
+    global _active
+    if profile is None:
+        profile = settings.get("profile")
+    if enabled is None:
+        enabled = settings.get("trace")
+    if not (profile or enabled):
+        return None
+    with _lock:
+        if _active is not None:
+            _active._depth += 1
+            return _active
+        rec = Recorder(name, profile)
+        _active = rec
+    if profile:
+        rec._session_profile = _profile_enable()
+        if rec._session_profile:
+            rec.profiles.append(rec._session_profile)
+    return rec
+
+
+def stop(rec, directory=None):
+    """End a session started with :func:`start` and write its files. Safe to call with None or twice."""
+    global _active
+    if rec is None:
+        return None
+    with _lock:
+        if _active is not rec:
+            return None
+        rec._depth -= 1
+        if rec._depth > 0:
+            return None
+        _active = None
+    if rec._session_profile:
+        rec._session_profile.disable()
+    try:
+        return rec.write(directory)
+    except Exception as e:
+        logging.error(f"Could not write trace: {e}")
+        return None
+
+
+@contextmanager
+def session(name, profile=None, directory=None, enabled=None):
+    rec = start(name, profile, enabled)
+    try:
+        with span("session", session=name):
+            yield rec
+    finally:
+        stop(rec, directory)
+
+
+def call(fn, *args, **kwargs):
+    """Run ``fn`` (typically an executor task) under cProfile when the session is profiled."""
+    rec = _active
+    if rec is None or not rec.profile:
+        return fn(*args, **kwargs)
+    prof = _profile_enable()
+    if prof is None:
+        return fn(*args, **kwargs)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        prof.disable()
+        with rec._lock:
+            rec.profiles.append(prof)
@@ -0,0 +1,282 @@
+"""Video transcoding for the session's small videos.
+
+Every video is cropped to the session's aspect ratio around the centre,
+scaled to 480 lines and encoded as H.264 (CRF 23) with AAC audio. The x264
+preset is the ``x264_preset`` setting, else the tier :mod:`vide.calibrate`
+chose for this machine, else ``medium``. Backends:
+
+* ``ffmpeg`` - the default; runs the ``ffmpeg`` executable, reading its
+  ``-progress`` output for the time encoded so far
+* ``pyav`` - in-process through the optional ``av`` package (PyAV): no
+  process start per video and progress counted in decoded frames
+
+Both report progress as a 0-1 fraction and stop within a frame or a progress
+tick once ``should_stop`` returns true, removing the partial output. The
+``transcoder`` setting picks one; "pyav" falls back to ffmpeg with a log
+line when PyAV is not installed.
+"""
+
+import logging
+import os
+import re
+import subprocess
+import threading
+from collections import deque
+from fractions import Fraction
+
+from vide import calibrate, settings, trace
+
+
+HEIGHT = 480
+CRF = 23
+PRESET = "medium"
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def crop_box(w, h, ratio):
+    """Centred ``(width, height, x, y)`` crop of a ``w`` x ``h`` frame to ``ratio``, as ffmpeg's crop evaluates it."""
+    ratio = float(f"{ratio:.6f}")
+    if w / h > ratio:
+        cw, ch = int(h * ratio), h
+    else:
+        cw, ch = w, int(w / ratio)
+    return cw, ch, (w - cw) // 2, (h - ch) // 2
+
+
+def crop_filter(ratio):
+    """ffmpeg ``crop`` filter cropping any input to ``ratio`` around the centre."""
+    r = f"{ratio:.6f}"
+    return (
+        f"crop=if(gt(iw/ih\\,{r})\\,ih*{r}\\,iw):"
+        f"if(gt(iw/ih\\,{r})\\,ih\\,iw/{r}):"
+        f"(iw-if(gt(iw/ih\\,{r})\\,ih*{r}\\,iw))/2:"
+        f"(ih-if(gt(iw/ih\\,{r})\\,ih\\,iw/{r}))/2"
+    )
+
+
+def preset():
+    """The libx264 preset to encode with (see the module docstring)."""
+    profile = calibrate.load()
+    return settings.get("x264_preset") or (profile and profile.get("x264_preset")) or PRESET
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _seconds(h, m, s):
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+class FfmpegTranscoder:
+    name = "ffmpeg"
+    DURATION = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+    VIDEO = re.compile(r"Stream #.*?: Video: .*?, (\d{2,5})x(\d{2,5})")
+
+    def info(self, src):
+        """``(width, height, seconds)`` of ``src`` from its container header; raises TranscodeError
+        when ffmpeg cannot open it or it has no video stream."""
+        try:
+            proc = subprocess.run(["ffmpeg", "-hide_banner", "-nostdin", "-i", src],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                  errors="replace", timeout=30)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise TranscodeError(f"Could not run ffmpeg: {e}")
+        # Without an output ffmpeg always exits with 1; an unreadable input names the error last.
+        video = self.VIDEO.search(proc.stderr)
+        if not video:
+            lines = [l for l in proc.stderr.splitlines() if l.strip()]
+            raise TranscodeError(lines[-1] if lines else "no video stream")
+        duration = self.DURATION.search(proc.stderr)
+        return int(video.group(1)), int(video.group(2)), _seconds(*duration.groups()) if duration else 0.0
+
+    def transcode(self, src, dst, ratio, progress=None, should_stop=None, x264_preset=None):
+        """Transcode ``src`` to ``dst``; returns ``dst``, or None if stopped."""
+        cmd = ["ffmpeg", "-hide_banner", "-nostdin", "-i", src,
+               "-vf", f"{crop_filter(ratio)},scale=-2:{HEIGHT}",
+               "-vcodec", "libx264", "-crf", str(CRF), "-preset", x264_preset or preset(),
+               "-acodec", "aac",
+               "-progress", "pipe:1", "-nostats",
+               dst]
+        try:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                    errors="replace")
+        except OSError as e:
+            raise TranscodeError(f"Could not run ffmpeg: {e}")
+        log = deque(maxlen=20)
+        duration = [0]
+        def read_stderr():
+            for line in proc.stderr:
+                log.append(line.rstrip())
+                m = not duration[0] and self.DURATION.search(line)
+                if m:
+                    duration[0] = _seconds(*m.groups()) * 1e6
+        reader = threading.Thread(target=read_stderr, name="ffmpeg-stderr", daemon=True)
+        reader.start()
+        # ffmpeg writes a block of key=value lines about twice a second.
+        for line in proc.stdout:
+            if should_stop and should_stop():
+                proc.kill()
+                proc.wait()
+                reader.join()
+                _remove(dst)
+                return None
+            if progress and duration[0] and line.startswith("out_time_us="):
+                try:
+                    progress(min(int(line.split("=", 1)[1]) / duration[0], 1.0))
+                except ValueError:
+                    pass
+        code = proc.wait()
+        reader.join()
+        if code:
+            _remove(dst)
+            raise TranscodeError(f"ffmpeg exited with {code}: " + " / ".join(list(log)[-3:]))
+        return dst
+
+
+class PyAvTranscoder:
+    name = "pyav"
+
+    def __init__(self):
+        import av
+        self.av = av
+
+    def info(self, src):
+        """``(width, height, seconds)`` of ``src`` from its container header; raises TranscodeError."""
+        try:
+            with self.av.open(src) as inp:
+                if not inp.streams.video:
+                    raise TranscodeError("no video stream")
+                vin = inp.streams.video[0]
+                return vin.codec_context.width, vin.codec_context.height, (inp.duration or 0) / 1e6
+        except self.av.FFmpegError as e:
+            raise TranscodeError(str(e))
+
+    def probe(self, src):
+        """``(width, height, rotation, frames)`` of the first video stream; rotation is clockwise
+        degrees as ffmpeg applies it, frames an estimate when the container has no count."""
+        with self.av.open(src) as inp:
+            vin = inp.streams.video[0]
+            frames = vin.frames
+            if not frames and vin.duration and vin.average_rate:
+                frames = int(vin.duration * vin.time_base * vin.average_rate)
+            elif not frames and inp.duration and vin.average_rate:
+                frames = int(inp.duration / 1e6 * vin.average_rate)
+            rotation = 0
+            for frame in inp.decode(vin):
+                rotation = -round(frame.rotation) % 360
+                break
+            return vin.codec_context.width, vin.codec_context.height, rotation, frames
+
+    def _video_graph(self, vin, width, height, rotation, ratio):
+        """Filters matching ffmpeg's autorotate, crop and scale=-2:480; returns (graph, out_w, out_h)."""
+        graph = self.av.filter.Graph()
+        chain = [graph.add_buffer(template=vin)]
+        if rotation == 90:
+            chain.append(graph.add("transpose", "clock"))
+        elif rotation == 270:
+            chain.append(graph.add("transpose", "cclock"))
+        elif rotation == 180:
+            chain += [graph.add("hflip"), graph.add("vflip")]
+        if rotation in (90, 270):
+            width, height = height, width
+        cw, ch, x, y = crop_box(width, height, ratio)
+        # scale=-2:480 rounds the width to the nearest pixel, then down to even.
+        out_w = max(2, round(cw * HEIGHT / ch) // 2 * 2)
+        chain.append(graph.add("crop", f"{cw}:{ch}:{x}:{y}"))
+        chain.append(graph.add("scale", f"{out_w}:{HEIGHT}"))
+        chain.append(graph.add("format", "yuv420p"))
+        chain.append(graph.add("buffersink"))
+        for a, b in zip(chain, chain[1:]):
+            a.link_to(b)
+        graph.configure()
+        return graph, out_w, HEIGHT
+
+    def transcode(self, src, dst, ratio, progress=None, should_stop=None, x264_preset=None):
+        """Transcode ``src`` to ``dst``; returns ``dst``, or None if stopped."""
+        av = self.av
+        try:
+            width, height, rotation, total = self.probe(src)
+            with av.open(src) as inp, av.open(dst, "w") as out:
+                vin = inp.streams.video[0]
+                vin.thread_type = "AUTO"
+                ain = inp.streams.audio[0] if inp.streams.audio else None
+                graph, out_w, out_h = self._video_graph(vin, width, height, rotation, ratio)
+                rate = vin.average_rate or Fraction(30)
+                options = {"crf": str(CRF), "preset": x264_preset or preset()}
+                vout = out.add_stream("libx264", rate=rate, options=options)
+                vout.width, vout.height, vout.pix_fmt = out_w, out_h, "yuv420p"
+                aout = out.add_stream("aac", rate=ain.rate, layout=ain.layout.name) if ain else None
+                done = 0
+                for packet in inp.demux([s for s in (vin, ain) if s]):
+                    if should_stop and should_stop():
+                        break
+                    for frame in packet.decode():
+                        if packet.stream is vin:
+                            graph.push(frame)
+                            while True:
+                                try:
+                                    out.mux(vout.encode(graph.pull()))
+                                except (av.BlockingIOError, av.EOFError):
+                                    break
+                            done += 1
+                            if progress and total:
+                                progress(min(done / total, 1.0))
+                        else:
+                            frame.pts = None
+                            out.mux(aout.encode(frame))
+                else:
+                    out.mux(vout.encode())
+                    if aout:
+                        out.mux(aout.encode())
+                    return dst
+        except av.FFmpegError as e:
+            _remove(dst)
+            raise TranscodeError(f"{os.path.basename(src)}: {e}")
+        _remove(dst)
+        return None
+
+
+BACKENDS = {"ffmpeg": FfmpegTranscoder, "pyav": PyAvTranscoder}
+
+_lock = threading.Lock()
+_backends = {}
+
+
+def backend(name=None):
+    """The shared transcoder ``name`` (default: the ``transcoder`` setting), ffmpeg if it cannot load."""
+    name = name or settings.get("transcoder")
+    if name not in BACKENDS:
+        logging.error(f"Unknown transcoder {name!r}, using ffmpeg")
+        name = "ffmpeg"
+    with _lock:
+        if name not in _backends:
+            try:
+                _backends[name] = BACKENDS[name]()
+            except ImportError as e:
+                logging.info(f"Transcoder {name} unavailable ({e}), using ffmpeg")
+                _backends[name] = FfmpegTranscoder()
+        return _backends[name]
+
+
+def info(src, name=None):
+    """``(width, height, seconds)`` of a video, read from its header by the configured backend."""
+    return backend(name).info(src)
+
+
+def transcode(src, dst, ratio, progress=None, should_stop=None, name=None, x264_preset=None):
+    """Crop ``src`` to ``ratio`` and compress it to ``dst`` with the configured backend.
+
+    ``x264_preset`` overrides :func:`preset` (calibration times each tier).
+    Returns ``dst``, or None if ``should_stop`` fired; raises TranscodeError on failure.
+    """
+    tc = backend(name)
+    with trace.span("transcode", backend=tc.name):
+        return tc.transcode(src, dst, ratio, progress=progress, should_stop=should_stop,
+                            x264_preset=x264_preset)
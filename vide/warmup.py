@@ -0,0 +1,97 @@
+"""Get the shared workers ready before the first session needs them.
+
+The photo/video pool of :mod:`vide.resources` lives as long as the app, but
+it used to start on the first task of the first session, and that task also
+paid for importing Pillow and its plugins, NumPy, the configured imaging
+and transcoding backends and for decoding the template. :func:`start` does
+all of that on a daemon thread right after the window is up, and again for
+the template whenever the event's template changes, so the first file of
+every session starts on a warm pool.
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+from vide import calibrate, core, imaging, resources, settings, trace, transcode
+
+
+_lock = threading.Lock()
+# Set while the first-launch calibration runs. Sessions wait for it so they neither skew
+# its timings nor build the shared pool before the calibrated worker count is known.
+_calibrating = threading.Event()
+_pending_lock = threading.Lock()
+_pending_template = None
+
+
+def warm_up(template_path=None):
+    """Start the pool threads, import the image stack and decode ``template_path``; blocking."""
+    t0 = time.perf_counter()
+    with trace.span("warm_up"):
+        resources.prestart()
+        resources.interactive()
+        from PIL import Image
+        Image.init()
+        imaging.backend()
+        transcode.backend()
+        if settings.get("compositor") == "numpy":
+            try:
+                importlib.import_module("numpy")
+            except ImportError:
+                pass
+        if template_path:
+            template(template_path, wait=True)
+    logging.info(f"Workers warmed up in {time.perf_counter() - t0:.2f} s "
+                 f"({resources.max_workers()} worker(s))")
+
+
+def start(template_path=None):
+    """Warm up on a daemon thread and return at once. On first launch the machine is
+    calibrated first, so the pool starts with the calibrated worker count; until then
+    :func:`calibrating` is true."""
+    if calibrate.needed():
+        _calibrating.set()
+    threading.Thread(target=_guarded, args=(template_path,), name="vide-warmup", daemon=True).start()
+
+
+def calibrating():
+    """True while the first-launch calibration runs; sessions should not start yet."""
+    return _calibrating.is_set()
+
+
+def _guarded(template_path):
+    global _pending_template
+    with _lock:
+        try:
+            if _calibrating.is_set():
+                try:
+                    calibrate.run()
+                finally:
+                    with _pending_lock:
+                        _calibrating.clear()
+                        template_path = _pending_template or template_path
+                        _pending_template = None
+            warm_up(template_path)
+        except Exception as e:
+            logging.error(f"Warm-up failed: {e}")
+
+
+def template(path, wait=False):
+    """Decode the template at ``path`` into the template cache, on the pool unless ``wait``."""
+    def load():
+        try:
+            core.load_template(path)
+        except Exception as e:
+            logging.error(f"Could not preload template {path}: {e}")
+    global _pending_template
+    if wait:
+        load()
+        return
+    with _pending_lock:
+        if _calibrating.is_set():
+            # Loaded by the warm-up after calibration, so the pool is not built too early.
+            _pending_template = path
+            return
+    resources.executor().submit(load)
+
@@ -0,0 +1,87 @@
+"""Detects stalls of an event-loop thread and logs where it was stuck.
+
+The watched thread calls :meth:`StallWatchdog.beat` regularly (the GUI does
+it from a QTimer). A daemon thread checks the time since the last beat; once
+it passes ``threshold_ms`` the watched thread's Python stack is captured with
+``sys._current_frames()`` and logged, and when beats resume the total stall
+duration is logged with every distinct stack seen while it lasted.
+"""
+
+import logging
+import sys
+import threading
+import time
+import traceback
+
+
+class StallWatchdog:
+    MAX_STACKS = 5
+
+    def __init__(self, threshold_ms=500, thread_ident=None, name="GUI thread"):
+        self.threshold = threshold_ms / 1000.0
+        self.interval = min(0.1, self.threshold / 4)
+        self.thread_ident = thread_ident or threading.get_ident()
+        self.name = name
+        self.stalls = 0
+        self.longest_ms = 0.0
+        self._last_beat = time.monotonic()
+        self._stall_start = None
+        self._stacks = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread is None and self.threshold > 0:
+            self._last_beat = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def beat(self):
+        now = time.monotonic()
+        with self._lock:
+            self._last_beat = now
+            start, stacks = self._stall_start, self._stacks
+            self._stall_start, self._stacks = None, []
+        if start is not None:
+            self._report(now - start, stacks)
+
+    def capture_stack(self):
+        frame = sys._current_frames().get(self.thread_ident)
+        if frame is None:
+            return ""
+        return "".join(traceback.format_stack(frame))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                last = self._last_beat
+                stalled = self._stall_start is not None
+            blocked = time.monotonic() - last
+            if blocked < self.threshold:
+                continue
+            stack = self.capture_stack()
+            with self._lock:
+                if self._last_beat != last:
+                    continue
+                if not stalled:
+                    self._stall_start = last
+                if stack and stack not in self._stacks and len(self._stacks) < self.MAX_STACKS:
+                    self._stacks.append(stack)
+            if not stalled:
+                logging.warning(f"{self.name} blocked for {blocked * 1000:.0f} ms, stack:\n{stack}")
+
+    def _report(self, duration, stacks):
+        ms = duration * 1000
+        self.stalls += 1
+        self.longest_ms = max(self.longest_ms, ms)
+        text = "\n--- later in the same stall ---\n".join(stacks)
+        logging.warning(f"{self.name} stalled for {ms:.0f} ms "
+                        f"(threshold {self.threshold * 1000:.0f} ms):\n{text}")